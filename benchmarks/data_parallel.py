@@ -0,0 +1,145 @@
+# Module for benchmarking data-parallel training across GRU towers
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Benchmarks the scaling efficiency of data-parallel GRU+SVM training across towers"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+import multiprocessing
+import numpy as np
+import os
+import time
+
+# hyper-parameters of the benchmarked model
+BATCH_SIZE = 256
+CELL_SIZE = 256
+N_CLASSES = 2
+SEQUENCE_LENGTH = 21
+
+
+def benchmark_towers(num_towers, batch_size, cell_size, engine, intra_op_threads, steps, warmup_steps):
+    """Returns the training throughput of GRU+SVM split across `num_towers` towers
+
+    Every tower gets `batch_size` examples, so the global batch grows with the towers.
+
+    Parameter
+    ---------
+    num_towers : int
+      The number of data-parallel towers.
+    batch_size : int
+      The number of examples per tower.
+    cell_size : int
+      The size of cell state.
+    engine : str
+      The GRU engine to use.
+    intra_op_threads : int
+      The number of threads used to parallelize a single op.
+    steps : int
+      The number of timed steps.
+    warmup_steps : int
+      The number of untimed steps to run before timing.
+
+    Returns
+    -------
+    throughput : float
+      The number of training examples per second.
+    """
+
+    # import TensorFlow in the worker process only, so that no thread pool is inherited
+    from models.gru_svm.gru_svm import GruSvm
+    import tensorflow as tf
+
+    global_batch_size = batch_size * num_towers
+
+    features = np.random.randint(0, 10, size=[global_batch_size, SEQUENCE_LENGTH]).astype(np.uint8)
+    labels = np.random.randint(0, N_CLASSES, size=[global_batch_size]).astype(np.uint8)
+
+    model = GruSvm(alpha=1e-5, batch_size=global_batch_size, cell_size=cell_size, dropout_rate=0.85,
+                   num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, svm_c=0.5, engine=engine,
+                   num_towers=num_towers, intra_op_threads=intra_op_threads)
+
+    feed_dict = model.evaluation_feed(features=features, labels=labels)
+    feed_dict[model.p_keep] = model.dropout_rate
+    feed_dict[model.learning_rate] = model.alpha
+
+    with tf.Session(config=model.config) as sess:
+        sess.run(tf.global_variables_initializer())
+
+        for _ in range(warmup_steps):
+            sess.run(model.optimizer, feed_dict=feed_dict)
+
+        start_time = time.time()
+        for _ in range(steps):
+            sess.run(model.optimizer, feed_dict=feed_dict)
+
+    return steps * global_batch_size / (time.time() - start_time)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Scaling benchmark of data-parallel GRU+SVM training')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-n', '--max_towers', required=False, type=int, default=os.cpu_count(),
+                       help='the largest number of towers to benchmark')
+    group.add_argument('-g', '--engine', required=False, type=str, default='dynamic',
+                       help='the GRU engine to use')
+    group.add_argument('-b', '--batch_size', required=False, type=int, default=BATCH_SIZE,
+                       help='the number of examples per tower')
+    group.add_argument('-c', '--cell_size', required=False, type=int, default=CELL_SIZE,
+                       help='the size of cell state')
+    group.add_argument('-a', '--intra_op_threads', required=False, type=int, default=0,
+                       help='the number of intra-op threads, defaults to the CPUs divided by the towers')
+    group.add_argument('-s', '--steps', required=False, type=int, default=30,
+                       help='the number of timed steps per tower count')
+    group.add_argument('-w', '--warmup_steps', required=False, type=int, default=5,
+                       help='the number of untimed steps per tower count')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    context = multiprocessing.get_context('spawn')
+
+    print('{:>8}{:>24}{:>12}{:>14}'.format('towers', 'train (examples/s)', 'speedup', 'efficiency'))
+
+    base_throughput = None
+    for num_towers in range(1, arguments.max_towers + 1):
+        intra_op_threads = arguments.intra_op_threads or max(1, os.cpu_count() // num_towers)
+
+        with context.Pool(processes=1) as pool:
+            throughput = pool.apply(benchmark_towers,
+                                    kwds=dict(num_towers=num_towers, batch_size=arguments.batch_size,
+                                              cell_size=arguments.cell_size, engine=arguments.engine,
+                                              intra_op_threads=intra_op_threads, steps=arguments.steps,
+                                              warmup_steps=arguments.warmup_steps))
+
+        if base_throughput is None:
+            base_throughput = throughput
+
+        speedup = throughput / base_throughput
+        print('{:>8}{:>24.1f}{:>12.2f}{:>13.1f}%'.format(num_towers, throughput, speedup,
+                                                         100 * speedup / num_towers))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
@@ -0,0 +1,135 @@
+# Module for benchmarking the GRU cell engines
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Benchmarks the forward and forward/backward throughput of the GRU engines on CPU"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+from models import rnn
+from models.gru_svm.gru_svm import GruSvm
+import numpy as np
+import tensorflow as tf
+import time
+
+# hyper-parameters of the benchmarked model
+BATCH_SIZE = 256
+CELL_SIZE = 256
+N_CLASSES = 2
+SEQUENCE_LENGTH = 21
+
+
+def benchmark_engine(engine, batch_size, cell_size, steps, warmup_steps, input_mode='onehot'):
+    """Returns the forward and forward/backward throughput of a GRU engine
+
+    Parameter
+    ---------
+    engine : str
+      The GRU engine to benchmark.
+    batch_size : int
+      The number of examples per step.
+    cell_size : int
+      The size of cell state.
+    steps : int
+      The number of timed steps.
+    warmup_steps : int
+      The number of untimed steps to run before timing.
+    input_mode : str
+      The input layer of the model: "onehot" or "embedding".
+
+    Returns
+    -------
+    forward : float
+      The number of examples per second for inference.
+    forward_backward : float
+      The number of examples per second for a training step.
+    """
+
+    features = np.random.randint(0, 10, size=[batch_size, SEQUENCE_LENGTH]).astype(np.uint8)
+    labels = np.random.randint(0, N_CLASSES, size=[batch_size]).astype(np.uint8)
+
+    with tf.Graph().as_default():
+        model = GruSvm(alpha=1e-5, batch_size=batch_size, cell_size=cell_size, dropout_rate=0.85,
+                       num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, svm_c=0.5, engine=engine,
+                       input_mode=input_mode)
+
+        forward_feed = model.evaluation_feed(features=features, labels=labels)
+        train_feed = dict(forward_feed)
+        train_feed[model.p_keep] = model.dropout_rate
+        train_feed[model.learning_rate] = model.alpha
+
+        with tf.Session() as sess:
+            sess.run(tf.global_variables_initializer())
+
+            throughput = []
+            for fetches, feed_dict in [(model.predicted_class, forward_feed), (model.optimizer, train_feed)]:
+                for _ in range(warmup_steps):
+                    sess.run(fetches, feed_dict=feed_dict)
+
+                start_time = time.time()
+                for _ in range(steps):
+                    sess.run(fetches, feed_dict=feed_dict)
+                throughput.append(steps * batch_size / (time.time() - start_time))
+
+    return throughput[0], throughput[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark of the GRU engines')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-e', '--engines', required=False, type=str, nargs='+', default=rnn.ENGINES,
+                       help='the GRU engines to benchmark')
+    group.add_argument('-x', '--input_mode', required=False, type=str, default='onehot', choices=rnn.INPUT_MODES,
+                       help='the input layer of the benchmarked model')
+    group.add_argument('-b', '--batch_size', required=False, type=int, default=BATCH_SIZE,
+                       help='the number of examples per step')
+    group.add_argument('-c', '--cell_size', required=False, type=int, default=CELL_SIZE,
+                       help='the size of cell state')
+    group.add_argument('-s', '--steps', required=False, type=int, default=100,
+                       help='the number of timed steps per engine')
+    group.add_argument('-w', '--warmup_steps', required=False, type=int, default=10,
+                       help='the number of untimed steps per engine')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    results = []
+
+    for engine in arguments.engines:
+        if arguments.input_mode == 'embedding' and engine == 'fused':
+            print('Skipping the fused engine, which does not support the embedding input mode')
+            continue
+        forward, forward_backward = benchmark_engine(engine=engine, batch_size=arguments.batch_size,
+                                                     cell_size=arguments.cell_size, steps=arguments.steps,
+                                                     warmup_steps=arguments.warmup_steps,
+                                                     input_mode=arguments.input_mode)
+        results.append((engine, forward, forward_backward))
+
+    print('{:<10}{:>24}{:>24}'.format('engine', 'forward (examples/s)', 'fwd+bwd (examples/s)'))
+    for engine, forward, forward_backward in results:
+        print('{:<10}{:>24.1f}{:>24.1f}'.format(engine, forward, forward_backward))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
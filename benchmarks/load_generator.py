@@ -0,0 +1,108 @@
+# Module for generating load against the scoring server
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Load generator for the scoring server, reporting the client-side latency and throughput"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+import json
+import numpy as np
+import threading
+import time
+from urllib.request import Request
+from urllib.request import urlopen
+
+SEQUENCE_LENGTH = 21
+
+
+def run_client(url, rows, duration, seed, latencies):
+    """Sends requests of random binned features back to back, recording their latency
+
+    Parameter
+    ---------
+    url : str
+      The URL of the scoring server.
+    rows : int
+      The number of records per request.
+    duration : float
+      The time in seconds to send requests for.
+    seed : int
+      The seed for generating the features.
+    latencies : list
+      The list to append the latency in seconds of every request to.
+    """
+    random_state = np.random.RandomState(seed)
+    deadline = time.time() + duration
+
+    while time.time() < deadline:
+        features = random_state.randint(0, 10, size=[rows, SEQUENCE_LENGTH])
+        body = json.dumps({'features': features.tolist()}).encode('utf-8')
+
+        start_time = time.time()
+        with urlopen(Request(url + '/predict', data=body, headers={'Content-Type': 'application/json'})) as reply:
+            reply.read()
+        latencies.append(time.time() - start_time)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Load generator for the scoring server')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-u', '--url', required=False, type=str, default='http://127.0.0.1:8080',
+                       help='the URL of the scoring server')
+    group.add_argument('-n', '--clients', required=False, type=int, default=16,
+                       help='the number of concurrent clients')
+    group.add_argument('-r', '--rows', required=False, type=int, default=1,
+                       help='the number of records per request')
+    group.add_argument('-d', '--duration', required=False, type=float, default=10.0,
+                       help='the time in seconds to generate load for')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    latencies = []
+
+    clients = [threading.Thread(target=run_client, args=(arguments.url, arguments.rows, arguments.duration, seed,
+                                                         latencies))
+               for seed in range(arguments.clients)]
+
+    start_time = time.time()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.time() - start_time
+
+    latencies = np.array(latencies)
+
+    print('requests : {}, rows/s : {:.1f}'.format(latencies.size, latencies.size * arguments.rows / elapsed))
+    print('client latency -- p50 : {:.2f} ms, p99 : {:.2f} ms'.format(np.percentile(latencies, 50) * 1000,
+                                                                      np.percentile(latencies, 99) * 1000))
+
+    with urlopen(arguments.url + '/metrics') as reply:
+        print('server metrics : {}'.format(json.loads(reply.read().decode('utf-8'))))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
@@ -0,0 +1,119 @@
+# Module for benchmarking the NumPy inference engine against TensorFlow
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Checks the NumPy inference engine against the TensorFlow graph, and compares their throughput"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+from models import rnn
+from models.gru_svm.gru_svm import GruSvm
+from models.numpy_gru import export
+from models.numpy_gru import NumpyGru
+import numpy as np
+import os
+import shutil
+import tempfile
+import tensorflow as tf
+import time
+
+# hyper-parameters of the benchmarked model
+BATCH_SIZE = 256
+CELL_SIZE = 256
+N_CLASSES = 2
+SEQUENCE_LENGTH = 21
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark of the NumPy inference engine')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-e', '--engine', required=False, type=str, default='dynamic', choices=rnn.ENGINES,
+                       help='the GRU engine of the exported model')
+    group.add_argument('-b', '--batch_size', required=False, type=int, default=BATCH_SIZE,
+                       help='the number of examples per step')
+    group.add_argument('-c', '--cell_size', required=False, type=int, default=CELL_SIZE,
+                       help='the size of cell state')
+    group.add_argument('-s', '--steps', required=False, type=int, default=100,
+                       help='the number of timed steps per engine')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    features = np.random.randint(0, 10, size=[arguments.batch_size * arguments.steps, SEQUENCE_LENGTH])
+    features = features.astype(np.float32)
+    labels = np.random.randint(0, N_CLASSES, size=[features.shape[0]]).astype(np.uint8)
+
+    checkpoint_path = tempfile.mkdtemp()
+
+    try:
+        with tf.Graph().as_default():
+            model = GruSvm(alpha=1e-5, batch_size=arguments.batch_size, cell_size=arguments.cell_size,
+                           dropout_rate=0.85, num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, svm_c=0.5,
+                           engine=arguments.engine)
+            output_tensor = tf.get_default_graph().get_tensor_by_name(GruSvm.output_tensor)
+
+            with tf.Session() as sess:
+                sess.run(tf.global_variables_initializer())
+                model.saver().save(sess=sess, save_path=os.path.join(checkpoint_path, 'model'))
+
+                outputs, predictions = [], []
+                start_time = time.time()
+                for step in range(arguments.steps):
+                    offset = step * arguments.batch_size
+                    feed_dict = model.evaluation_feed(features=features[offset:offset + arguments.batch_size],
+                                                      labels=labels[offset:offset + arguments.batch_size])
+                    output, prediction = sess.run([output_tensor, model.predicted_class], feed_dict=feed_dict)
+                    outputs.append(output)
+                    predictions.append(prediction)
+                tf_throughput = features.shape[0] / (time.time() - start_time)
+
+        export_file = os.path.join(checkpoint_path, 'model.npz')
+        export(checkpoint_path=checkpoint_path, export_file=export_file, head='svm')
+
+        start_time = time.time()
+        engine = NumpyGru.load(export_file)
+        load_time = time.time() - start_time
+
+        start_time = time.time()
+        numpy_outputs = engine.decision_function(features, batch_size=arguments.batch_size)
+        numpy_throughput = features.shape[0] / (time.time() - start_time)
+    finally:
+        shutil.rmtree(checkpoint_path)
+
+    outputs = np.concatenate(outputs)
+    predictions = np.concatenate(predictions)
+
+    # the predictions may only differ where the output is within rounding error of zero
+    agreement = np.mean(np.all(np.sign(numpy_outputs) == predictions, axis=1))
+
+    print('max |output difference| : {}'.format(np.max(np.abs(numpy_outputs - outputs))))
+    print('prediction agreement : {}'.format(agreement))
+    print('NumPy engine load time : {} ms'.format(load_time * 1000))
+    print('{:<12}{:>24}'.format('engine', 'forward (examples/s)'))
+    print('{:<12}{:>24.1f}'.format('tensorflow', tf_throughput))
+    print('{:<12}{:>24.1f}'.format('numpy', numpy_throughput))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
@@ -0,0 +1,154 @@
+# Module for benchmarking the session thread counts
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Benchmarks the training and inference throughput of GRU+SVM over session thread counts"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+import itertools
+import multiprocessing
+import numpy as np
+import time
+
+# hyper-parameters of the benchmarked model
+BATCH_SIZE = 256
+CELL_SIZE = 256
+N_CLASSES = 2
+SEQUENCE_LENGTH = 21
+
+
+def benchmark_threads(intra_op_threads, inter_op_threads, cpu_affinity, numa_node, batch_size, cell_size, engine,
+                      steps, warmup_steps):
+    """Returns the training and inference throughput of GRU+SVM for a thread configuration
+
+    This runs in a fresh process for every configuration, since both the CPU pinning and
+    the TensorFlow thread pools are process-wide.
+
+    Parameter
+    ---------
+    intra_op_threads : int
+      The number of threads used to parallelize a single op.
+    inter_op_threads : int
+      The number of threads used to run independent ops.
+    cpu_affinity : str
+      The CPU list to pin the process to.
+    numa_node : int
+      The NUMA node whose CPUs to pin the process to.
+    batch_size : int
+      The number of examples per step.
+    cell_size : int
+      The size of cell state.
+    engine : str
+      The GRU engine to use.
+    steps : int
+      The number of timed steps.
+    warmup_steps : int
+      The number of untimed steps to run before timing.
+
+    Returns
+    -------
+    train_throughput : float
+      The number of examples per second for a training step.
+    inference_throughput : float
+      The number of examples per second for inference.
+    """
+
+    # import TensorFlow in the worker process only, so that no thread pool is inherited
+    from models.gru_svm.gru_svm import GruSvm
+    import tensorflow as tf
+
+    features = np.random.randint(0, 10, size=[batch_size, SEQUENCE_LENGTH]).astype(np.uint8)
+    labels = np.random.randint(0, N_CLASSES, size=[batch_size]).astype(np.uint8)
+
+    model = GruSvm(alpha=1e-5, batch_size=batch_size, cell_size=cell_size, dropout_rate=0.85, num_classes=N_CLASSES,
+                   sequence_length=SEQUENCE_LENGTH, svm_c=0.5, engine=engine, intra_op_threads=intra_op_threads,
+                   inter_op_threads=inter_op_threads, cpu_affinity=cpu_affinity, numa_node=numa_node)
+
+    inference_feed = model.evaluation_feed(features=features, labels=labels)
+    train_feed = dict(inference_feed)
+    train_feed[model.p_keep] = model.dropout_rate
+    train_feed[model.learning_rate] = model.alpha
+
+    with tf.Session(config=model.config) as sess:
+        sess.run(tf.global_variables_initializer())
+
+        throughput = []
+        for fetches, feed_dict in [(model.optimizer, train_feed), (model.predicted_class, inference_feed)]:
+            for _ in range(warmup_steps):
+                sess.run(fetches, feed_dict=feed_dict)
+
+            start_time = time.time()
+            for _ in range(steps):
+                sess.run(fetches, feed_dict=feed_dict)
+            throughput.append(steps * batch_size / (time.time() - start_time))
+
+    return throughput[0], throughput[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Thread-scaling benchmark of GRU+SVM')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-a', '--intra_op_threads', required=False, type=int, nargs='+', default=[1, 2, 4, 8],
+                       help='the intra-op thread counts to benchmark')
+    group.add_argument('-e', '--inter_op_threads', required=False, type=int, nargs='+', default=[1, 2],
+                       help='the inter-op thread counts to benchmark')
+    group.add_argument('--cpu_affinity', required=False, type=str,
+                       help='the CPU list to pin the benchmark to, e.g. "0-7"')
+    group.add_argument('--numa_node', required=False, type=int,
+                       help='the NUMA node whose CPUs to pin the benchmark to')
+    group.add_argument('-g', '--engine', required=False, type=str, default='dynamic',
+                       help='the GRU engine to use')
+    group.add_argument('-b', '--batch_size', required=False, type=int, default=BATCH_SIZE,
+                       help='the number of examples per step')
+    group.add_argument('-c', '--cell_size', required=False, type=int, default=CELL_SIZE,
+                       help='the size of cell state')
+    group.add_argument('-s', '--steps', required=False, type=int, default=50,
+                       help='the number of timed steps per configuration')
+    group.add_argument('-w', '--warmup_steps', required=False, type=int, default=5,
+                       help='the number of untimed steps per configuration')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    context = multiprocessing.get_context('spawn')
+
+    print('{:>8}{:>8}{:>24}{:>24}'.format('intra', 'inter', 'train (examples/s)', 'inference (examples/s)'))
+
+    for intra_op_threads, inter_op_threads in itertools.product(arguments.intra_op_threads,
+                                                                arguments.inter_op_threads):
+        with context.Pool(processes=1) as pool:
+            train_throughput, inference_throughput = pool.apply(
+                benchmark_threads, kwds=dict(intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads,
+                                             cpu_affinity=arguments.cpu_affinity, numa_node=arguments.numa_node,
+                                             batch_size=arguments.batch_size, cell_size=arguments.cell_size,
+                                             engine=arguments.engine, steps=arguments.steps,
+                                             warmup_steps=arguments.warmup_steps))
+
+        print('{:>8}{:>8}{:>24.1f}{:>24.1f}'.format(intra_op_threads, inter_op_threads, train_throughput,
+                                                    inference_throughput))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
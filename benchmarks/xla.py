@@ -0,0 +1,156 @@
+# Module for benchmarking XLA compilation of the model graphs
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Benchmarks the per-step latency of the model graphs with and without XLA compilation"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+from models.gru_softmax.gru_softmax import GruSoftmax
+from models.gru_svm.gru_svm import GruSvm
+from models.svm.svm import Svm
+import numpy as np
+import tensorflow as tf
+import time
+from utils.session import session_config
+from utils.session import xla_available
+
+# hyper-parameters of the benchmarked models
+BATCH_SIZE = 256
+CELL_SIZE = 256
+N_CLASSES = 2
+SEQUENCE_LENGTH = 21
+
+MODELS = ['gru_svm', 'gru_softmax', 'svm']
+
+
+def build_model(model, batch_size, cell_size, engine, use_xla):
+    """Builds one of the benchmarked models in the default graph"""
+    if model == 'gru_svm':
+        return GruSvm(alpha=1e-5, batch_size=batch_size, cell_size=cell_size, dropout_rate=0.85,
+                      num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, svm_c=0.5, engine=engine,
+                      use_xla=use_xla)
+    elif model == 'gru_softmax':
+        return GruSoftmax(alpha=1e-6, batch_size=batch_size, cell_size=cell_size, dropout_rate=0.8,
+                          num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, engine=engine, use_xla=use_xla)
+    return Svm(alpha=1e-5, batch_size=batch_size, svm_c=1, num_classes=N_CLASSES, num_features=SEQUENCE_LENGTH,
+               use_xla=use_xla)
+
+
+def benchmark_model(model, batch_size, cell_size, engine, use_xla, steps, warmup_steps):
+    """Returns the mean latency of a training step and of an inference step, in milliseconds
+
+    Parameter
+    ---------
+    model : str
+      The model to benchmark: "gru_svm", "gru_softmax", or "svm".
+    batch_size : int
+      The number of examples per step.
+    cell_size : int
+      The size of cell state.
+    engine : str
+      The GRU engine of the GRU models.
+    use_xla : bool
+      Whether to compile the graph with XLA.
+    steps : int
+      The number of timed steps.
+    warmup_steps : int
+      The number of untimed steps to run before timing, which includes the XLA compilation.
+
+    Returns
+    -------
+    train_latency : float
+      The mean latency of a training step.
+    inference_latency : float
+      The mean latency of an inference step.
+    """
+
+    features = np.random.randint(0, 10, size=[batch_size, SEQUENCE_LENGTH]).astype(np.uint8)
+    labels = np.random.randint(0, N_CLASSES, size=[batch_size]).astype(np.uint8)
+
+    with tf.Graph().as_default():
+        network = build_model(model=model, batch_size=batch_size, cell_size=cell_size, engine=engine,
+                              use_xla=use_xla)
+
+        inference_feed = network.evaluation_feed(features=features, labels=labels)
+        train_feed = dict(inference_feed)
+        train_feed[network.learning_rate] = network.alpha
+        if model != 'svm':
+            train_feed[network.p_keep] = network.dropout_rate
+
+        with tf.Session(config=session_config(use_xla=use_xla)) as sess:
+            sess.run(tf.global_variables_initializer())
+
+            latency = []
+            for fetches, feed_dict in [(network.optimizer, train_feed), (network.predicted_class, inference_feed)]:
+                for _ in range(warmup_steps):
+                    sess.run(fetches, feed_dict=feed_dict)
+
+                start_time = time.time()
+                for _ in range(steps):
+                    sess.run(fetches, feed_dict=feed_dict)
+                latency.append((time.time() - start_time) * 1000 / steps)
+
+    return latency[0], latency[1]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Benchmark of the XLA JIT compilation')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-m', '--models', required=False, type=str, nargs='+', default=MODELS, choices=MODELS,
+                       help='the models to benchmark')
+    group.add_argument('-e', '--engine', required=False, type=str, default='static',
+                       help='the GRU engine of the GRU models')
+    group.add_argument('-b', '--batch_size', required=False, type=int, default=BATCH_SIZE,
+                       help='the number of examples per step')
+    group.add_argument('-c', '--cell_size', required=False, type=int, default=CELL_SIZE,
+                       help='the size of cell state')
+    group.add_argument('-s', '--steps', required=False, type=int, default=100,
+                       help='the number of timed steps per model')
+    group.add_argument('-w', '--warmup_steps', required=False, type=int, default=10,
+                       help='the number of untimed steps per model')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    modes = [False, True] if xla_available() else [False]
+
+    if not xla_available():
+        print('XLA is not available in this TensorFlow build, only the default executor is benchmarked')
+
+    print('{:<14}{:>6}{:>20}{:>24}'.format('model', 'xla', 'train step (ms)', 'inference step (ms)'))
+
+    for model in arguments.models:
+        for use_xla in modes:
+            train_latency, inference_latency = benchmark_model(model=model, batch_size=arguments.batch_size,
+                                                               cell_size=arguments.cell_size,
+                                                               engine=arguments.engine, use_xla=use_xla,
+                                                               steps=arguments.steps,
+                                                               warmup_steps=arguments.warmup_steps)
+            print('{:<14}{:>6}{:>20.3f}{:>24.3f}'.format(model, 'on' if use_xla else 'off', train_latency,
+                                                         inference_latency))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
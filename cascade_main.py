@@ -0,0 +1,119 @@
+# Module for tuning and testing the linear SVM and GRU+SVM cascade
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Cascade of a linear SVM prefilter and the GRU+SVM: picks the uncertainty band, and reports the throughput gain"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+from models.cascade import Cascade
+from models.cascade import choose_band
+from models.cascade import margin
+from models.cascade import NumpySvm
+import numpy as np
+import time
+from utils import checkpoint
+from utils.serving import load_scorer
+
+# the number of records scored at once
+BATCH_SIZE = 4096
+
+# available GRU+SVM models for the second stage
+MODELS = ['gru_svm', 'numpy']
+
+
+def timed(score, features, batch_size):
+    """Returns the predictions of a scoring function, and its throughput in rows per second"""
+    start_time = time.time()
+    predictions = np.concatenate([score(features[offset:offset + batch_size])
+                                  for offset in range(0, features.shape[0], batch_size)])
+    return predictions, features.shape[0] / (time.time() - start_time)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Cascade of a linear SVM and the GRU+SVM for Intrusion Detection')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-o', '--operation', required=True, type=str, choices=['tune', 'test'],
+                       help='the operation to perform: "tune" the band on validation data, or "test" a band')
+    group.add_argument('-s', '--svm_checkpoint_path', required=True, type=str,
+                       help='path where the trained linear SVM is saved')
+    group.add_argument('-m', '--model', required=False, type=str, default='gru_svm', choices=MODELS,
+                       help='the GRU+SVM model, "numpy" for a model exported with numpy_main.py')
+    group.add_argument('-c', '--checkpoint_path', required=True, type=str,
+                       help='path where the trained GRU+SVM is saved, or the exported NPZ file for "numpy"')
+    group.add_argument('-v', '--dataset', required=True, type=str,
+                       help='the NumPy array validation dataset (*.npy) to tune with, or testing dataset to test')
+    group.add_argument('-l', '--max_accuracy_loss', required=False, type=float, default=0.001,
+                       help='the maximum drop of accuracy from scoring every record with the GRU+SVM')
+    group.add_argument('--band', required=False, type=float,
+                       help='the margin of the linear SVM under which a record is scored with the GRU+SVM')
+    group.add_argument('-b', '--batch_size', required=False, type=int, default=BATCH_SIZE,
+                       help='the number of records to score at once')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    # the latest published version of the Svm, as for the GRU+SVM
+    svm = NumpySvm.load(checkpoint.resolve(arguments.svm_checkpoint_path))
+    score = load_scorer(model=arguments.model, checkpoint_path=arguments.checkpoint_path)
+
+    # the label is the 18th column, as in utils.data.load_data
+    dataset = np.load(arguments.dataset)
+    labels = dataset[:, 17].astype(np.int64)
+    features = np.delete(arr=dataset, obj=[17], axis=1).astype(np.float32)
+
+    if arguments.operation == 'tune':
+        output, svm_throughput = timed(svm.decision_function, features, arguments.batch_size)
+        gru_predictions, gru_throughput = timed(score, features, arguments.batch_size)
+
+        svm_correct = np.argmax(np.sign(output), axis=1) == labels
+        gru_correct = np.argmax(gru_predictions, axis=1) == labels
+
+        band, accuracy, fraction = choose_band(margins=margin(output), svm_correct=svm_correct,
+                                               gru_correct=gru_correct,
+                                               max_accuracy_loss=arguments.max_accuracy_loss)
+
+        # the measured throughput of the cascade, which may differ from the estimate by the batch overheads
+        cascade = Cascade(svm=svm, score=score, band=band)
+        _, cascade_throughput = timed(cascade, features, arguments.batch_size)
+
+        print('{:<10}{:>12}{:>16}'.format('model', 'accuracy', 'rows/s'))
+        print('{:<10}{:>12.4f}{:>16.1f}'.format('svm', np.mean(svm_correct), svm_throughput))
+        print('{:<10}{:>12.4f}{:>16.1f}'.format('gru_svm', np.mean(gru_correct), gru_throughput))
+        print('{:<10}{:>12.4f}{:>16.1f}'.format('cascade', accuracy, cascade_throughput))
+        print('band : {}, escalated to the GRU+SVM : {:.2%}, speedup : {:.2f}x'.format(
+            band, fraction, cascade_throughput / gru_throughput))
+    elif arguments.operation == 'test':
+        if arguments.band is None:
+            raise ValueError('The band is required for testing, use the "tune" operation to choose one')
+
+        cascade = Cascade(svm=svm, score=score, band=arguments.band)
+        predictions, throughput = timed(cascade, features, arguments.batch_size)
+
+        print('Test accuracy : {}, {} rows/s, {}'.format(np.mean(np.argmax(predictions, axis=1) == labels),
+                                                         throughput, cascade.metrics()))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
@@ -0,0 +1,98 @@
+# Module for comparing GRU+SVM and GRU+Softmax trained in one data pass
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Comparison of GRU+SVM and GRU+Softmax, trained together in one pass through the data"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+import gru_softmax_main
+import gru_svm_main
+from models import rnn
+from models.multi_head.gru_multi_head import GruMultiHead
+from models.multi_head.gru_multi_head import HEADS
+from utils import data
+
+# hyper-parameters of the heads, as in their main scripts
+BATCH_SIZE = gru_svm_main.BATCH_SIZE
+CELL_SIZE = gru_svm_main.CELL_SIZE
+DROPOUT_P_KEEP = {'svm': gru_svm_main.DROPOUT_P_KEEP, 'softmax': gru_softmax_main.DROPOUT_P_KEEP}
+HM_EPOCHS = gru_svm_main.HM_EPOCHS
+LEARNING_RATE = {'svm': gru_svm_main.LEARNING_RATE, 'softmax': gru_softmax_main.LEARNING_RATE}
+N_CLASSES = 2
+SEQUENCE_LENGTH = 21
+SVM_C = gru_svm_main.SVM_C
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='GRU+SVM and GRU+Softmax comparison for Intrusion Detection')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-t', '--train_dataset', required=True, type=str,
+                       help='the NumPy array training dataset (*.npy) to be used')
+    group.add_argument('-v', '--validation_dataset', required=True, type=str,
+                       help='the NumPy array validation dataset (*.npy) to be used')
+    group.add_argument('-c', '--checkpoint_path', required=True, type=str,
+                       help='path where to save the trained model')
+    group.add_argument('-l', '--log_path', required=True, type=str,
+                       help='path where to save the TensorBoard logs')
+    group.add_argument('-m', '--model_name', required=False, type=str, default='gru_multi_head.ckpt',
+                       help='filename for the trained model')
+    group.add_argument('-s', '--shared_trunk', action='store_true',
+                       help='train both heads on one shared GRU, instead of a GRU tower per head')
+    group.add_argument('-e', '--engine', required=False, type=str, default='dynamic', choices=rnn.ENGINES,
+                       help='the GRU engine to use: "dynamic", "static", or "fused"')
+    group.add_argument('-x', '--input_mode', required=False, type=str, default='onehot', choices=rnn.INPUT_MODES,
+                       help='the input layer: "onehot" or "embedding"')
+    group.add_argument('--max_steps', required=False, type=int,
+                       help='stop training at this step')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    # load and batch the data once for both heads
+    train_features, train_labels = data.load_data(dataset=arguments.train_dataset)
+    validation_features, validation_labels = data.load_data(dataset=arguments.validation_dataset)
+
+    train_size = train_features.shape[0] - (train_features.shape[0] % BATCH_SIZE)
+
+    model = GruMultiHead(alpha=LEARNING_RATE, batch_size=BATCH_SIZE, cell_size=CELL_SIZE,
+                         dropout_rate=DROPOUT_P_KEEP, num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH,
+                         svm_c=SVM_C, shared_trunk=arguments.shared_trunk, engine=arguments.engine,
+                         input_mode=arguments.input_mode)
+
+    results = model.train(checkpoint_path=arguments.checkpoint_path, log_path=arguments.log_path,
+                          model_name=arguments.model_name, epochs=HM_EPOCHS,
+                          train_data=[train_features, train_labels], train_size=train_size,
+                          validation_data=[validation_features, validation_labels],
+                          validation_size=validation_features.shape[0], result_path=None,
+                          max_steps=arguments.max_steps)
+
+    print('{:>10}{:>12}{:>16}  {}'.format('head', 'accuracy', 'loss', 'confusion matrix'))
+    for head in HEADS:
+        print('{:>10}{:>12.4f}{:>16.4f}  {}'.format(head, results[head]['accuracy'], results[head]['loss'],
+                                                    results[head]['confusion_matrix'].tolist()))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
@@ -0,0 +1,102 @@
+# Module for k-fold cross-validation of the models
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Parallel k-fold cross-validation of the GRU+SVM, GRU+Softmax, and SVM models"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+import gru_softmax_main
+import gru_svm_main
+import numpy as np
+import os
+import svm_main
+from utils import cross_validation
+from utils import search
+
+# the hyper-parameters of the models, as in their main scripts
+CONFIGURATIONS = {
+    'gru_svm': dict(alpha=gru_svm_main.LEARNING_RATE, batch_size=gru_svm_main.BATCH_SIZE,
+                    cell_size=gru_svm_main.CELL_SIZE, dropout_rate=gru_svm_main.DROPOUT_P_KEEP,
+                    svm_c=gru_svm_main.SVM_C),
+    'gru_softmax': dict(alpha=gru_softmax_main.LEARNING_RATE, batch_size=gru_softmax_main.BATCH_SIZE,
+                        cell_size=gru_softmax_main.CELL_SIZE, dropout_rate=gru_softmax_main.DROPOUT_P_KEEP),
+    'svm': dict(alpha=svm_main.LEARNING_RATE, batch_size=svm_main.BATCH_SIZE, svm_c=svm_main.SVM_C),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='k-fold cross-validation for Intrusion Detection')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('--model', required=True, type=str, choices=search.MODELS,
+                       help='the model to cross-validate')
+    group.add_argument('-d', '--dataset', required=True, type=str,
+                       help='the NumPy array dataset (*.npy) to be used')
+    group.add_argument('-o', '--output_path', required=True, type=str,
+                       help='path where to save the dataset cache, and the folds and results of every run')
+    group.add_argument('-k', '--num_folds', required=False, type=int, default=5,
+                       help='the number of folds')
+    group.add_argument('-n', '--num_epochs', required=False, type=int, default=1,
+                       help='the number of passes through the training examples of a fold')
+    group.add_argument('--max_steps', required=False, type=int,
+                       help='stop training a fold at this step')
+    group.add_argument('-w', '--num_workers', required=False, type=int, default=os.cpu_count(),
+                       help='the number of folds to run in parallel')
+    group.add_argument('--seed', required=False, type=int, default=0,
+                       help='the seed for assigning the examples to folds')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    # cache the dataset once, for every fold process to memory-map
+    dataset_files = search.cache_dataset(dataset=arguments.dataset,
+                                         cache_path=os.path.join(arguments.output_path, 'cache'))
+
+    # the folds and the results of every run go to a new directory, next to the shared cache, so a fold never
+    # resumes the checkpoint of a fold of an earlier run, e.g. trained on the held-out rows of another seed
+    output_path = search.new_run_path(search_path=arguments.output_path)
+    print('cross-validation -- {}'.format(output_path))
+
+    results, conf = cross_validation.cross_validate(model=arguments.model,
+                                                    configuration=CONFIGURATIONS[arguments.model],
+                                                    output_path=output_path, dataset_files=dataset_files,
+                                                    num_folds=arguments.num_folds, epochs=arguments.num_epochs,
+                                                    max_steps=arguments.max_steps,
+                                                    num_workers=arguments.num_workers, seed=arguments.seed)
+
+    print('{:>6}{:>12}{:>16}{:>12}{:>12}  {}'.format('fold', 'accuracy', 'loss', 'train (s)', 'eval (s)',
+                                                     'confusion matrix'))
+    for fold, result in enumerate(results):
+        print('{:>6}{:>12.4f}{:>16.4f}{:>12.1f}{:>12.1f}  {}'.format(fold, result['accuracy'], result['loss'],
+                                                                     result['train_time'],
+                                                                     result['evaluation_time'],
+                                                                     result['confusion_matrix'].tolist()))
+
+    accuracy = np.array([result['accuracy'] for result in results])
+    print('accuracy : {} +/- {}'.format(accuracy.mean(), accuracy.std()))
+    print('confusion matrix :\n{}'.format(conf))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
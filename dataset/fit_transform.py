@@ -0,0 +1,117 @@
+# Module for fitting the persisted preprocessing of the Kyoto University 2013 Network Traffic Data
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Fits the normalization and binning of `normalize_data.py` and `bin_data.py` into a transform file"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+import normalize_data as nd
+import numpy as np
+import pandas as pd
+from sklearn import preprocessing
+from transform import bin_values
+from transform import fit_edges
+from transform import RecordTransform
+from transform import to_hours
+
+# the features of the models, i.e. the columns saved by bin_data.py, but the label
+FEATURE_NAMES = [name for name in nd.COLUMN_NAMES if name not in ['dst_ip_add', 'src_ip_add', 'label']]
+
+# the features binned by bin_data.py
+BINNED_FEATURES = ['duration', 'src_bytes', 'dest_bytes', 'count', 'same_srv_rate', 'serror_rate', 'srv_serror_rate',
+                   'dst_host_count', 'dst_host_srv_count', 'dst_host_same_src_port_rate', 'dst_host_serror_rate',
+                   'dst_host_srv_serror_rate', 'src_port_num', 'dst_port_num', 'start_time', 'service', 'flag']
+
+DETECTION_FEATURES = ['ids_detection', 'malware_detection', 'ashula_detection']
+
+
+def fit_transform(path, binning):
+    """Fits the transform of the raw records in the CSV files converted by `txt_to_csv.py`
+
+    Parameter
+    ---------
+    path : str
+      The path of the CSV files of the dataset.
+    binning : int
+      The type of binning: 0 if bucket binning, 1 if quantile binning.
+
+    Returns
+    -------
+    transform : RecordTransform
+      The transform of the raw records into binned features.
+    """
+    df = pd.DataFrame()
+
+    for file in nd.list_files(path=path):
+        # read the fields as strings, as the records are streamed
+        df = df.append(pd.read_csv(filepath_or_buffer=file, names=nd.COLUMN_NAMES, dtype=str))
+        print('Appending {}'.format(file))
+
+    df = df.dropna(axis=0, how='any')
+
+    features = []
+
+    for name in FEATURE_NAMES:
+        if name in DETECTION_FEATURES:
+            features.append({'name': name, 'type': 'detection'})
+        elif name in nd.COLUMN_TO_INDEX:
+            # the sorted categories of preprocessing.LabelEncoder, indexed by their position
+            encoder = preprocessing.LabelEncoder().fit(df[name])
+            codes = np.arange(len(encoder.classes_))
+            if name in BINNED_FEATURES:
+                codes = bin_values(fit_edges(encoder.transform(df[name]), binning), codes)
+            features.append({'name': name, 'type': 'category',
+                             'codes': dict(zip(encoder.classes_.tolist(), codes.tolist()))})
+        elif name == 'start_time':
+            values = df[name].apply(to_hours)
+            features.append({'name': name, 'type': 'time', 'edges': fit_edges(values, binning).tolist()})
+        else:
+            values = df[name].astype(np.float64)
+            features.append({'name': name, 'type': 'continuous', 'edges': fit_edges(values, binning).tolist()})
+
+    return RecordTransform(columns=nd.COLUMN_NAMES, features=features, label='label', binning=int(binning))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Module for fitting the preprocessing of the Kyoto University 2013 dataset, for streaming')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-d', '--dataset', required=True, type=str,
+                       help='path of the dataset in CSV format, as converted by txt_to_csv.py')
+    group.add_argument('-w', '--transform_file', required=True, type=str,
+                       help='path of the JSON file where to save the transform')
+    group.add_argument('-b', '--binning', required=False, type=int, default=1,
+                       help='set to 0 for bucket binning; set 1 for decile binning')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    transform = fit_transform(path=arguments.dataset, binning=arguments.binning)
+    transform.save(arguments.transform_file)
+    print('Saved transform : {}'.format(arguments.transform_file))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
@@ -0,0 +1,184 @@
+# Module for the persisted preprocessing of the Kyoto University 2013 Network Traffic Data
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Persisted normalization and binning of raw Kyoto University 2013 records
+
+The offline chain (`normalize_data.py`, then `bin_data.py`) standardizes the continuous features,
+indexes the categorical features, then bins them. Standardization and indexing are monotonic, so
+the same bins, up to rounding at the bin edges, are found by comparing the raw values against bin
+edges fitted in raw space, which is what a `RecordTransform` does, one record at a time if need be.
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import json
+import numpy as np
+
+# the types of features in a transform
+# "continuous": binned by its raw value
+# "time": a "HH:MM:SS" time, binned by its value in hours
+# "category": mapped to a code, i.e. its index or its bin, unknown categories map to 0
+# "detection": 1 if the raw value is not "0", 0 otherwise
+FEATURE_TYPES = ['continuous', 'time', 'category', 'detection']
+
+
+def to_hours(time):
+    """Returns a "HH:MM:SS" time in hours, as in `normalize_data.py`"""
+    hours, minutes, seconds = time.split(':')
+    return int(hours) + (int(minutes) * (1 / 60)) + (int(seconds) * (1 / 3600))
+
+
+def fit_edges(values, binning):
+    """Returns the bin edges of a feature, as found by `bin_data.py`
+
+    Parameter
+    ---------
+    values : numpy.ndarray
+      The values of the feature in the dataset.
+    binning : int
+      The type of binning: 0 if bucket binning, 1 if quantile binning.
+
+    Returns
+    -------
+    edges : numpy.ndarray
+      The bin edges, for `bin_values`.
+    """
+    values = np.asarray(values, dtype=np.float64)
+
+    if int(binning) == 0:
+        # the 10 edges of np.digitize(..., right=True)
+        return np.linspace(values.min(), values.max(), 10)
+
+    # the upper edges of the pd.qcut(..., 10, duplicates='drop') deciles
+    return np.unique(np.percentile(values, np.linspace(0, 100, 11)))[1:]
+
+
+def bin_values(edges, values):
+    """Returns the bins of the values, i.e. the number of edges below them, up to the last bin
+
+    Parameter
+    ---------
+    edges : numpy.ndarray
+      The bin edges of a feature.
+    values : numpy.ndarray
+      The values to be binned.
+
+    Returns
+    -------
+    bins : numpy.ndarray
+      The bins of the values.
+    """
+    return np.minimum(np.searchsorted(edges, values, side='left'), max(len(edges) - 1, 0))
+
+
+class RecordTransform:
+    """Normalization and binning of raw records into the features of the models"""
+
+    def __init__(self, columns, features, label, binning):
+        """Initialize the transform
+
+        Parameter
+        ---------
+        columns : list
+          The names of the fields of a raw record, in order.
+        features : list
+          The features of the models in order, each a dict with its "name" and "type", the "edges" of the
+          binned "continuous" and "time" features, and the "codes" of the "category" features.
+        label : str
+          The name of the field of the label.
+        binning : int
+          The type of binning the transform was fitted with.
+        """
+        self.columns = columns
+        self.features = features
+        self.label = label
+        self.binning = binning
+
+    @classmethod
+    def load(cls, transform_file):
+        """Returns the transform saved in a JSON file"""
+        with open(transform_file, 'r') as file:
+            return cls(**json.load(file))
+
+    def save(self, transform_file):
+        """Saves the transform to a JSON file"""
+        with open(transform_file, 'w') as file:
+            json.dump({'columns': self.columns, 'features': self.features, 'label': self.label,
+                       'binning': self.binning}, file, indent=2)
+
+    def binned_features(self, records):
+        """Returns the binned features of raw records, raising a ValueError if a field cannot be parsed
+
+        Parameter
+        ---------
+        records : list
+          The raw records, each a list of its fields as strings.
+
+        Returns
+        -------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+        """
+        features = np.empty([len(records), len(self.features)], dtype=np.float32)
+
+        for index, feature in enumerate(self.features):
+            column = self.columns.index(feature['name'])
+            fields = [record[column] for record in records]
+
+            if feature['type'] == 'continuous':
+                features[:, index] = bin_values(feature['edges'], np.array(fields, dtype=np.float64))
+            elif feature['type'] == 'time':
+                features[:, index] = bin_values(feature['edges'], np.array([to_hours(field) for field in fields]))
+            elif feature['type'] == 'category':
+                features[:, index] = [feature['codes'].get(field, 0) for field in fields]
+            else:
+                features[:, index] = [field != '0' for field in fields]
+
+        return features
+
+    def labels(self, records):
+        """Returns the labels of raw records, 1 if there was an attack, 0 otherwise
+
+        Parameter
+        ---------
+        records : list
+          The raw records, each a list of its fields as strings.
+        """
+        # there is an attack if the label is either -1 or -2
+        column = self.columns.index(self.label)
+        return np.array([int(record[column]) in (-1, -2) for record in records], dtype=np.uint8)
+
+    def transform(self, records):
+        """Returns the binned features and the labels of raw records
+
+        Parameter
+        ---------
+        records : list
+          The raw records, each a list of its fields as strings.
+
+        Returns
+        -------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+        labels : numpy.ndarray
+          The [N] labels, 1 if there was an attack, 0 otherwise.
+        """
+        return self.binned_features(records), self.labels(records)
@@ -0,0 +1,183 @@
+# Module for distilling the GRU+SVM into cheaper students
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Distills the trained GRU+SVM into cheaper students, and reports their accuracy/throughput trade-off"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+from models.distill import LinearStudent
+from models.distill import LookupStudent
+import numpy as np
+import os
+import time
+
+# hyper-parameters of the GRU student, as in gru_svm_main.py
+BATCH_SIZE = 256
+DROPOUT_P_KEEP = 0.85
+HM_EPOCHS = 1
+LEARNING_RATE = 1e-5
+N_CLASSES = 2
+SEQUENCE_LENGTH = 21
+SVM_C = 0.5
+
+# available teachers
+TEACHERS = ['gru_svm', 'numpy']
+
+
+def load_dataset(dataset):
+    """Returns the features and labels of a NumPy array dataset, as in utils.data.load_data"""
+    dataset = np.load(dataset)
+    return np.delete(arr=dataset, obj=[17], axis=1).astype(np.float32), dataset[:, 17].astype(np.int64)
+
+
+def load_teacher(teacher, checkpoint_path):
+    """Returns the decision function of the trained GRU+SVM"""
+    if teacher == 'numpy':
+        from models.numpy_gru import NumpyGru
+
+        return NumpyGru.load(checkpoint_path).decision_function
+
+    from models.gru_svm.gru_svm import GruSvm
+    from models.predictor import Predictor
+    from utils import checkpoint
+
+    return Predictor(model=GruSvm, checkpoint_path=checkpoint.resolve(checkpoint_path)).decision_function
+
+
+def timed(decision_function, features, batch_size):
+    """Returns the output of a model, and its throughput in rows per second"""
+    start_time = time.time()
+    output = np.concatenate([decision_function(features[offset:offset + batch_size])
+                             for offset in range(0, features.shape[0], batch_size)])
+    return output, features.shape[0] / (time.time() - start_time)
+
+
+def train_gru_student(cell_size, max_steps, output_path, train_features, teacher_labels, validation_features,
+                      validation_labels):
+    """Trains a smaller GRU+SVM on the classes predicted by the teacher, and returns its decision function
+
+    The GRU+SVM loss is defined on labels, so the GRU student learns the teacher's classes
+    rather than its margins.
+    """
+    from models.gru_svm.gru_svm import GruSvm
+    from models.predictor import Predictor
+    from utils import checkpoint
+    from utils import search
+
+    # slice the datasets to be exact as per the batch size
+    train_size = train_features.shape[0] - train_features.shape[0] % BATCH_SIZE
+    validation_size = validation_features.shape[0] - validation_features.shape[0] % BATCH_SIZE
+
+    student = GruSvm(alpha=LEARNING_RATE, batch_size=BATCH_SIZE, cell_size=cell_size, dropout_rate=DROPOUT_P_KEEP,
+                     num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, svm_c=SVM_C)
+
+    # a new directory per run, so a student of another cell size is never resumed from an earlier run
+    run_path = search.new_run_path(os.path.join(output_path, 'gru_student'))
+
+    checkpoint_path = os.path.join(run_path, 'checkpoint')
+    student.train(checkpoint_path=checkpoint_path, log_path=os.path.join(run_path, 'logs', ''),
+                  model_name='gru_student', epochs=HM_EPOCHS,
+                  train_data=[train_features[:train_size], teacher_labels[:train_size]], train_size=train_size,
+                  validation_data=[validation_features[:validation_size], validation_labels[:validation_size]],
+                  validation_size=validation_size, result_path=None, max_steps=max_steps)
+
+    return Predictor(model=GruSvm, checkpoint_path=checkpoint.resolve(checkpoint_path)).decision_function
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Distillation of the GRU+SVM into cheaper students')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-m', '--teacher', required=False, type=str, default='gru_svm', choices=TEACHERS,
+                       help='the teacher, "numpy" for a GRU+SVM exported with numpy_main.py')
+    group.add_argument('-c', '--checkpoint_path', required=True, type=str,
+                       help='path where the trained GRU+SVM is saved, or the exported NPZ file for "numpy"')
+    group.add_argument('-t', '--train_dataset', required=True, type=str,
+                       help='the NumPy array training dataset (*.npy) to distill on')
+    group.add_argument('-v', '--validation_dataset', required=True, type=str,
+                       help='the NumPy array validation dataset (*.npy) to report on')
+    group.add_argument('-w', '--output_path', required=True, type=str,
+                       help='path where to save the students')
+    group.add_argument('-a', '--ridge_alpha', required=False, type=float, default=1.0,
+                       help='the L2 regularization of the linear student')
+    group.add_argument('-s', '--table_size', required=False, type=int, default=65536,
+                       help='the number of most frequent feature vectors in the lookup table')
+    group.add_argument('--gru_cell_size', required=False, type=int, default=0,
+                       help='also train a GRU student of this cell size, skipped if 0')
+    group.add_argument('--max_steps', required=False, type=int,
+                       help='the number of training steps of the GRU student')
+    group.add_argument('-b', '--batch_size', required=False, type=int, default=4096,
+                       help='the number of rows to score at once')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    if not os.path.exists(arguments.output_path):
+        os.mkdir(arguments.output_path)
+
+    teacher = load_teacher(teacher=arguments.teacher, checkpoint_path=arguments.checkpoint_path)
+
+    train_features, _ = load_dataset(arguments.train_dataset)
+    validation_features, validation_labels = load_dataset(arguments.validation_dataset)
+
+    # the margins of the teacher are the targets of the students
+    train_margins, _ = timed(teacher, train_features, arguments.batch_size)
+
+    linear = LinearStudent.fit(features=train_features, margins=train_margins, alpha=arguments.ridge_alpha)
+    linear.save(os.path.join(arguments.output_path, 'linear_student.npz'))
+
+    lookup = LookupStudent.fit(features=train_features, margins=train_margins, fallback=linear,
+                               table_size=arguments.table_size)
+    lookup.save(os.path.join(arguments.output_path, 'lookup_student.npz'))
+
+    models = [('gru_svm', teacher), ('linear', linear.decision_function), ('lookup', lookup.decision_function)]
+
+    if arguments.gru_cell_size > 0:
+        teacher_labels = np.argmax(np.sign(train_margins), axis=1).astype(np.uint8)
+        models.append(('gru_{}'.format(arguments.gru_cell_size),
+                       train_gru_student(cell_size=arguments.gru_cell_size, max_steps=arguments.max_steps,
+                                         output_path=arguments.output_path, train_features=train_features,
+                                         teacher_labels=teacher_labels, validation_features=validation_features,
+                                         validation_labels=validation_labels)))
+
+    teacher_classes = None
+
+    print('{:<12}{:>12}{:>12}{:>16}{:>10}'.format('model', 'accuracy', 'agreement', 'rows/s', 'speedup'))
+    for name, decision_function in models:
+        output, throughput = timed(decision_function, validation_features, arguments.batch_size)
+
+        # the classes of the `accuracy/prediction` tensor of the SVM models
+        classes = np.argmax(np.sign(output), axis=1)
+        if teacher_classes is None:
+            teacher_classes, teacher_throughput = classes, throughput
+
+        print('{:<12}{:>12.4f}{:>12.4f}{:>16.1f}{:>10.1f}'.format(name, np.mean(classes == validation_labels),
+                                                                  np.mean(classes == teacher_classes), throughput,
+                                                                  throughput / teacher_throughput))
+
+    print('lookup table coverage of the validation dataset : {:.2%}'.format(lookup.coverage(validation_features)))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
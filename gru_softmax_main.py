@@ -25,8 +25,11 @@ __version__ = '0.1.1'
 __author__ = 'Abien Fred Agarap'
 
 import argparse
+from models import rnn
 from models.gru_softmax.gru_softmax import GruSoftmax
+from utils import checkpoint
 from utils import data
+from utils.session import configure_session
 
 # hyper-parameters
 BATCH_SIZE = 256
@@ -42,9 +45,9 @@ def parse_args():
     parser = argparse.ArgumentParser(description='GRU+Softmax for Intrusion Detection')
     group = parser.add_argument_group('Arguments')
     group.add_argument('-o', '--operation', required=True, type=str,
-                       help='the operation to perform: "train" or "test"')
+                       help='the operation to perform: "train", "update" or "test"')
     group.add_argument('-t', '--train_dataset', required=False, type=str,
-                       help='the NumPy array training dataset (*.npy) to be used')
+                       help='the NumPy array training dataset (*.npy) to be used, or the new data to update with')
     group.add_argument('-v', '--validation_dataset', required=True, type=str,
                        help='the NumPy array validation dataset (*.npy) to be used')
     group.add_argument('-c', '--checkpoint_path', required=True, type=str,
@@ -55,17 +58,55 @@ def parse_args():
                        help='filename for the trained model')
     group.add_argument('-r', '--result_path', required=True, type=str,
                        help='path where to save the actual and predicted labels')
+    group.add_argument('--replay_dataset', required=False, type=str,
+                       help='the NumPy array dataset (*.npy) of older data to replay when updating')
+    group.add_argument('--replay_fraction', required=False, type=float, default=0.0,
+                       help='the fraction of the update data to be sampled from the replay dataset')
+    group.add_argument('--max_steps', required=False, type=int, default=1000,
+                       help='the number of training steps when updating')
+    group.add_argument('-e', '--engine', required=False, type=str, default='dynamic', choices=rnn.ENGINES,
+                       help='the GRU engine to use: "dynamic", "static", or "fused"')
+    group.add_argument('-x', '--input_mode', required=False, type=str, default='onehot', choices=rnn.INPUT_MODES,
+                       help='the input layer: "onehot" or "embedding"')
+    group.add_argument('-n', '--num_towers', required=False, type=int, default=1,
+                       help='the number of data-parallel GRU towers each batch is split across')
+    group.add_argument('-i', '--validation_interval', required=False, type=int,
+                       help='score the validation dataset in the background every N training steps')
+    group.add_argument('-p', '--patience', required=False, type=int,
+                       help='stop after N validations without improvement, and publish the best weights')
+    group.add_argument('--validation_sample_size', required=False, type=int,
+                       help='score a random sample of N validation examples in the background')
+    group.add_argument('--use_xla', action='store_true',
+                       help='compile the graph with XLA, if available')
+    group.add_argument('--intra_op_threads', required=False, type=int, default=0,
+                       help='the number of threads used to parallelize a single op')
+    group.add_argument('--inter_op_threads', required=False, type=int, default=0,
+                       help='the number of threads used to run independent ops')
+    group.add_argument('--cpu_affinity', required=False, type=str,
+                       help='the CPU list to pin the process to, e.g. "0-7"')
+    group.add_argument('--numa_node', required=False, type=int,
+                       help='the NUMA node whose CPUs to pin the process to')
+    group.add_argument('--cache_size', required=False, type=int, default=0,
+                       help='memoize the predictions of up to N feature vectors when testing')
     arguments = parser.parse_args()
     return arguments
 
 
 def main(arguments):
 
-    if arguments.operation == 'train':
+    if arguments.operation in ['train', 'update']:
         # get the train data
         # features: train_data[0], labels: train_data[1]
         train_features, train_labels = data.load_data(dataset=arguments.train_dataset)
 
+        if arguments.operation == 'update' and arguments.replay_dataset is not None:
+            # mix the new data with a sample of the older data, to not forget it
+            replay_features, replay_labels = data.load_data(dataset=arguments.replay_dataset)
+            train_features, train_labels = data.mix_replay(features=train_features, labels=train_labels,
+                                                           replay_features=replay_features,
+                                                           replay_labels=replay_labels,
+                                                           replay_fraction=arguments.replay_fraction)
+
         # get the validation data
         # features: validation_data[0], labels: validation_data[1]
         validation_features, validation_labels = data.load_data(dataset=arguments.validation_dataset)
@@ -92,12 +133,25 @@ def main(arguments):
         validation_size = validation_features.shape[0]
 
         model = GruSoftmax(alpha=LEARNING_RATE, batch_size=BATCH_SIZE, cell_size=CELL_SIZE, dropout_rate=DROPOUT_P_KEEP,
-                           num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH)
-
-        model.train(checkpoint_path=arguments.checkpoint_path, log_path=arguments.log_path,
-                    model_name=arguments.model_name, epochs=HM_EPOCHS, train_data=[train_features, train_labels],
-                    train_size=train_size, validation_data=[validation_features, validation_labels],
-                    validation_size=validation_size, result_path=arguments.result_path)
+                           num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, engine=arguments.engine,
+                           input_mode=arguments.input_mode, num_towers=arguments.num_towers,
+                           use_xla=arguments.use_xla, intra_op_threads=arguments.intra_op_threads,
+                           inter_op_threads=arguments.inter_op_threads, cpu_affinity=arguments.cpu_affinity,
+                           numa_node=arguments.numa_node)
+
+        if arguments.operation == 'update':
+            # warm-start from the current model, and publish a new model version
+            model.update(checkpoint_path=arguments.checkpoint_path, model_name=arguments.model_name,
+                         max_steps=arguments.max_steps, train_data=[train_features, train_labels],
+                         train_size=train_size, validation_data=[validation_features, validation_labels],
+                         validation_size=validation_size, result_path=arguments.result_path)
+        else:
+            model.train(checkpoint_path=arguments.checkpoint_path, log_path=arguments.log_path,
+                        model_name=arguments.model_name, epochs=HM_EPOCHS, train_data=[train_features, train_labels],
+                        train_size=train_size, validation_data=[validation_features, validation_labels],
+                        validation_size=validation_size, result_path=arguments.result_path,
+                        validation_interval=arguments.validation_interval, patience=arguments.patience,
+                        validation_sample_size=arguments.validation_sample_size)
     elif arguments.operation == 'test':
         test_features, test_labels = data.load_data(dataset=arguments.validation_dataset)
 
@@ -108,9 +162,16 @@ def main(arguments):
 
         test_size = test_features.shape[0]
 
-        GruSoftmax.predict(batch_size=BATCH_SIZE, cell_size=CELL_SIZE, dropout_rate=DROPOUT_P_KEEP,
-                           num_classes=N_CLASSES, test_data=[test_features, test_labels], test_size=test_size,
-                           checkpoint_path=arguments.checkpoint_path, result_path=arguments.result_path)
+        # pin the process before the session creates its thread pools
+        config = configure_session(use_xla=arguments.use_xla, intra_op_threads=arguments.intra_op_threads,
+                                   inter_op_threads=arguments.inter_op_threads, cpu_affinity=arguments.cpu_affinity,
+                                   numa_node=arguments.numa_node)
+
+        GruSoftmax.predict(batch_size=BATCH_SIZE, cell_size=CELL_SIZE, num_classes=N_CLASSES,
+                           test_data=[test_features, test_labels], test_size=test_size,
+                           checkpoint_path=checkpoint.resolve(arguments.checkpoint_path),
+                           result_path=arguments.result_path, config=config,
+                           cache_size=arguments.cache_size)
 
 
 if __name__ == '__main__':
@@ -25,7 +25,10 @@ __version__ = '0.1.1'
 __author__ = 'Abien Fred Agarap'
 
 import argparse
+from models import rnn
+from utils import checkpoint
 from utils import data
+from utils.session import configure_session
 from models.gru_svm.gru_svm import GruSvm
 
 # hyper-parameters for the model
@@ -43,9 +46,9 @@ def parse_args():
     parser = argparse.ArgumentParser(description='GRU+SVM for Intrusion Detection')
     group = parser.add_argument_group('Arguments')
     group.add_argument('-o', '--operation', required=True, type=str,
-                       help='the operation to perform: "train" or "test"')
+                       help='the operation to perform: "train", "update" or "test"')
     group.add_argument('-t', '--train_dataset', required=False, type=str,
-                       help='the NumPy array training dataset (*.npy) to be used')
+                       help='the NumPy array training dataset (*.npy) to be used, or the new data to update with')
     group.add_argument('-v', '--validation_dataset', required=True, type=str,
                        help='the NumPy array validation dataset (*.npy) to be used')
     group.add_argument('-c', '--checkpoint_path', required=True, type=str,
@@ -56,17 +59,55 @@ def parse_args():
                        help='filename for the trained model')
     group.add_argument('-r', '--result_path', required=True, type=str,
                        help='path where to save the actual and predicted labels')
+    group.add_argument('--replay_dataset', required=False, type=str,
+                       help='the NumPy array dataset (*.npy) of older data to replay when updating')
+    group.add_argument('--replay_fraction', required=False, type=float, default=0.0,
+                       help='the fraction of the update data to be sampled from the replay dataset')
+    group.add_argument('--max_steps', required=False, type=int, default=1000,
+                       help='the number of training steps when updating')
+    group.add_argument('-e', '--engine', required=False, type=str, default='dynamic', choices=rnn.ENGINES,
+                       help='the GRU engine to use: "dynamic", "static", or "fused"')
+    group.add_argument('-x', '--input_mode', required=False, type=str, default='onehot', choices=rnn.INPUT_MODES,
+                       help='the input layer: "onehot" or "embedding"')
+    group.add_argument('-n', '--num_towers', required=False, type=int, default=1,
+                       help='the number of data-parallel GRU towers each batch is split across')
+    group.add_argument('-i', '--validation_interval', required=False, type=int,
+                       help='score the validation dataset in the background every N training steps')
+    group.add_argument('-p', '--patience', required=False, type=int,
+                       help='stop after N validations without improvement, and publish the best weights')
+    group.add_argument('--validation_sample_size', required=False, type=int,
+                       help='score a random sample of N validation examples in the background')
+    group.add_argument('--use_xla', action='store_true',
+                       help='compile the graph with XLA, if available')
+    group.add_argument('--intra_op_threads', required=False, type=int, default=0,
+                       help='the number of threads used to parallelize a single op')
+    group.add_argument('--inter_op_threads', required=False, type=int, default=0,
+                       help='the number of threads used to run independent ops')
+    group.add_argument('--cpu_affinity', required=False, type=str,
+                       help='the CPU list to pin the process to, e.g. "0-7"')
+    group.add_argument('--numa_node', required=False, type=int,
+                       help='the NUMA node whose CPUs to pin the process to')
+    group.add_argument('--cache_size', required=False, type=int, default=0,
+                       help='memoize the predictions of up to N feature vectors when testing')
     arguments = parser.parse_args()
     return arguments
 
 
 def main(argv):
 
-    if argv.operation == 'train':
+    if argv.operation in ['train', 'update']:
         # get the train data
         # features: train_data[0], labels: train_data[1]
         train_features, train_labels = data.load_data(dataset=argv.train_dataset)
 
+        if argv.operation == 'update' and argv.replay_dataset is not None:
+            # mix the new data with a sample of the older data, to not forget it
+            replay_features, replay_labels = data.load_data(dataset=argv.replay_dataset)
+            train_features, train_labels = data.mix_replay(features=train_features, labels=train_labels,
+                                                           replay_features=replay_features,
+                                                           replay_labels=replay_labels,
+                                                           replay_fraction=argv.replay_fraction)
+
         # get the validation data
         # features: validation_data[0], labels: validation_data[1]
         validation_features, validation_labels = data.load_data(dataset=argv.validation_dataset)
@@ -94,13 +135,24 @@ def main(argv):
 
         # instantiate the model
         model = GruSvm(alpha=LEARNING_RATE, batch_size=BATCH_SIZE, cell_size=CELL_SIZE, dropout_rate=DROPOUT_P_KEEP,
-                       num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, svm_c=SVM_C)
-
-        # train the model
-        model.train(checkpoint_path=argv.checkpoint_path, log_path=argv.log_path, model_name=argv.model_name,
-                    epochs=HM_EPOCHS, train_data=[train_features, train_labels], train_size=train_size,
-                    validation_data=[validation_features, validation_labels], validation_size=validation_size,
-                    result_path=argv.result_path)
+                       num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, svm_c=SVM_C, engine=argv.engine,
+                       input_mode=argv.input_mode, num_towers=argv.num_towers, use_xla=argv.use_xla,
+                       intra_op_threads=argv.intra_op_threads, inter_op_threads=argv.inter_op_threads,
+                       cpu_affinity=argv.cpu_affinity, numa_node=argv.numa_node)
+
+        if argv.operation == 'update':
+            # warm-start from the current model, and publish a new model version
+            model.update(checkpoint_path=argv.checkpoint_path, model_name=argv.model_name, max_steps=argv.max_steps,
+                         train_data=[train_features, train_labels], train_size=train_size,
+                         validation_data=[validation_features, validation_labels], validation_size=validation_size,
+                         result_path=argv.result_path)
+        else:
+            # train the model
+            model.train(checkpoint_path=argv.checkpoint_path, log_path=argv.log_path, model_name=argv.model_name,
+                        epochs=HM_EPOCHS, train_data=[train_features, train_labels], train_size=train_size,
+                        validation_data=[validation_features, validation_labels], validation_size=validation_size,
+                        result_path=argv.result_path, validation_interval=argv.validation_interval,
+                        patience=argv.patience, validation_sample_size=argv.validation_sample_size)
     elif argv.operation == 'test':
         test_features, test_labels = data.load_data(dataset=argv.validation_dataset)
 
@@ -111,9 +163,15 @@ def main(argv):
 
         test_size = test_features.shape[0]
 
-        GruSvm.predict(batch_size=BATCH_SIZE, cell_size=CELL_SIZE, dropout_rate=DROPOUT_P_KEEP, num_classes=N_CLASSES,
+        # pin the process before the session creates its thread pools
+        config = configure_session(use_xla=argv.use_xla, intra_op_threads=argv.intra_op_threads,
+                                   inter_op_threads=argv.inter_op_threads, cpu_affinity=argv.cpu_affinity,
+                                   numa_node=argv.numa_node)
+
+        GruSvm.predict(batch_size=BATCH_SIZE, cell_size=CELL_SIZE, num_classes=N_CLASSES,
                        test_data=[test_features, test_labels], test_size=test_size,
-                       checkpoint_path=argv.checkpoint_path, result_path=argv.result_path)
+                       checkpoint_path=checkpoint.resolve(argv.checkpoint_path), result_path=argv.result_path,
+                       config=config, cache_size=argv.cache_size)
 
 
 if __name__ == '__main__':
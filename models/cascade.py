@@ -0,0 +1,203 @@
+# Module for the linear SVM and GRU+SVM cascade
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""A two-stage cascade: a linear SVM scores every record, the GRU+SVM only the uncertain ones"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import numpy as np
+import threading
+
+
+class NumpySvm:
+    """Decision function of a trained Svm, in NumPy"""
+
+    def __init__(self, weights, biases, kernel=None):
+        """Initialize the NumpySvm class
+
+        Parameter
+        ---------
+        weights : numpy.ndarray
+          The [NUM_INPUTS, N_CLASSES] weights of the SVM.
+        biases : numpy.ndarray
+          The [N_CLASSES] biases of the SVM.
+        kernel : models.svm.kernel.RandomFourierFeatures
+          The random Fourier features of the SVM, None for a linear SVM.
+        """
+        self.weights = weights
+        self.biases = biases
+        self.kernel = kernel
+
+    @classmethod
+    def load(cls, checkpoint_path):
+        """Returns the Svm saved in the latest checkpoint
+
+        Parameter
+        ---------
+        checkpoint_path : str
+          The path where the trained model is saved.
+
+        Returns
+        -------
+        model : NumpySvm
+          The loaded model.
+        """
+        import tensorflow as tf
+        from models.svm.kernel import RandomFourierFeatures
+
+        latest = tf.train.latest_checkpoint(checkpoint_path)
+
+        if latest is None:
+            raise ValueError('There is no model to load in {}'.format(checkpoint_path))
+
+        reader = tf.train.NewCheckpointReader(latest)
+
+        kernel = None
+
+        if reader.has_tensor('random_fourier_features/omega'):
+            # the random projection saved with the weights, the kernel coefficient is only needed to sample it
+            omega = reader.get_tensor('random_fourier_features/omega')
+            kernel = RandomFourierFeatures(num_inputs=omega.shape[0], num_components=omega.shape[1], gamma=None,
+                                           omega=omega, offset=reader.get_tensor('random_fourier_features/offset'))
+
+        return cls(weights=reader.get_tensor('weights'), biases=reader.get_tensor('biases'), kernel=kernel)
+
+    def decision_function(self, features):
+        """Returns the output of the SVM, i.e. `Wx_plus_b`
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+
+        Returns
+        -------
+        output : numpy.ndarray
+          The [N, N_CLASSES] output of the SVM.
+        """
+        features = np.asarray(features, dtype=np.float32)
+
+        if self.kernel is not None:
+            features = self.kernel.transform(features)
+
+        return features.dot(self.weights) + self.biases
+
+
+def margin(output):
+    """Returns the distance of the SVM output to the decision boundary of the least certain class"""
+    return np.abs(output).min(axis=1)
+
+
+def choose_band(margins, svm_correct, gru_correct, max_accuracy_loss):
+    """Returns the narrowest uncertainty band within an accuracy loss of the GRU+SVM alone
+
+    Parameter
+    ---------
+    margins : numpy.ndarray
+      The [N] margins of the linear SVM on the validation dataset.
+    svm_correct : numpy.ndarray
+      The [N] booleans of whether the linear SVM classified the validation examples correctly.
+    gru_correct : numpy.ndarray
+      The [N] booleans of whether the GRU+SVM classified the validation examples correctly.
+    max_accuracy_loss : float
+      The maximum drop of accuracy from scoring every example with the GRU+SVM.
+
+    Returns
+    -------
+    band : float
+      The margin under which an example is scored with the GRU+SVM.
+    accuracy : float
+      The accuracy of the cascade with that band.
+    fraction : float
+      The fraction of examples scored with the GRU+SVM.
+    """
+    order = np.argsort(margins, kind='mergesort')
+    margins = margins[order]
+
+    # the accuracy when the first i examples by margin are scored with the GRU+SVM, for every i
+    gru_hits = np.concatenate([[0], np.cumsum(gru_correct[order])])
+    svm_hits = np.concatenate([[0], np.cumsum(svm_correct[order])])
+    accuracy = (gru_hits + svm_hits[-1] - svm_hits) / len(margins)
+
+    # a band can only fall between distinct margins
+    candidates = np.concatenate([np.flatnonzero(np.concatenate([[True], np.diff(margins) > 0])), [len(margins)]])
+    acceptable = candidates[accuracy[candidates] >= accuracy[-1] - max_accuracy_loss]
+
+    index = acceptable[0]
+    band = margins[index] if index < len(margins) else np.inf
+
+    return float(band), float(accuracy[index]), float(index / len(margins))
+
+
+class Cascade:
+    """Scores records with a linear SVM, and the records within its uncertainty band with the GRU+SVM"""
+
+    def __init__(self, svm, score, band):
+        """Initialize the cascade
+
+        Parameter
+        ---------
+        svm : NumpySvm
+          The linear SVM scoring every record.
+        score : callable
+          The function mapping features to the GRU+SVM predictions.
+        band : float
+          The margin of the linear SVM under which a record is scored with the GRU+SVM.
+        """
+        self.svm = svm
+        self.score = score
+        self.band = band
+        self.lock = threading.Lock()
+        self.rows = 0
+        self.escalated = 0
+
+    def __call__(self, features):
+        """Returns the predictions of the cascade
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+
+        Returns
+        -------
+        predictions : numpy.ndarray
+          The [N, N_CLASSES] predictions, as in the `accuracy/prediction` tensor.
+        """
+        features = np.asarray(features)
+        output = self.svm.decision_function(features)
+        predictions = np.sign(output)
+
+        uncertain = np.flatnonzero(margin(output) < self.band)
+        if uncertain.size:
+            predictions[uncertain] = self.score(features[uncertain])
+
+        with self.lock:
+            self.rows += len(features)
+            self.escalated += uncertain.size
+
+        return predictions
+
+    def metrics(self):
+        """Returns the number of records scored, and the fraction of them escalated to the GRU+SVM"""
+        with self.lock:
+            return {'rows': self.rows, 'escalated': self.escalated,
+                    'escalated_fraction': self.escalated / self.rows if self.rows else None}
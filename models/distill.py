@@ -0,0 +1,221 @@
+# Module for the students distilled from the GRU+SVM
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Students distilled from the margins of a trained GRU+SVM, cheaper to score than the GRU"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import numpy as np
+from utils.cache import pack
+
+# the number of values of a binned feature
+DEPTH = 10
+
+
+def one_hot_features(features):
+    """Returns the one-hot expansion of the binned features
+
+    Parameter
+    ---------
+    features : numpy.ndarray
+      The [N, SEQUENCE_LENGTH] binned features.
+
+    Returns
+    -------
+    expanded : numpy.ndarray
+      The [N, SEQUENCE_LENGTH * DEPTH] one-hot features.
+    """
+    features = np.asarray(features).astype(np.intp)
+    expanded = np.zeros([features.shape[0], features.shape[1] * DEPTH], dtype=np.float32)
+    expanded[np.arange(features.shape[0])[:, None], np.arange(features.shape[1]) * DEPTH + features] = 1.
+    return expanded
+
+
+class LinearStudent:
+    """A linear SVM over the one-hot features, fitted by ridge regression to the margins of a teacher"""
+
+    def __init__(self, weights):
+        """Initialize the LinearStudent class
+
+        Parameter
+        ---------
+        weights : numpy.ndarray
+          The [SEQUENCE_LENGTH * DEPTH, N_CLASSES] weights. Each feature has one weight per bin,
+          so the model needs no bias.
+        """
+        self.weights = weights.astype(np.float32)
+
+        # [SEQUENCE_LENGTH, DEPTH, N_CLASSES], the weight of every bin of every feature
+        self.table = self.weights.reshape([-1, DEPTH, self.weights.shape[1]])
+
+    @classmethod
+    def fit(cls, features, margins, alpha=1.0, chunk_size=65536):
+        """Fits the student by ridge regression on the teacher margins
+
+        The normal equations are accumulated by chunks, so the one-hot features of the
+        whole dataset are never in memory at once.
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+        margins : numpy.ndarray
+          The [N, N_CLASSES] outputs of the teacher.
+        alpha : float
+          The L2 regularization strength.
+        chunk_size : int
+          The number of rows expanded at once.
+
+        Returns
+        -------
+        student : LinearStudent
+          The fitted student.
+        """
+        num_inputs = features.shape[1] * DEPTH
+        gram = alpha * np.eye(num_inputs)
+        moments = np.zeros([num_inputs, margins.shape[1]])
+
+        for offset in range(0, features.shape[0], chunk_size):
+            expanded = one_hot_features(features[offset:offset + chunk_size]).astype(np.float64)
+            gram += expanded.T.dot(expanded)
+            moments += expanded.T.dot(margins[offset:offset + chunk_size])
+
+        return cls(weights=np.linalg.solve(gram, moments))
+
+    def decision_function(self, features):
+        """Returns the output of the student, the sum of the weights of the bins of the features
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+
+        Returns
+        -------
+        output : numpy.ndarray
+          The [N, N_CLASSES] output.
+        """
+        features = np.asarray(features).astype(np.intp)
+        return self.table[np.arange(features.shape[1]), features].sum(axis=1)
+
+    def predict(self, features):
+        """Returns the predictions of the student, as in the `accuracy/prediction` tensor of the SVM models"""
+        return np.sign(self.decision_function(features))
+
+    def save(self, student_file):
+        """Saves the student to a NPZ file"""
+        np.savez(student_file, weights=self.weights)
+
+    @classmethod
+    def load(cls, student_file):
+        """Returns the student saved in a NPZ file"""
+        with np.load(student_file) as variables:
+            return cls(weights=variables['weights'])
+
+
+class LookupStudent:
+    """The teacher margins of the most frequent feature vectors, and a fallback student for the others"""
+
+    def __init__(self, keys, margins, fallback):
+        """Initialize the LookupStudent class
+
+        Parameter
+        ---------
+        keys : numpy.ndarray
+          The [TABLE_SIZE, SEQUENCE_LENGTH] uint8 feature vectors in the table.
+        margins : numpy.ndarray
+          The [TABLE_SIZE, N_CLASSES] teacher outputs for the vectors in the table.
+        fallback : LinearStudent
+          The student scoring the vectors not in the table.
+        """
+        self.keys = keys
+        self.margins = margins.astype(np.float32)
+        self.fallback = fallback
+        self.index = {key.tobytes(): position for position, key in enumerate(pack(keys))}
+
+    @classmethod
+    def fit(cls, features, margins, fallback, table_size=65536):
+        """Keeps the teacher margins of the most frequent feature vectors
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+        margins : numpy.ndarray
+          The [N, N_CLASSES] outputs of the teacher.
+        fallback : LinearStudent
+          The student scoring the vectors not in the table.
+        table_size : int
+          The number of vectors in the table.
+
+        Returns
+        -------
+        student : LookupStudent
+          The fitted student.
+        """
+        _, index, counts = np.unique(pack(features), return_index=True, return_counts=True)
+
+        # the first occurrence of the most frequent vectors
+        index = index[np.argsort(-counts, kind='mergesort')[:table_size]]
+
+        return cls(keys=np.asarray(features[index], dtype=np.uint8), margins=margins[index], fallback=fallback)
+
+    def decision_function(self, features):
+        """Returns the teacher output for the vectors in the table, and the fallback output for the others
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+
+        Returns
+        -------
+        output : numpy.ndarray
+          The [N, N_CLASSES] output.
+        """
+        keys, index, inverse = np.unique(pack(features), return_index=True, return_inverse=True)
+        positions = np.array([self.index.get(key.tobytes(), -1) for key in keys], dtype=np.intp)
+
+        output = np.empty([len(keys), self.margins.shape[1]], dtype=np.float32)
+        found = positions >= 0
+        output[found] = self.margins[positions[found]]
+        if not found.all():
+            output[~found] = self.fallback.decision_function(np.asarray(features)[index[~found]])
+
+        return output[inverse.ravel()]
+
+    def predict(self, features):
+        """Returns the predictions of the student, as in the `accuracy/prediction` tensor of the SVM models"""
+        return np.sign(self.decision_function(features))
+
+    def coverage(self, features):
+        """Returns the fraction of the feature vectors found in the table"""
+        return np.mean([key.tobytes() in self.index for key in pack(features)])
+
+    def save(self, student_file):
+        """Saves the table to a NPZ file, the fallback student is saved separately"""
+        np.savez(student_file, keys=self.keys, margins=self.margins)
+
+    @classmethod
+    def load(cls, student_file, fallback):
+        """Returns the student whose table is saved in a NPZ file"""
+        with np.load(student_file) as variables:
+            return cls(keys=variables['keys'], margins=variables['margins'], fallback=fallback)
@@ -0,0 +1,171 @@
+# Module for inference with frozen graphs
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Inference with frozen graphs, i.e. graphs whose variables are folded into constants"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import numpy as np
+import os
+import tensorflow as tf
+
+
+def load_contrib_ops():
+    """Registers the ops of tf.contrib.rnn, e.g. the GRUBlockCell of the "fused" engine
+
+    tf.contrib is loaded lazily, so a graph using its ops cannot be imported before it is loaded.
+    """
+    import tensorflow.contrib.rnn
+
+
+def freeze(checkpoint_path, output_tensors, config=None):
+    """Freezes the latest checkpoint into a GraphDef file, if not yet frozen
+
+    The frozen graph is written next to the checkpoint, and named after it. It is frozen again
+    whenever the checkpoint is newer, e.g. after a model saved without a step is saved again
+    under the same name.
+
+    Parameter
+    ---------
+    checkpoint_path : str
+      The path where the trained model is saved.
+    output_tensors : list
+      The names of the tensors to be computed by the frozen graph.
+    config : tf.ConfigProto
+      The session configuration.
+
+    Returns
+    -------
+    frozen_file : str
+      The path of the frozen graph.
+    """
+    latest = tf.train.latest_checkpoint(checkpoint_path)
+
+    if latest is None:
+        raise ValueError('There is no model to freeze in {}'.format(checkpoint_path))
+
+    frozen_file = latest + '.frozen.pb'
+
+    if os.path.exists(frozen_file) and os.stat(frozen_file).st_mtime_ns > os.stat(latest + '.index').st_mtime_ns:
+        return frozen_file
+
+    load_contrib_ops()
+
+    with tf.Graph().as_default() as graph, tf.Session(graph=graph, config=config) as sess:
+        saver = tf.train.import_meta_graph(latest + '.meta', clear_devices=True)
+        saver.restore(sess, latest)
+
+        # keep only the ops needed for the output tensors, with the variables as constants
+        graph_def = tf.graph_util.convert_variables_to_constants(
+            sess, graph.as_graph_def(), [name.split(':')[0] for name in output_tensors])
+
+    # processes freezing the same checkpoint at once each write their own temporary file
+    temporary_file = '{}.{}.tmp'.format(frozen_file, os.getpid())
+    with tf.gfile.GFile(temporary_file, 'wb') as file:
+        file.write(graph_def.SerializeToString())
+    os.replace(temporary_file, frozen_file)
+
+    print('Froze model {} to {}'.format(latest, frozen_file))
+
+    return frozen_file
+
+
+def one_hot(labels, num_classes, off_value):
+    """Returns the one-hot encoding of the labels, computed in NumPy
+
+    Parameter
+    ---------
+    labels : numpy.ndarray
+      The [BATCH_SIZE] labels.
+    num_classes : int
+      The number of classes in a dataset.
+    off_value : float
+      The value of the negative classes, e.g. -1 for the SVM models.
+
+    Returns
+    -------
+    y_onehot : numpy.ndarray
+      The [BATCH_SIZE, N_CLASSES] one-hot encoded labels.
+    """
+    labels = np.asarray(labels).astype(np.int64)
+
+    y_onehot = np.full([labels.shape[0], num_classes], off_value, dtype=np.float32)
+    y_onehot[np.arange(labels.shape[0]), labels] = 1.0
+
+    return y_onehot
+
+
+class FrozenModel:
+    """A frozen graph loaded once into its own graph and session"""
+
+    def __init__(self, frozen_file, fetches, config=None):
+        """Loads a frozen graph
+
+        Parameter
+        ---------
+        frozen_file : str
+          The path of the frozen graph.
+        fetches : list
+          The names of the tensors to compute on every run.
+        config : tf.ConfigProto
+          The session configuration.
+        """
+        graph_def = tf.GraphDef()
+
+        with tf.gfile.GFile(frozen_file, 'rb') as file:
+            graph_def.ParseFromString(file.read())
+
+        self.graph = tf.Graph()
+
+        load_contrib_ops()
+
+        with self.graph.as_default():
+            tf.import_graph_def(graph_def, name='')
+
+        self.fetches = [self.graph.get_tensor_by_name(name) for name in fetches]
+        self.sess = tf.Session(graph=self.graph, config=config)
+
+    def tensor(self, name):
+        """Returns a tensor of the frozen graph by name"""
+        return self.graph.get_tensor_by_name(name)
+
+    def run(self, feed_dict, fetches=None):
+        """Computes all the fetches in one session run
+
+        Parameter
+        ---------
+        feed_dict : dict
+          The values of the placeholders, by tensor name.
+        fetches : list
+          The names of the tensors to compute instead of the fetches given when loading.
+
+        Returns
+        -------
+        values : list
+          The values of the fetches.
+        """
+        if fetches is not None:
+            fetches = [self.tensor(name) for name in fetches]
+        return self.sess.run(self.fetches if fetches is None else fetches, feed_dict=feed_dict)
+
+    def close(self):
+        """Releases the session"""
+        self.sess.close()
@@ -0,0 +1,763 @@
+# Module for the training engine shared by the models
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""The training engine shared by the models: the step loop, checkpointing, evaluation, and result writing"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import abc
+import numpy as np
+import os
+import sys
+import tensorflow as tf
+import time
+from models import rnn
+from models.frozen import one_hot
+from models.predictor import Predictor
+from utils import checkpoint
+from utils.cache import PredictionCache
+from utils.evaluate import BackgroundEvaluator
+from utils.evaluate import evaluate
+from utils.evaluate import print_results
+from utils.evaluate import sample
+from utils.evaluate import write_summary
+from utils.session import configure_session
+from utils.session import jit_scope
+
+
+class Model:
+    """Base class of the models, which only define their graph
+
+    The graph of a model sets the `x_input`, `y_input`, `y_onehot`, `learning_rate`, `loss`,
+    `optimizer`, `predicted_class`, `accuracy`, and `merged` tensors and ops. A recurrent model
+    also sets its `state` placeholder and `states` output, whose value is carried across the
+    training steps. A model with several classification heads returns them from `heads`.
+    """
+
+    # the name of the model in the filenames of the labels
+    name = None
+
+    # the names of the prediction, accuracy, and classification layer output tensors in the saved graph
+    prediction_tensor = 'accuracy/prediction:0'
+    accuracy_tensor = 'accuracy/accuracy/Mean:0'
+    output_tensor = 'final_training_ops/Wx_plus_b/add:0'
+
+    # the value of the negative classes in the one-hot encoded labels
+    label_off_value = -1.0
+
+    # whether the loss of the model is a sum over the examples of a batch, instead of a mean
+    sum_loss = False
+
+    state = None
+    states = None
+
+    def configure(self, use_xla, intra_op_threads, inter_op_threads, cpu_affinity, numa_node):
+        """Pins the process, and sets the session configuration, before any session creates its thread pools"""
+        self.use_xla = use_xla
+        self.config = configure_session(use_xla=use_xla, intra_op_threads=intra_op_threads,
+                                        inter_op_threads=inter_op_threads, cpu_affinity=cpu_affinity,
+                                        numa_node=numa_node)
+
+    def build(self, graph):
+        """Builds the graph of the model, in an XLA JIT scope if requested
+
+        Parameter
+        ---------
+        graph : callable
+          The function building the graph.
+        """
+        sys.stdout.write('\n<log> Building Graph...')
+        with jit_scope(use_xla=self.use_xla):
+            graph()
+        sys.stdout.write('</log>\n')
+
+    def saver(self):
+        """Returns the saver of the model, which checkpoints the GRU variables under the same names for every
+        engine"""
+        return tf.train.Saver(var_list=rnn.checkpoint_variables(), max_to_keep=1000)
+
+    def initial_state(self):
+        """Returns the initial value of the carried state, None if the model has no carried state"""
+        return None
+
+    def training_feed(self, features, labels, state):
+        """Returns the feed dictionary for a training step
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The features of the batch.
+        labels : numpy.ndarray
+          The labels of the batch.
+        state : numpy.ndarray
+          The carried state, None if the model has no carried state.
+        """
+        return {self.x_input: features, self.y_input: labels, self.learning_rate: self.alpha}
+
+    def evaluation_feed(self, features, labels):
+        """Returns the feed dictionary for scoring a batch
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The features of the batch.
+        labels : numpy.ndarray
+          The labels of the batch.
+        """
+        return {self.x_input: features, self.y_input: labels}
+
+    @classmethod
+    def example_loss(cls, loss, rows):
+        """Returns the loss of a batch per example, so losses of batches of different sizes compare
+
+        Parameter
+        ---------
+        loss : float
+          The loss of the batch.
+        rows : int
+          The number of examples in the batch.
+        """
+        return loss / rows if cls.sum_loss else loss
+
+    def heads(self):
+        """Returns the classification heads of the model, keyed by name
+
+        A head has the `loss`, `accuracy`, `predicted_class`, and `y_onehot` tensors, and the
+        `example_loss` and `save_labels` methods, of a single-head model, which is its own head.
+        """
+        return {self.name: self}
+
+    def cursor(self, state):
+        """Returns the training state to save with a checkpoint, besides the position in the data"""
+        return {} if state is None else {'state': state}
+
+    def resume_state(self, cursor, state):
+        """Returns the carried state to resume from
+
+        Parameter
+        ---------
+        cursor : dict
+          The cursor of the restored checkpoint, None if training starts afresh.
+        state : numpy.ndarray
+          The initial carried state, None if the model has no carried state.
+        """
+        if state is not None and cursor is not None and 'state' in cursor and cursor['state'].shape == state.shape:
+            return cursor['state']
+        return state
+
+    def train(self, checkpoint_path, log_path, model_name, epochs, train_data, train_size, validation_data,
+              validation_size, result_path, validation_batch_size=4096, validation_interval=None,
+              patience=None, validation_sample_size=None, max_steps=None):
+        """Trains the model
+
+        Parameter
+        ---------
+        checkpoint_path : str
+          The path where to save the trained model.
+        log_path : str
+          The path where to save the TensorBoard summaries.
+        model_name : str
+          The filename for the trained model.
+        epochs : int
+          The number of passes through the whole dataset.
+        train_data : numpy.ndarray
+          The NumPy array training dataset.
+        train_size : int
+          The size of `train_data`.
+        validation_data : numpy.ndarray
+          The NumPy array validation dataset.
+        validation_size : int
+          The size of `validation_data`.
+        result_path : str
+          The path where to save the actual and predicted classes array, skipped if None.
+        validation_batch_size : int
+          The number of examples to score per session run during validation.
+        validation_interval : int
+          If set, score the validation dataset in a background thread every `validation_interval` steps.
+        patience : int
+          If set with `validation_interval`, stop once that many evaluations in a row did not improve the
+          validation accuracy, then publish the best weights as a new model version.
+        validation_sample_size : int
+          If set, score a fixed random sample of this many validation examples in the background, instead of
+          the whole validation dataset.
+        max_steps : int
+          If set, stop at this training step, e.g. to train in increments that resume from the checkpoint.
+
+        Returns
+        -------
+        results : dict
+          The validation loss, accuracy, and confusion matrix of the final weights, for every head (see
+          `utils.evaluate.evaluate`).
+        """
+
+        if not os.path.exists(path=checkpoint_path):
+            os.mkdir(path=checkpoint_path)
+
+        saver = self.saver()
+
+        current_state = self.initial_state()
+
+        # variables initializer
+        init_op = tf.group(tf.global_variables_initializer(), tf.local_variables_initializer())
+
+        # get the time tuple
+        timestamp = str(time.asctime())
+
+        train_writer = tf.summary.FileWriter(logdir=os.path.join(log_path, timestamp + '-training'),
+                                             graph=tf.get_default_graph())
+        validation_writer = tf.summary.FileWriter(logdir=os.path.join(log_path, timestamp + '-validation'),
+                                                  graph=tf.get_default_graph())
+
+        with tf.Session(config=self.config) as sess:
+            sess.run(init_op)
+
+            # resume from the latest checkpoint, at the step and carry state where it stopped
+            cursor = checkpoint.restore(sess=sess, saver=saver, checkpoint_path=checkpoint_path)
+            start_step = cursor['next_step'] if cursor is not None else 0
+
+            current_state = self.resume_state(cursor=cursor, state=current_state)
+
+            evaluator = None
+
+            if validation_interval:
+                # score weight snapshots on a separate session, in parallel with training
+                features, labels = sample(features=validation_data[0][:validation_size],
+                                          labels=validation_data[1][:validation_size],
+                                          sample_size=validation_sample_size)
+                evaluator = BackgroundEvaluator(model=self, features=features, labels=labels,
+                                                batch_size=validation_batch_size, writer=validation_writer,
+                                                config=self.config, patience=patience)
+
+            # finish the current step before stopping on SIGINT or SIGTERM
+            stop_request = checkpoint.StopRequest().install()
+
+            step = start_step
+            total_steps = epochs * train_size // self.batch_size
+
+            if max_steps is not None:
+                total_steps = min(total_steps, max_steps)
+
+            start_time = time.time()
+
+            heads = self.heads()
+
+            fetches = [self.merged, self.optimizer,
+                       {name: [head.predicted_class, head.y_onehot] for name, head in heads.items()}]
+
+            if current_state is not None:
+                fetches.append(self.states)
+
+            try:
+                for step in range(start_step, total_steps):
+
+                    if stop_request.requested:
+                        raise KeyboardInterrupt
+
+                    if evaluator is not None and evaluator.converged:
+                        break
+
+                    # set the value for slicing
+                    # e.g. step = 0, batch_size = 256, train_size = 1898240
+                    # (0 * 256) % 1898240 = 0
+                    # [offset:(offset + batch_size)] = [0:256]
+                    offset = (step * self.batch_size) % train_size
+                    train_feature_batch = train_data[0][offset:(offset + self.batch_size)]
+                    train_label_batch = train_data[1][offset:(offset + self.batch_size)]
+
+                    feed_dict = self.training_feed(features=train_feature_batch, labels=train_label_batch,
+                                                   state=current_state)
+
+                    results = sess.run(fetches, feed_dict=feed_dict)
+                    train_summary, _, labels = results[:3]
+
+                    # display training loss and accuracy every 100 steps and at step 0
+                    if step % 100 == 0:
+                        print_results(prefix='step [{}] train'.format(step),
+                                      results=self.batch_results(sess=sess, feed_dict=feed_dict,
+                                                                 rows=train_feature_batch.shape[0]))
+
+                        train_writer.add_summary(train_summary, step)
+
+                    if current_state is not None:
+                        current_state = results[3]
+
+                    if step % 100 == 0 or step + 1 == total_steps:
+                        # save the model, and the position where to resume from
+                        checkpoint.save(sess=sess, saver=saver, checkpoint_path=checkpoint_path, model_name=model_name,
+                                        step=step, next_step=step + 1, **self.cursor(current_state))
+
+                    if evaluator is not None and step % validation_interval == 0 and step > 0:
+                        evaluator.submit(sess=sess, step=step)
+
+                    if result_path is not None:
+                        for name, head in heads.items():
+                            head.save_labels(predictions=labels[name][0], actual=labels[name][1],
+                                             result_path=result_path, step=step, phase='training')
+            except KeyboardInterrupt:
+                # save the model, and the position where to resume from
+                checkpoint.save(sess=sess, saver=saver, checkpoint_path=checkpoint_path, model_name=model_name,
+                                step=step, next_step=step, **self.cursor(current_state))
+                print('Training interrupted at {}'.format(step))
+                os._exit(1)
+            finally:
+                stop_request.uninstall()
+
+                print('EOF -- Training done at step {}'.format(step))
+
+                if evaluator is not None:
+                    evaluator.close()
+
+                if evaluator is not None and patience is not None:
+                    if evaluator.converged:
+                        # estimate the time saved from the pace of the steps taken
+                        time_saved = (time.time() - start_time) / max(step - start_step, 1) * (total_steps - step)
+                        print('EOF -- Stopped early at step {} of {}, saving about {} seconds'.format(step, total_steps,
+                                                                                                   time_saved))
+
+                    if evaluator.restore_best(sess=sess) is not None:
+                        checkpoint.publish(sess=sess, saver=saver, checkpoint_path=checkpoint_path,
+                                           model_name=model_name)
+
+                # score the whole validation dataset once, with the final weights
+                results = evaluate(sess=sess, model=self, features=validation_data[0][:validation_size],
+                                   labels=validation_data[1][:validation_size], batch_size=validation_batch_size,
+                                   result_path=result_path)
+
+                write_summary(writer=validation_writer, step=step, results=results)
+
+                print_results(prefix='EOF -- validation', results=results)
+
+        return results
+
+    def update(self, checkpoint_path, model_name, max_steps, train_data, train_size, validation_data,
+               validation_size, result_path, validation_batch_size=4096):
+        """Warm-starts from the current model, trains on new data for a bounded number of steps,
+        then publishes the result as a new model version
+
+        Parameter
+        ---------
+        checkpoint_path : str
+          The path where the current model is saved, and where to publish the new model version.
+        model_name : str
+          The filename for the trained model.
+        max_steps : int
+          The number of training steps on the new data.
+        train_data : numpy.ndarray
+          The NumPy array of the new training data, optionally mixed with older data.
+        train_size : int
+          The size of `train_data`.
+        validation_data : numpy.ndarray
+          The NumPy array validation dataset.
+        validation_size : int
+          The size of `validation_data`.
+        result_path : str
+          The path where to save the actual and predicted classes array.
+        validation_batch_size : int
+          The number of examples to score per session run during validation.
+
+        Returns
+        -------
+        model_path : str
+          The directory of the new model version.
+        """
+
+        saver = self.saver()
+
+        current_state = self.initial_state()
+
+        init_op = tf.group(tf.global_variables_initializer(), tf.local_variables_initializer())
+
+        fetches = [self.optimizer]
+
+        if current_state is not None:
+            fetches.append(self.states)
+
+        with tf.Session(config=self.config) as sess:
+            sess.run(init_op)
+
+            checkpoint.warm_start(sess=sess, saver=saver, checkpoint_path=checkpoint_path)
+
+            start_time = time.time()
+
+            for step in range(max_steps):
+                offset = (step * self.batch_size) % train_size
+                train_feature_batch = train_data[0][offset:(offset + self.batch_size)]
+                train_label_batch = train_data[1][offset:(offset + self.batch_size)]
+
+                feed_dict = self.training_feed(features=train_feature_batch, labels=train_label_batch,
+                                               state=current_state)
+
+                results = sess.run(fetches, feed_dict=feed_dict)
+
+                if step % 100 == 0:
+                    print_results(prefix='step [{}] update'.format(step),
+                                  results=self.batch_results(sess=sess, feed_dict=feed_dict,
+                                                             rows=train_feature_batch.shape[0]))
+
+                if current_state is not None:
+                    current_state = results[1]
+
+            print('EOF -- Update done in {} seconds'.format(time.time() - start_time))
+
+            results = evaluate(sess=sess, model=self, features=validation_data[0][:validation_size],
+                               labels=validation_data[1][:validation_size], batch_size=validation_batch_size,
+                               result_path=result_path)
+
+            print_results(prefix='EOF -- validation', results=results)
+
+            return checkpoint.publish(sess=sess, saver=saver, checkpoint_path=checkpoint_path, model_name=model_name)
+
+    def batch_results(self, sess, feed_dict, rows):
+        """Returns the loss per example and the accuracy of every head on a batch
+
+        Parameter
+        ---------
+        sess : tf.Session
+          The session holding the weights to be evaluated.
+        feed_dict : dict
+          The feed dictionary of the batch.
+        rows : int
+          The number of examples in the batch.
+        """
+        heads = self.heads()
+        results = sess.run({name: [head.loss, head.accuracy] for name, head in heads.items()}, feed_dict=feed_dict)
+        return {name: dict(loss=heads[name].example_loss(loss=loss, rows=rows), accuracy=accuracy)
+                for name, (loss, accuracy) in results.items()}
+
+    @classmethod
+    def classify(cls, batch_size, num_classes, test_data, test_size, checkpoint_path, result_path, config=None,
+                 cache_size=0, cell_size=None):
+        """Classifies the data whether there is an intrusion or none, with a predictor loaded once
+
+        Parameter
+        ---------
+        batch_size : int
+          The number of batches to use for testing.
+        num_classes : int
+          The number of classes in a dataset.
+        test_data : numpy.ndarray
+          The NumPy array testing dataset.
+        test_size : int
+          The size of `test_data`.
+        checkpoint_path : str
+          The path where the trained model is saved.
+        result_path : str
+          The path where to save the actual and predicted classes array.
+        config : tf.ConfigProto
+          The session configuration.
+        cache_size : int
+          The number of feature vectors to memoize the predictions of, 0 to score every vector.
+        cell_size : int
+          The size of cell state of the trained GRU model, not checked if None.
+        """
+
+        # load the graph once, with the variables folded into constants
+        predictor = Predictor(model=cls, checkpoint_path=checkpoint_path, config=config)
+
+        if cell_size is not None and predictor.cell_size != cell_size:
+            predictor.close()
+            raise ValueError('The trained model has a cell size of {}, not {}'.format(predictor.cell_size, cell_size))
+
+        score = predictor.predict_batch
+
+        if cache_size > 0:
+            score = PredictionCache(score=score, max_size=cache_size)
+
+        step = 0
+
+        try:
+            for step in range(test_size // batch_size):
+                offset = (step * batch_size) % test_size
+                test_feature_batch = test_data[0][offset:(offset + batch_size)]
+                test_label_batch = test_data[1][offset:(offset + batch_size)]
+
+                predictions = score(test_feature_batch)
+
+                # one-hot encode labels according to NUM_CLASSES
+                y_onehot = one_hot(labels=test_label_batch, num_classes=num_classes, off_value=cls.label_off_value)
+
+                accuracy = np.mean(np.argmax(predictions, axis=1) == np.argmax(y_onehot, axis=1))
+
+                if step % 100 == 0 and step > 0:
+                    print('step [{}] test -- accuracy : {}'.format(step, accuracy))
+
+                cls.save_labels(predictions=predictions, actual=y_onehot, result_path=result_path, step=step,
+                                phase='testing')
+        except KeyboardInterrupt:
+            print('KeyboardInterrupt at step {}'.format(step))
+        finally:
+            predictor.close()
+            print('Done classifying at step {}'.format(step))
+
+            if cache_size > 0:
+                print('Prediction cache : {}'.format(score.metrics()))
+
+    @staticmethod
+    def variable_summaries(var):
+        with tf.name_scope('summaries'):
+            mean = tf.reduce_mean(var)
+            tf.summary.scalar('mean', mean)
+            with tf.name_scope('stddev'):
+                stddev = tf.sqrt(tf.reduce_mean(tf.square(var - mean)))
+            tf.summary.scalar('stddev', stddev)
+            tf.summary.scalar('max', tf.reduce_max(var))
+            tf.summary.scalar('min', tf.reduce_min(var))
+            tf.summary.histogram('histogram', var)
+
+    @classmethod
+    def save_labels(cls, predictions, actual, result_path, step, phase):
+        """Saves the actual and predicted labels to a NPY file
+
+        Parameter
+        ---------
+        predictions : numpy.ndarray
+          The NumPy array containing the predicted labels.
+        actual : numpy.ndarray
+          The NumPy array containing the actual labels.
+        result_path : str
+          The path where to save the concatenated actual and predicted labels.
+        step : int
+          The time step for the NumPy arrays.
+        phase : str
+          The phase for which the predictions is, i.e. training/validation/testing.
+        """
+
+        # Concatenate the predicted and actual labels
+        labels = np.concatenate((predictions, actual), axis=1)
+
+        # Create the result_path directory if it does not exist
+        if not os.path.exists(path=result_path):
+            os.mkdir(path=result_path)
+
+        # Save the labels array to NPY file
+        np.save(file=os.path.join(result_path, '{}-{}-{}.npy'.format(phase, cls.name, step)), arr=labels)
+
+
+class GruModel(Model, abc.ABC):
+    """Base class of the GRU models, which only define their classification head
+
+    The GRU trunk, i.e. the input layer, the GRU, and the linear output layer over its last
+    output, is shared. A subclass defines its loss with `head_loss`, and its predicted classes
+    with `head_prediction`, or it cannot be instantiated.
+    """
+
+    def __init__(self, alpha, batch_size, cell_size, dropout_rate, num_classes, sequence_length, engine='dynamic',
+                 input_mode='onehot', num_towers=1, use_xla=False, intra_op_threads=0, inter_op_threads=0,
+                 cpu_affinity=None, numa_node=None):
+        """Initialize the GRU model
+
+        Parameter
+        ---------
+        alpha : float
+          The learning rate for the model.
+        batch_size : int
+          The number of batches to use for training/validation/testing.
+        cell_size : int
+          The size of cell state.
+        dropout_rate : float
+          The dropout rate to be used.
+        num_classes : int
+          The number of classes in a dataset.
+        sequence_length : int
+          The number of features in a dataset.
+        engine : str
+          The GRU engine to use: "dynamic", "static", or "fused" (see `models.rnn.build_gru`).
+        input_mode : str
+          The input layer: "onehot" to one-hot encode the features, or "embedding" to gather
+          the input rows of the GRU kernels by feature value (see `models.rnn.build_embedding_gru`).
+        num_towers : int
+          The number of data-parallel GRU towers each batch is split across (see `models.rnn.data_parallel`).
+        use_xla : bool
+          Whether to compile the graph with XLA, if available.
+        intra_op_threads : int
+          The number of threads used to parallelize a single op, 0 lets TensorFlow decide.
+        inter_op_threads : int
+          The number of threads used to run independent ops, 0 lets TensorFlow decide.
+        cpu_affinity : str
+          The CPU list to pin the process to, e.g. "0-7".
+        numa_node : int
+          The NUMA node whose CPUs to pin the process to.
+        """
+        self.alpha = alpha
+        self.batch_size = batch_size
+        self.cell_size = cell_size
+        self.dropout_rate = dropout_rate
+        self.num_classes = num_classes
+        self.sequence_length = sequence_length
+        self.engine = engine
+        self.input_mode = input_mode
+        self.num_towers = num_towers
+
+        self.configure(use_xla=use_xla, intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads,
+                       cpu_affinity=cpu_affinity, numa_node=numa_node)
+
+        def __graph__():
+            """Build the inference graph"""
+            with tf.name_scope('input'):
+                # [BATCH_SIZE, SEQUENCE_LENGTH]
+                x_input = tf.placeholder(dtype=tf.uint8, shape=[None, self.sequence_length], name='x_input')
+
+                if self.input_mode == 'onehot':
+                    # [BATCH_SIZE, SEQUENCE_LENGTH, 10]
+                    x_onehot = tf.one_hot(indices=x_input, depth=10, on_value=1.0, off_value=0.0, name='x_onehot')
+
+                # [BATCH_SIZE]
+                y_input = tf.placeholder(dtype=tf.uint8, shape=[None], name='y_input')
+
+                # [BATCH_SIZE, N_CLASSES]
+                y_onehot = tf.one_hot(indices=y_input, depth=self.num_classes, on_value=1.0,
+                                      off_value=self.label_off_value, name='y_onehot')
+
+            state = tf.placeholder(dtype=tf.float32, shape=[None, self.cell_size], name='initial_state')
+
+            p_keep = tf.placeholder(dtype=tf.float32, name='p_keep')
+            learning_rate = tf.placeholder(dtype=tf.float32, name='learning_rate')
+
+            def gru_tower(inputs, initial_state):
+                if self.input_mode == 'embedding':
+                    return rnn.build_embedding_gru(indices=inputs, depth=10, initial_state=initial_state,
+                                                   cell_size=self.cell_size, p_keep=p_keep, engine=self.engine)
+                return rnn.build_gru(inputs=inputs, initial_state=initial_state, cell_size=self.cell_size,
+                                     p_keep=p_keep, engine=self.engine)
+
+            # outputs: [BATCH_SIZE, SEQUENCE_LENGTH, CELL_SIZE]
+            # states: [BATCH_SIZE, CELL_SIZE]
+            outputs, states = rnn.data_parallel(gru_tower,
+                                                [x_input if self.input_mode == 'embedding' else x_onehot, state],
+                                                num_towers=self.num_towers)
+
+            states = tf.identity(states, name='H')
+
+            with tf.name_scope('final_training_ops'):
+                with tf.name_scope('weights'):
+                    weight = tf.get_variable('weights',
+                                             initializer=tf.random_normal([self.cell_size, self.num_classes],
+                                                                          stddev=0.01))
+                    self.variable_summaries(weight)
+                with tf.name_scope('biases'):
+                    bias = tf.get_variable('biases', initializer=tf.constant(0.1, shape=[self.num_classes]))
+                    self.variable_summaries(bias)
+                hf = tf.transpose(outputs, [1, 0, 2])
+                last = tf.gather(hf, int(hf.get_shape()[0]) - 1)
+                with tf.name_scope('Wx_plus_b'):
+                    output = tf.matmul(last, weight) + bias
+                    tf.summary.histogram('pre-activations', output)
+
+            loss = self.head_loss(output=output, y_onehot=y_onehot, weight=weight)
+            tf.summary.scalar('loss', loss)
+
+            optimizer = tf.train.AdamOptimizer(learning_rate=learning_rate).minimize(loss)
+
+            with tf.name_scope('accuracy'):
+                predicted_class = self.head_prediction(output=output)
+                with tf.name_scope('correct_prediction'):
+                    correct = tf.equal(tf.argmax(predicted_class, 1), tf.argmax(y_onehot, 1))
+                with tf.name_scope('accuracy'):
+                    accuracy = tf.reduce_mean(tf.cast(correct, 'float'))
+            tf.summary.scalar('accuracy', accuracy)
+
+            # merge all the summaries collected from the TF graph
+            merged = tf.summary.merge_all()
+
+            # set class properties
+            self.x_input = x_input
+            self.y_input = y_input
+            self.y_onehot = y_onehot
+            self.p_keep = p_keep
+            self.loss = loss
+            self.optimizer = optimizer
+            self.state = state
+            self.states = states
+            self.learning_rate = learning_rate
+            self.predicted_class = predicted_class
+            self.accuracy = accuracy
+            self.merged = merged
+
+        self.build(graph=__graph__)
+
+    @abc.abstractmethod
+    def head_loss(self, output, y_onehot, weight):
+        """Returns the loss of the classification head
+
+        Parameter
+        ---------
+        output : tf.Tensor
+          The [BATCH_SIZE, N_CLASSES] output of the linear output layer.
+        y_onehot : tf.Tensor
+          The [BATCH_SIZE, N_CLASSES] one-hot encoded labels.
+        weight : tf.Variable
+          The weights of the linear output layer.
+        """
+
+    @abc.abstractmethod
+    def head_prediction(self, output):
+        """Returns the predicted classes of the classification head, named after `prediction_tensor`
+
+        Parameter
+        ---------
+        output : tf.Tensor
+          The [BATCH_SIZE, N_CLASSES] output of the linear output layer.
+        """
+
+    def initial_state(self):
+        # initialize H (current_state) with values of zeros
+        return np.zeros([self.batch_size, self.cell_size])
+
+    def training_feed(self, features, labels, state):
+        return {self.x_input: features, self.y_input: labels, self.state: state, self.learning_rate: self.alpha,
+                self.p_keep: self.dropout_rate}
+
+    def evaluation_feed(self, features, labels):
+        # score with dropout disabled
+        return {self.x_input: features, self.y_input: labels,
+                self.state: np.zeros([features.shape[0], self.cell_size]), self.p_keep: 1.0}
+
+    @classmethod
+    def predict(cls, batch_size, cell_size, num_classes, test_data, test_size, checkpoint_path, result_path,
+                config=None, cache_size=0):
+        """Classifies the data whether there is an intrusion or none, with dropout disabled
+
+        Parameter
+        ---------
+        batch_size : int
+          The number of batches to use for training/validation/testing.
+        cell_size : int
+          The size of cell state.
+        num_classes : int
+          The number of classes in a dataset.
+        test_data : numpy.ndarray
+          The NumPy array testing dataset.
+        test_size : int
+          The size of `test_data`.
+        checkpoint_path : str
+          The path where the trained model is saved.
+        result_path : str
+          The path where to save the actual and predicted classes array.
+        config : tf.ConfigProto
+          The session configuration.
+        cache_size : int
+          The number of feature vectors to memoize the predictions of, 0 to score every vector.
+        """
+
+        # the predictor feeds a zero initial state, with dropout disabled
+        cls.classify(batch_size=batch_size, num_classes=num_classes, test_data=test_data, test_size=test_size,
+                     checkpoint_path=checkpoint_path, result_path=result_path, config=config, cache_size=cache_size,
+                     cell_size=cell_size)
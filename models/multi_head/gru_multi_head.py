@@ -0,0 +1,281 @@
+# Module for the multi-head GRU+SVM and GRU+Softmax model
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Multi-head GRU+SVM and GRU+Softmax, trained together in one pass through the data"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import numpy as np
+import tensorflow as tf
+from models import rnn
+from models.gru_softmax.gru_softmax import GruSoftmax
+from models.gru_svm.gru_svm import GruSvm
+from models.model import Model
+
+HEADS = ['svm', 'softmax']
+
+# the single-head model of every head
+HEAD_MODELS = {'svm': GruSvm, 'softmax': GruSoftmax}
+
+
+class Head:
+    """A classification head of the multi-head model, standing in for the single-head model it is built by"""
+
+    def __init__(self, model, loss, accuracy, predicted_class, y_onehot):
+        """Initialize the head
+
+        Parameter
+        ---------
+        model : class
+          The single-head model of the head, i.e. GruSvm or GruSoftmax.
+        loss : tf.Tensor
+          The loss of the head.
+        accuracy : tf.Tensor
+          The accuracy of the head.
+        predicted_class : tf.Tensor
+          The predicted classes of the head.
+        y_onehot : tf.Tensor
+          The one-hot encoded labels, with the negative classes of the single-head model.
+        """
+        self.loss = loss
+        self.accuracy = accuracy
+        self.predicted_class = predicted_class
+        self.y_onehot = y_onehot
+        self.example_loss = model.example_loss
+        self.save_labels = model.save_labels
+
+
+class GruMultiHead(Model):
+    """Implementation of the GRU+SVM and GRU+Softmax heads over one input pipeline using TensorFlow"""
+
+    name = 'gru_multi_head'
+
+    def __init__(self, alpha, batch_size, cell_size, dropout_rate, num_classes, sequence_length, svm_c,
+                 shared_trunk=False, engine='dynamic', input_mode='onehot', use_xla=False, intra_op_threads=0,
+                 inter_op_threads=0, cpu_affinity=None, numa_node=None):
+        """Initialize the multi-head GRU class
+
+        Parameter
+        ---------
+        alpha : dict
+          The learning rate of the optimizer of every head, e.g. {"svm": 1e-5, "softmax": 1e-6}.
+        batch_size : int
+          The number of batches to use for training/validation.
+        cell_size : int
+          The size of cell state.
+        dropout_rate : dict
+          The keep probability of the dropout of every head, e.g. {"svm": 0.85, "softmax": 0.8}. A shared
+          trunk uses the mean keep probability of the heads.
+        num_classes : int
+          The number of classes in a dataset.
+        sequence_length : int
+          The number of features in a dataset.
+        svm_c : float
+          The SVM penalty parameter C.
+        shared_trunk : bool
+          Whether the heads share one GRU, instead of each head having its own GRU tower.
+        engine : str
+          The GRU engine to use: "dynamic", "static", or "fused" (see `models.rnn.build_gru`).
+        input_mode : str
+          The input layer: "onehot" or "embedding" (see `models.rnn.build_embedding_gru`).
+        use_xla : bool
+          Whether to compile the graph with XLA, if available.
+        intra_op_threads : int
+          The number of threads used to parallelize a single op, 0 lets TensorFlow decide.
+        inter_op_threads : int
+          The number of threads used to run independent ops, 0 lets TensorFlow decide.
+        cpu_affinity : str
+          The CPU list to pin the process to, e.g. "0-7".
+        numa_node : int
+          The NUMA node whose CPUs to pin the process to.
+        """
+        self.alpha = alpha
+        self.batch_size = batch_size
+        self.cell_size = cell_size
+        self.dropout_rate = dropout_rate
+        self.num_classes = num_classes
+        self.sequence_length = sequence_length
+        self.svm_c = svm_c
+        self.shared_trunk = shared_trunk
+        self.engine = engine
+        self.input_mode = input_mode
+
+        # every head has its own GRU tower, unless they share one trunk
+        self.trunks = ['trunk'] if shared_trunk else HEADS
+
+        # the keep probability of the dropout of every trunk
+        self.trunk_p_keep = ({'trunk': float(np.mean([dropout_rate[head] for head in HEADS]))} if shared_trunk
+                             else {head: dropout_rate[head] for head in HEADS})
+
+        self.configure(use_xla=use_xla, intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads,
+                       cpu_affinity=cpu_affinity, numa_node=numa_node)
+
+        def __graph__():
+            """Build the inference graph"""
+            with tf.name_scope('input'):
+                # [BATCH_SIZE, SEQUENCE_LENGTH]
+                x_input = tf.placeholder(dtype=tf.uint8, shape=[None, self.sequence_length], name='x_input')
+
+                if self.input_mode == 'onehot':
+                    # [BATCH_SIZE, SEQUENCE_LENGTH, 10]
+                    x_onehot = tf.one_hot(indices=x_input, depth=10, on_value=1.0, off_value=0.0, name='x_onehot')
+
+                # [BATCH_SIZE]
+                y_input = tf.placeholder(dtype=tf.uint8, shape=[None], name='y_input')
+
+                # [BATCH_SIZE, N_CLASSES], with the negative classes of the single-head model of every head
+                y_onehot = {head: tf.one_hot(indices=y_input, depth=self.num_classes, on_value=1.0,
+                                             off_value=HEAD_MODELS[head].label_off_value, name='y_onehot_' + head)
+                            for head in HEADS}
+
+            p_keep = {trunk: tf.placeholder(dtype=tf.float32, name='p_keep_' + trunk) for trunk in self.trunks}
+            learning_rate = {head: tf.placeholder(dtype=tf.float32, name='learning_rate_' + head) for head in HEADS}
+
+            state = {}
+            states = {}
+            last = {}
+
+            for trunk in self.trunks:
+                with tf.variable_scope(trunk):
+                    state[trunk] = tf.placeholder(dtype=tf.float32, shape=[None, self.cell_size],
+                                                  name='initial_state')
+
+                    # outputs: [BATCH_SIZE, SEQUENCE_LENGTH, CELL_SIZE]
+                    # states: [BATCH_SIZE, CELL_SIZE]
+                    if self.input_mode == 'embedding':
+                        outputs, states[trunk] = rnn.build_embedding_gru(indices=x_input, depth=10,
+                                                                         initial_state=state[trunk],
+                                                                         cell_size=self.cell_size, p_keep=p_keep[trunk],
+                                                                         engine=self.engine)
+                    else:
+                        outputs, states[trunk] = rnn.build_gru(inputs=x_onehot, initial_state=state[trunk],
+                                                               cell_size=self.cell_size, p_keep=p_keep[trunk],
+                                                               engine=self.engine)
+
+                    hf = tf.transpose(outputs, [1, 0, 2])
+                    last[trunk] = tf.gather(hf, int(hf.get_shape()[0]) - 1)
+
+            heads = {}
+
+            for head in HEADS:
+                trunk = 'trunk' if self.shared_trunk else head
+
+                with tf.variable_scope(head), tf.name_scope('final_training_ops'):
+                    with tf.name_scope('weights'):
+                        weight = tf.get_variable('weights',
+                                                 initializer=tf.random_normal([self.cell_size, self.num_classes],
+                                                                              stddev=0.01))
+                        self.variable_summaries(weight)
+                    with tf.name_scope('biases'):
+                        bias = tf.get_variable('biases', initializer=tf.constant(0.1, shape=[self.num_classes]))
+                        self.variable_summaries(bias)
+                    with tf.name_scope('Wx_plus_b'):
+                        output = tf.matmul(last[trunk], weight) + bias
+                        tf.summary.histogram('pre-activations', output)
+
+                with tf.name_scope(head):
+                    # the heads are built by the single-head models, so they cannot drift from them
+                    loss = HEAD_MODELS[head].head_loss(self, output=output, y_onehot=y_onehot[head], weight=weight)
+                    tf.summary.scalar('loss', loss)
+
+                    with tf.name_scope('accuracy'):
+                        predicted_class = HEAD_MODELS[head].head_prediction(self, output=output)
+                        with tf.name_scope('correct_prediction'):
+                            correct = tf.equal(tf.argmax(predicted_class, 1), tf.argmax(y_onehot[head], 1))
+                        with tf.name_scope('accuracy'):
+                            accuracy = tf.reduce_mean(tf.cast(correct, 'float'))
+                    tf.summary.scalar('accuracy', accuracy)
+
+                heads[head] = Head(model=HEAD_MODELS[head], loss=loss, accuracy=accuracy,
+                                   predicted_class=predicted_class, y_onehot=y_onehot[head])
+
+            # every head has its own optimizer, at its own learning rate, over its variables and those of its GRU
+            losses = []
+            optimizers = []
+
+            for head in HEADS:
+                variables = tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, scope=head + '/')
+                loss = heads[head].loss
+
+                if self.shared_trunk:
+                    variables += tf.get_collection(tf.GraphKeys.TRAINABLE_VARIABLES, scope='trunk/')
+
+                    # the trunk takes the steps of both heads, on their mean loss per example, so the loss
+                    # summed over the batch does not outweigh the loss averaged over it
+                    if HEAD_MODELS[head].sum_loss:
+                        loss = loss / tf.cast(tf.shape(x_input)[0], tf.float32)
+
+                losses.append(loss)
+                optimizers.append(tf.train.AdamOptimizer(learning_rate=learning_rate[head], name='Adam_' + head)
+                                  .minimize(loss, var_list=variables))
+
+            total_loss = tf.add_n(losses)
+            optimizer = tf.group(*optimizers)
+
+            # merge all the summaries collected from the TF graph
+            merged = tf.summary.merge_all()
+
+            # set class properties
+            self.x_input = x_input
+            self.y_input = y_input
+            self.p_keep = p_keep
+            self.learning_rate = learning_rate
+            self.loss = total_loss
+            self.optimizer = optimizer
+            self.state = state
+            self.states = states
+            self.classification_heads = heads
+            self.merged = merged
+
+        self.build(graph=__graph__)
+
+    def heads(self):
+        return self.classification_heads
+
+    def initial_state(self):
+        # initialize H (current_state) of every trunk with values of zeros
+        return {trunk: np.zeros([self.batch_size, self.cell_size]) for trunk in self.trunks}
+
+    def training_feed(self, features, labels, state):
+        # one batch feeds every head
+        feed_dict = {self.x_input: features, self.y_input: labels}
+        feed_dict.update({self.learning_rate[head]: self.alpha[head] for head in HEADS})
+        feed_dict.update({self.p_keep[trunk]: self.trunk_p_keep[trunk] for trunk in self.trunks})
+        feed_dict.update({self.state[trunk]: state[trunk] for trunk in self.trunks})
+        return feed_dict
+
+    def evaluation_feed(self, features, labels):
+        # score with dropout disabled
+        feed_dict = {self.x_input: features, self.y_input: labels}
+        feed_dict.update({self.p_keep[trunk]: 1.0 for trunk in self.trunks})
+        feed_dict.update({self.state[trunk]: np.zeros([features.shape[0], self.cell_size]) for trunk in self.trunks})
+        return feed_dict
+
+    def cursor(self, state):
+        return {'state_' + trunk: state[trunk] for trunk in self.trunks}
+
+    def resume_state(self, cursor, state):
+        resumed = dict(state)
+        for trunk in self.trunks:
+            key = 'state_' + trunk
+            if cursor is not None and key in cursor and cursor[key].shape == state[trunk].shape:
+                resumed[trunk] = cursor[key]
+        return resumed
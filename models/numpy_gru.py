@@ -0,0 +1,205 @@
+# Module for the NumPy inference engine of the GRU models
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""A TensorFlow-free NumPy inference engine for the trained GRU+SVM and GRU+Softmax models"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import numpy as np
+import os
+
+# the checkpoint variables of the GRU models, by the names used in the exported file
+VARIABLE_NAMES = {'gates_kernel': 'rnn/gru_cell/gates/kernel', 'gates_bias': 'rnn/gru_cell/gates/bias',
+                  'candidate_kernel': 'rnn/gru_cell/candidate/kernel', 'candidate_bias': 'rnn/gru_cell/candidate/bias',
+                  'weights': 'weights', 'biases': 'biases'}
+
+# the classification layers of the GRU models
+HEADS = ['svm', 'softmax']
+
+# the number of values of a binned feature, i.e. the depth of the one-hot input
+DEPTH = 10
+
+
+def export(checkpoint_path, export_file, head='svm'):
+    """Exports the weights of the latest GRU model checkpoint into a NumPy file
+
+    TensorFlow is only needed for reading the checkpoint, and not for scoring
+    with the exported file.
+
+    Parameter
+    ---------
+    checkpoint_path : str
+      The path where the trained model is saved.
+    export_file : str
+      The path of the NPZ file to write.
+    head : str
+      The classification layer of the model: "svm" or "softmax".
+
+    Returns
+    -------
+    latest : str
+      The path of the exported checkpoint.
+    """
+    import tensorflow as tf
+
+    if head not in HEADS:
+        raise ValueError('Unknown head {}, expected one of {}'.format(head, HEADS))
+
+    latest = tf.train.latest_checkpoint(checkpoint_path)
+
+    if latest is None:
+        raise ValueError('There is no model to export in {}'.format(checkpoint_path))
+
+    reader = tf.train.NewCheckpointReader(latest)
+
+    variables = {name: reader.get_tensor(variable).astype(np.float32) for name, variable in VARIABLE_NAMES.items()}
+
+    # write to a temporary file first, so a scorer never loads a partial file
+    with open(export_file + '.tmp', 'wb') as file:
+        np.savez(file, head=np.array(head), **variables)
+    os.replace(export_file + '.tmp', export_file)
+
+    print('Exported model {} to {}'.format(latest, export_file))
+
+    return latest
+
+
+class NumpyGru:
+    """Forward pass of an exported GRU model, in NumPy"""
+
+    def __init__(self, gates_kernel, gates_bias, candidate_kernel, candidate_bias, weights, biases, head='svm'):
+        """Initialize the NumpyGru class
+
+        Parameter
+        ---------
+        gates_kernel : numpy.ndarray
+          The [DEPTH + CELL_SIZE, 2 * CELL_SIZE] kernel of the reset and update gates.
+        gates_bias : numpy.ndarray
+          The [2 * CELL_SIZE] bias of the reset and update gates.
+        candidate_kernel : numpy.ndarray
+          The [DEPTH + CELL_SIZE, CELL_SIZE] kernel of the candidate state.
+        candidate_bias : numpy.ndarray
+          The [CELL_SIZE] bias of the candidate state.
+        weights : numpy.ndarray
+          The [CELL_SIZE, N_CLASSES] weights of the classification layer.
+        biases : numpy.ndarray
+          The [N_CLASSES] biases of the classification layer.
+        head : str
+          The classification layer of the model: "svm" or "softmax".
+        """
+        self.cell_size = candidate_bias.shape[0]
+        self.head = head
+
+        # a one-hot input selects one row of the input kernels, so the inputs are gathered instead of multiplied
+        self.input_kernel = np.concatenate([gates_kernel[:DEPTH], candidate_kernel[:DEPTH]], axis=1)
+        self.gates_kernel = np.ascontiguousarray(gates_kernel[DEPTH:])
+        self.candidate_kernel = np.ascontiguousarray(candidate_kernel[DEPTH:])
+        self.gates_bias = gates_bias
+        self.candidate_bias = candidate_bias
+        self.weights = weights
+        self.biases = biases
+
+    @classmethod
+    def load(cls, export_file):
+        """Returns the model in a file written by `export`
+
+        Parameter
+        ---------
+        export_file : str
+          The path of the exported model.
+
+        Returns
+        -------
+        model : NumpyGru
+          The loaded model.
+        """
+        with np.load(export_file) as variables:
+            return cls(head=str(variables['head']), **{name: variables[name] for name in VARIABLE_NAMES})
+
+    def decision_function(self, features, batch_size=4096):
+        """Returns the output of the classification layer, i.e. `Wx_plus_b`
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+        batch_size : int
+          The number of examples to unroll at once, bounding the memory of the gathered inputs.
+
+        Returns
+        -------
+        output : numpy.ndarray
+          The [N, N_CLASSES] output of the model.
+        """
+        features = np.asarray(features)
+
+        output = np.empty([features.shape[0], self.biases.shape[0]], dtype=np.float32)
+
+        for start in range(0, features.shape[0], batch_size):
+            output[start:start + batch_size] = self.__forward__(features[start:start + batch_size])
+
+        return output
+
+    def predict(self, features, batch_size=4096):
+        """Returns the predictions of the model, as in the `accuracy/prediction` tensor
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+        batch_size : int
+          The number of examples to unroll at once.
+
+        Returns
+        -------
+        predictions : numpy.ndarray
+          The [N, N_CLASSES] signs of the output for the SVM head, or the class probabilities
+          for the Softmax head.
+        """
+        output = self.decision_function(features, batch_size=batch_size)
+
+        if self.head == 'svm':
+            return np.sign(output)
+
+        output = np.exp(output - output.max(axis=1, keepdims=True))
+        return output / output.sum(axis=1, keepdims=True)
+
+    def nbytes(self):
+        """Returns the number of bytes of the parameters held by the model"""
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray))
+
+    def __forward__(self, features):
+        """Unrolls the GRU over a batch, with a zero initial state and no dropout"""
+        # [BATCH_SIZE, SEQUENCE_LENGTH, 3 * CELL_SIZE], the input terms of all the steps at once
+        inputs = self.input_kernel[features.astype(np.intp)]
+        gates_inputs = inputs[:, :, :2 * self.cell_size] + self.gates_bias
+        candidate_inputs = inputs[:, :, 2 * self.cell_size:] + self.candidate_bias
+
+        state = np.zeros([features.shape[0], self.cell_size], dtype=np.float32)
+
+        for step in range(features.shape[1]):
+            gates = gates_inputs[:, step] + state.dot(self.gates_kernel)
+            gates = 1. / (1. + np.exp(-gates))
+            reset, update = gates[:, :self.cell_size], gates[:, self.cell_size:]
+            candidate = np.tanh(candidate_inputs[:, step] + (reset * state).dot(self.candidate_kernel))
+            state = update * state + (1. - update) * candidate
+
+        return state.dot(self.weights) + self.biases
@@ -0,0 +1,147 @@
+# Module for the reusable predictor of the trained models
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""A reusable predictor, which loads a trained model once and keeps its session resident"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+from models.frozen import FrozenModel
+from models.frozen import freeze
+import numpy as np
+
+
+def freeze_model(model, checkpoint_path, config=None):
+    """Freezes the latest checkpoint of a trained model for a `Predictor`, if not yet frozen
+
+    Parameter
+    ---------
+    model : class
+      The GruSvm, GruSoftmax, or Svm class of the trained model.
+    checkpoint_path : str
+      The path where the trained model is saved.
+    config : tf.ConfigProto
+      The session configuration.
+
+    Returns
+    -------
+    frozen_file : str
+      The path of the frozen graph.
+    """
+    # freeze the same outputs as before, so a checkpoint is only ever frozen once
+    return freeze(checkpoint_path=checkpoint_path, output_tensors=[model.prediction_tensor, model.accuracy_tensor],
+                  config=config)
+
+
+class Predictor:
+    """Scores features with the frozen graph of a trained model, from any number of threads"""
+
+    def __init__(self, model, checkpoint_path=None, config=None, frozen_file=None):
+        """Loads the latest checkpoint of a trained model
+
+        The recurrent state and dropout placeholders of the GRU models are fed by the
+        predictor, with a zero state and dropout disabled.
+
+        Parameter
+        ---------
+        model : class
+          The GruSvm, GruSoftmax, or Svm class of the trained model.
+        checkpoint_path : str
+          The path where the trained model is saved.
+        config : tf.ConfigProto
+          The session configuration.
+        frozen_file : str
+          The graph already frozen by `freeze_model`, e.g. by a parent process, used instead of the checkpoint.
+        """
+        self.model = model
+
+        if frozen_file is None:
+            frozen_file = freeze_model(model=model, checkpoint_path=checkpoint_path, config=config)
+        self.frozen = FrozenModel(frozen_file=frozen_file, fetches=[model.prediction_tensor], config=config)
+
+        operations = [operation.name for operation in self.frozen.graph.get_operations()]
+
+        self.cell_size = None
+        self.feed_dict = {}
+
+        if 'initial_state' in operations:
+            self.cell_size = int(self.frozen.tensor('initial_state:0').get_shape()[1])
+        if 'p_keep' in operations:
+            self.feed_dict['p_keep:0'] = 1.0
+
+    def run(self, fetches, features, batch_size=None):
+        """Computes a tensor for the features, by batches of at most `batch_size` rows"""
+        features = np.asarray(features, dtype=np.float32)
+        batch_size = batch_size or max(len(features), 1)
+
+        values = []
+        for offset in range(0, max(len(features), 1), batch_size):
+            batch = features[offset:offset + batch_size]
+            feed_dict = dict(self.feed_dict)
+            feed_dict['input/x_input:0'] = batch
+            if self.cell_size is not None:
+                feed_dict['initial_state:0'] = np.zeros([len(batch), self.cell_size], dtype=np.float32)
+            values.append(self.frozen.run(feed_dict=feed_dict, fetches=[fetches])[0])
+
+        return np.concatenate(values)
+
+    def predict_batch(self, features, batch_size=None):
+        """Returns the predictions of the model, as in its `accuracy/prediction` tensor
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+        batch_size : int
+          The number of rows per session run, all of them at once if None.
+
+        Returns
+        -------
+        predictions : numpy.ndarray
+          The [N, N_CLASSES] predictions.
+        """
+        return self.run(self.model.prediction_tensor, features, batch_size=batch_size)
+
+    def decision_function(self, features, batch_size=None):
+        """Returns the output of the classification layer of the model, i.e. `Wx_plus_b`
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+        batch_size : int
+          The number of rows per session run, all of them at once if None.
+
+        Returns
+        -------
+        output : numpy.ndarray
+          The [N, N_CLASSES] output.
+        """
+        return self.run(self.model.output_tensor, features, batch_size=batch_size)
+
+    def close(self):
+        """Releases the session"""
+        self.frozen.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -0,0 +1,137 @@
+# Module for the int8 quantized NumPy inference engine of the GRU models
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Post-training int8 quantization of the NumPy inference engine of the GRU models"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+from models.numpy_gru import NumpyGru
+import numpy as np
+
+# the GRU state and the reset state are in (-1, 1), so they are quantized with a fixed scale of 1 / 127
+STATE_SCALE = 1. / 127
+
+
+def quantize(weights):
+    """Returns the symmetric int8 quantization of a kernel, with one scale per output channel
+
+    Parameter
+    ---------
+    weights : numpy.ndarray
+      The [NUM_INPUTS, NUM_OUTPUTS] float32 kernel.
+
+    Returns
+    -------
+    quantized : numpy.ndarray
+      The [NUM_INPUTS, NUM_OUTPUTS] int8 kernel.
+    scales : numpy.ndarray
+      The [NUM_OUTPUTS] scales, so that `weights` is about `quantized * scales`.
+    """
+    scales = np.abs(weights).max(axis=0) / 127
+    scales[scales == 0] = 1.
+
+    quantized = np.clip(np.round(weights / scales), -127, 127).astype(np.int8)
+
+    return quantized, scales.astype(np.float32)
+
+
+def dequantize(quantized, scales):
+    """Returns the int8 kernel widened to float32, with its scales folded in, i.e. `quantized * scales`
+
+    NumPy has no fast integer matrix product, so the kernels are widened for the float BLAS,
+    one batch at a time, while only the int8 kernels stay resident.
+
+    Parameter
+    ---------
+    quantized : numpy.ndarray
+      The [NUM_INPUTS, NUM_OUTPUTS] int8 kernel.
+    scales : numpy.ndarray
+      The [NUM_OUTPUTS] scales of the kernel.
+    """
+    return quantized.astype(np.float32) * scales
+
+
+def quantize_state(state):
+    """Returns the int8 values of a state in (-1, 1), in a float array"""
+    return np.rint(state * 127)
+
+
+class QuantizedGru(NumpyGru):
+    """Forward pass of an exported GRU model, with int8 kernels and int8 states
+
+    The int8 kernels take a quarter of the memory of the float32 kernels. NumPy has no fast integer
+    matrix product, so the products still run in float32, on kernels widened one batch at a time:
+    the model is smaller, but not faster, than a `NumpyGru`.
+    """
+
+    def __init__(self, gates_kernel, gates_bias, candidate_kernel, candidate_bias, weights, biases, head='svm'):
+        """Quantizes the kernels of an exported GRU model
+
+        The biases are kept in float32, as they are added after the products are rescaled.
+
+        Parameter
+        ---------
+        gates_kernel : numpy.ndarray
+          The [DEPTH + CELL_SIZE, 2 * CELL_SIZE] kernel of the reset and update gates.
+        gates_bias : numpy.ndarray
+          The [2 * CELL_SIZE] bias of the reset and update gates.
+        candidate_kernel : numpy.ndarray
+          The [DEPTH + CELL_SIZE, CELL_SIZE] kernel of the candidate state.
+        candidate_bias : numpy.ndarray
+          The [CELL_SIZE] bias of the candidate state.
+        weights : numpy.ndarray
+          The [CELL_SIZE, N_CLASSES] weights of the classification layer.
+        biases : numpy.ndarray
+          The [N_CLASSES] biases of the classification layer.
+        head : str
+          The classification layer of the model: "svm" or "softmax".
+        """
+        super().__init__(gates_kernel=gates_kernel, gates_bias=gates_bias, candidate_kernel=candidate_kernel,
+                         candidate_bias=candidate_bias, weights=weights, biases=biases, head=head)
+
+        # only the int8 kernels and their scales are kept, the float32 kernels are released
+        self.input_kernel, self.input_scales = quantize(self.input_kernel)
+        self.gates_kernel, self.gates_scales = quantize(self.gates_kernel)
+        self.candidate_kernel, self.candidate_scales = quantize(self.candidate_kernel)
+        self.weights, self.weights_scales = quantize(self.weights)
+
+    def __forward__(self, features):
+        """Unrolls the GRU over a batch, with a zero initial state and no dropout"""
+        # the kernels multiplying the int8 values of a state, widened once for the batch, fold in the state scale
+        gates_kernel = dequantize(self.gates_kernel, self.gates_scales * np.float32(STATE_SCALE))
+        candidate_kernel = dequantize(self.candidate_kernel, self.candidate_scales * np.float32(STATE_SCALE))
+        weights = dequantize(self.weights, self.weights_scales * np.float32(STATE_SCALE))
+
+        # [BATCH_SIZE, SEQUENCE_LENGTH, 3 * CELL_SIZE], the input terms of all the steps at once
+        inputs = self.input_kernel[features.astype(np.intp)] * self.input_scales
+        gates_inputs = inputs[:, :, :2 * self.cell_size] + self.gates_bias
+        candidate_inputs = inputs[:, :, 2 * self.cell_size:] + self.candidate_bias
+
+        state = np.zeros([features.shape[0], self.cell_size], dtype=np.float32)
+
+        for step in range(features.shape[1]):
+            gates = gates_inputs[:, step] + quantize_state(state).dot(gates_kernel)
+            gates = 1. / (1. + np.exp(-gates))
+            reset, update = gates[:, :self.cell_size], gates[:, self.cell_size:]
+            candidate = np.tanh(candidate_inputs[:, step] + quantize_state(reset * state).dot(candidate_kernel))
+            state = update * state + (1. - update) * candidate
+
+        return quantize_state(state).dot(weights) + self.biases
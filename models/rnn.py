@@ -0,0 +1,276 @@
+# Module for the GRU cell engines
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""GRU cell engines shared by the GRU+SVM and GRU+Softmax models"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import re
+import tensorflow as tf
+
+# available engines for unrolling the GRU over the fixed-length sequence
+ENGINES = ['dynamic', 'static', 'fused']
+
+# available modes for feeding the binned features to the GRU
+INPUT_MODES = ['onehot', 'embedding']
+
+# variable names of tf.contrib.rnn.GRUBlockCell, mapped to the names used by tf.contrib.rnn.GRUCell
+FUSED_VARIABLE_NAMES = {'w_ru': 'gates/kernel', 'b_ru': 'gates/bias', 'w_c': 'candidate/kernel',
+                        'b_c': 'candidate/bias'}
+
+
+def build_gru(inputs, initial_state, cell_size, p_keep, engine='dynamic'):
+    """Unrolls a GRU over the input sequence
+
+    Parameter
+    ---------
+    inputs : tf.Tensor
+      The [BATCH_SIZE, SEQUENCE_LENGTH, INPUT_SIZE] input sequence.
+    initial_state : tf.Tensor
+      The [BATCH_SIZE, CELL_SIZE] initial state of the GRU.
+    cell_size : int
+      The size of cell state.
+    p_keep : tf.Tensor
+      The probability of keeping an input unit.
+    engine : str
+      The GRU engine to use: "dynamic" for tf.nn.dynamic_rnn over tf.contrib.rnn.GRUCell,
+      "static" for a static unroll of tf.contrib.rnn.GRUCell, or "fused" for a static unroll
+      of the fused tf.contrib.rnn.GRUBlockCell kernel.
+
+    Returns
+    -------
+    outputs : tf.Tensor
+      The [BATCH_SIZE, SEQUENCE_LENGTH, CELL_SIZE] outputs of the GRU.
+    states : tf.Tensor
+      The [BATCH_SIZE, CELL_SIZE] state of the GRU at the last time step.
+    """
+
+    if engine == 'dynamic':
+        cell = tf.contrib.rnn.GRUCell(cell_size)
+        drop_cell = tf.contrib.rnn.DropoutWrapper(cell, input_keep_prob=p_keep)
+        return tf.nn.dynamic_rnn(drop_cell, inputs, initial_state=initial_state, dtype=tf.float32)
+
+    if engine == 'static':
+        cell = tf.contrib.rnn.GRUCell(cell_size)
+    elif engine == 'fused':
+        cell = tf.contrib.rnn.GRUBlockCell(cell_size)
+    else:
+        raise ValueError('Unknown GRU engine "{}", expected one of {}'.format(engine, ENGINES))
+
+    # dropping out the whole sequence in one op is the same as
+    # dropping out the input of every time step
+    inputs = tf.nn.dropout(inputs, keep_prob=p_keep)
+
+    # the sequence length is fixed, so the time steps can be unrolled in the graph
+    # [SEQUENCE_LENGTH] list of [BATCH_SIZE, INPUT_SIZE]
+    sequence = tf.unstack(inputs, axis=1)
+
+    outputs, states = tf.contrib.rnn.static_rnn(cell, sequence, initial_state=initial_state, dtype=tf.float32)
+
+    # [BATCH_SIZE, SEQUENCE_LENGTH, CELL_SIZE]
+    outputs = tf.stack(outputs, axis=1)
+
+    return outputs, states
+
+
+def build_embedding_gru(indices, depth, initial_state, cell_size, p_keep, engine='dynamic'):
+    """Unrolls a GRU over a sequence of indices, without materializing their one-hot encoding
+
+    The input rows of the GRUCell kernels are gathered by index, which is the same as
+    multiplying the one-hot encoded inputs by the kernels. The variables are named after
+    the GRUCell variables, so checkpoints are shared with `build_gru`.
+
+    Parameter
+    ---------
+    indices : tf.Tensor
+      The [BATCH_SIZE, SEQUENCE_LENGTH] integer input sequence.
+    depth : int
+      The number of distinct values of an index.
+    initial_state : tf.Tensor
+      The [BATCH_SIZE, CELL_SIZE] initial state of the GRU.
+    cell_size : int
+      The size of cell state.
+    p_keep : tf.Tensor
+      The probability of keeping an input unit.
+    engine : str
+      The GRU engine to use: "dynamic" or "static".
+
+    Returns
+    -------
+    outputs : tf.Tensor
+      The [BATCH_SIZE, SEQUENCE_LENGTH, CELL_SIZE] outputs of the GRU.
+    states : tf.Tensor
+      The [BATCH_SIZE, CELL_SIZE] state of the GRU at the last time step.
+    """
+
+    if engine not in ['dynamic', 'static']:
+        raise ValueError('The embedding input mode supports the "dynamic" and "static" engines, got "{}"'.format(
+            engine))
+
+    with tf.variable_scope('rnn/gru_cell'):
+        with tf.variable_scope('gates'):
+            gates_kernel = tf.get_variable('kernel', shape=[depth + cell_size, 2 * cell_size])
+            gates_bias = tf.get_variable('bias', shape=[2 * cell_size], initializer=tf.constant_initializer(1.0))
+        with tf.variable_scope('candidate'):
+            candidate_kernel = tf.get_variable('kernel', shape=[depth + cell_size, cell_size])
+            candidate_bias = tf.get_variable('bias', shape=[cell_size], initializer=tf.zeros_initializer())
+
+    with tf.name_scope('embedding'):
+        indices = tf.cast(indices, tf.int32)
+
+        # [BATCH_SIZE, SEQUENCE_LENGTH, 3 * CELL_SIZE]
+        projections = tf.concat([tf.gather(gates_kernel[:depth], indices),
+                                 tf.gather(candidate_kernel[:depth], indices)], axis=2)
+
+        # dropping out a one-hot input only matters for its hot unit,
+        # so one mask value per time step drops out its projection
+        mask = tf.nn.dropout(tf.ones_like(projections[:, :, :1]), keep_prob=p_keep)
+        projections = mask * projections + tf.concat([gates_bias, candidate_bias], axis=0)
+
+    cell = ProjectedGRUCell(cell_size=cell_size, gates_kernel=gates_kernel[depth:],
+                            candidate_kernel=candidate_kernel[depth:])
+
+    if engine == 'dynamic':
+        return tf.nn.dynamic_rnn(cell, projections, initial_state=initial_state, dtype=tf.float32)
+
+    outputs, states = tf.contrib.rnn.static_rnn(cell, tf.unstack(projections, axis=1), initial_state=initial_state,
+                                                dtype=tf.float32)
+
+    return tf.stack(outputs, axis=1), states
+
+
+class ProjectedGRUCell(tf.contrib.rnn.RNNCell):
+    """GRU cell whose inputs are the precomputed input projections of its gates and candidate"""
+
+    def __init__(self, cell_size, gates_kernel, candidate_kernel):
+        """Initialize the projected GRU cell
+
+        Parameter
+        ---------
+        cell_size : int
+          The size of cell state.
+        gates_kernel : tf.Tensor
+          The [CELL_SIZE, 2 * CELL_SIZE] recurrent kernel of the reset and update gates.
+        candidate_kernel : tf.Tensor
+          The [CELL_SIZE, CELL_SIZE] recurrent kernel of the candidate state.
+        """
+        super(ProjectedGRUCell, self).__init__()
+        self._cell_size = cell_size
+        self._gates_kernel = gates_kernel
+        self._candidate_kernel = candidate_kernel
+
+    @property
+    def state_size(self):
+        return self._cell_size
+
+    @property
+    def output_size(self):
+        return self._cell_size
+
+    def __call__(self, inputs, state, scope=None):
+        # inputs: [BATCH_SIZE, 3 * CELL_SIZE], the projections of the gates and the candidate
+        gate_inputs, candidate_inputs = tf.split(inputs, [2 * self._cell_size, self._cell_size], axis=1)
+
+        gates = tf.sigmoid(gate_inputs + tf.matmul(state, self._gates_kernel))
+        reset, update = tf.split(gates, num_or_size_splits=2, axis=1)
+
+        candidate = tf.tanh(candidate_inputs + tf.matmul(reset * state, self._candidate_kernel))
+
+        new_state = update * state + (1 - update) * candidate
+        return new_state, new_state
+
+
+def split_batch(tensor, num_splits):
+    """Splits a tensor along its batch dimension into near-equal parts
+
+    Parameter
+    ---------
+    tensor : tf.Tensor
+      The tensor to split, of any batch size.
+    num_splits : int
+      The number of parts.
+
+    Returns
+    -------
+    splits : list
+      The `num_splits` parts of `tensor`, the first ones holding one more example
+      when the batch size is not a multiple of `num_splits`.
+    """
+    batch_size = tf.shape(tensor)[0]
+    sizes = batch_size // num_splits + tf.cast(tf.range(num_splits) < batch_size % num_splits, tf.int32)
+    return tf.split(tensor, sizes, num=num_splits, axis=0)
+
+
+def data_parallel(fn, inputs, num_towers):
+    """Runs `fn` on `num_towers` slices of the batch, sharing the variables across the towers
+
+    The towers are independent subgraphs, so the inter-op thread pool runs them, and their
+    gradients, concurrently. The gradients of the shared variables are summed by autodiff,
+    which makes a training step identical to the single-tower step on the whole batch.
+
+    Parameter
+    ---------
+    fn : callable
+      The function building a tower, which returns a tuple of batch-major tensors.
+    inputs : list
+      The batch-major tensors to split across the towers, passed as arguments to `fn`.
+    num_towers : int
+      The number of towers.
+
+    Returns
+    -------
+    outputs : list
+      The outputs of `fn`, concatenated across the towers.
+    """
+
+    if num_towers == 1:
+        return fn(*inputs)
+
+    splits = [split_batch(tensor, num_towers) for tensor in inputs]
+
+    tower_outputs = []
+    for tower in range(num_towers):
+        with tf.variable_scope(tf.get_variable_scope(), reuse=tower > 0):
+            with tf.name_scope('tower_{}'.format(tower)):
+                tower_outputs.append(fn(*[split[tower] for split in splits]))
+
+    return [tf.concat(list(outputs), axis=0) for outputs in zip(*tower_outputs)]
+
+
+def checkpoint_variables():
+    """Returns the variables to checkpoint, keyed by their engine-independent names
+
+    The GRUCell variables of the "dynamic" and "static" engines keep their names, while
+    the GRUBlockCell variables of the "fused" engine (and their optimizer slots) are renamed
+    to the GRUCell names, so that a checkpoint can be restored by any engine.
+
+    Returns
+    -------
+    var_list : dict
+      The global variables keyed by their name in the checkpoint.
+    """
+
+    def canonical_name(match):
+        return '{}rnn/gru_cell/{}'.format(match.group(1), FUSED_VARIABLE_NAMES[match.group(2)])
+
+    pattern = re.compile(r'^(.*)rnn/[^/]+/({})(?=/|$)'.format('|'.join(FUSED_VARIABLE_NAMES)))
+
+    return {pattern.sub(canonical_name, var.op.name): var for var in tf.global_variables()}
@@ -0,0 +1,103 @@
+# Module for the random Fourier features of the RBF kernel SVM
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Random Fourier features for approximating an RBF kernel SVM with the linear L2-SVM"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import numpy as np
+import tensorflow as tf
+
+
+class RandomFourierFeatures:
+    """Random Fourier feature map of the RBF kernel exp(-gamma * ||x - y||^2), by Rahimi & Recht (2007)"""
+
+    def __init__(self, num_inputs, num_components, gamma, seed=None, omega=None, offset=None):
+        """Initialize the random Fourier feature map
+
+        Parameter
+        ---------
+        num_inputs : int
+          Number of features in a dataset.
+        num_components : int
+          Number of random Fourier features, i.e. the dimension of the feature map.
+        gamma : float
+          The RBF kernel coefficient.
+        seed : int
+          The seed for sampling the random projection.
+        omega : numpy.ndarray
+          The [NUM_INPUTS, NUM_COMPONENTS] random projection, e.g. as restored from a checkpoint, sampled if None.
+        offset : numpy.ndarray
+          The [NUM_COMPONENTS] random offset, sampled along with the projection if None.
+        """
+        self.num_inputs = num_inputs
+        self.num_components = num_components
+        self.gamma = gamma
+
+        if omega is not None:
+            self.omega = np.asarray(omega, dtype=np.float32)
+            self.offset = np.asarray(offset, dtype=np.float32)
+        else:
+            random_state = np.random.RandomState(seed)
+
+            # the Fourier transform of the RBF kernel is a normal distribution with variance 2 * gamma
+            self.omega = random_state.normal(scale=np.sqrt(2 * gamma),
+                                             size=[num_inputs, num_components]).astype(np.float32)
+            self.offset = random_state.uniform(0, 2 * np.pi, size=[num_components]).astype(np.float32)
+
+        self.scale = np.float32(np.sqrt(2 / num_components))
+
+    def transform(self, features):
+        """Returns the random Fourier features of a NumPy array of features
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [BATCH_SIZE, NUM_INPUTS] features.
+
+        Returns
+        -------
+        components : numpy.ndarray
+          The [BATCH_SIZE, NUM_COMPONENTS] random Fourier features.
+        """
+        return self.scale * np.cos(np.dot(np.asarray(features, dtype=np.float32), self.omega) + self.offset)
+
+    def build(self, x_input):
+        """Returns the random Fourier features of a tensor of features
+
+        The random projection is stored in non-trainable variables, so it is saved with
+        the checkpoints and restored along with the SVM weights.
+
+        Parameter
+        ---------
+        x_input : tf.Tensor
+          The [BATCH_SIZE, NUM_INPUTS] features.
+
+        Returns
+        -------
+        components : tf.Tensor
+          The [BATCH_SIZE, NUM_COMPONENTS] random Fourier features.
+        """
+        with tf.variable_scope('random_fourier_features'):
+            omega = tf.get_variable('omega', initializer=self.omega, trainable=False)
+            offset = tf.get_variable('offset', initializer=self.offset, trainable=False)
+        with tf.name_scope('random_fourier_features'):
+            return self.scale * tf.cos(tf.matmul(x_input, omega) + offset)
@@ -0,0 +1,138 @@
+# Module for the full-batch Newton solver of the L2-SVM
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Full-batch Newton solver for the L2-SVM objective"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import numpy as np
+
+# the ridge added to the bias in the Newton steps, so the Hessian of a class without margin violators is not singular
+BIAS_RIDGE = 1e-8
+
+
+def newton_l2svm(features, labels, num_classes, svm_c, max_iterations=50, tolerance=1e-6, chunk_size=65536,
+                 transform=None):
+    """Solves the L2-SVM objective with the modified finite Newton method of Keerthi & DeCoste (2005)
+
+    For every class k, with y in {-1, 1} and an unregularized bias b, minimizes
+
+        0.5 * ||w_k||^2 + C * sum_i max(0, 1 - y_ik * (x_i . w_k + b_k))^2
+
+    which is the loss of `models.svm.svm.Svm`. The objective is piecewise quadratic, so
+    each Newton step is exact on the current set of margin violators, and the method
+    usually converges in a few full passes over the data. The data is read in chunks,
+    so it may be a memory-mapped array.
+
+    Parameter
+    ---------
+    features : numpy.ndarray
+      The [NUM_EXAMPLES, NUM_FEATURES] features.
+    labels : numpy.ndarray
+      The [NUM_EXAMPLES] class indices.
+    num_classes : int
+      The number of classes in a dataset.
+    svm_c : float
+      The SVM penalty parameter C.
+    max_iterations : int
+      The maximum number of Newton steps.
+    tolerance : float
+      The stopping tolerance on the gradient norm, relative to its initial value.
+    chunk_size : int
+      The number of examples per chunk of a pass over the data.
+    transform : callable
+      The feature map to apply to every chunk of features, e.g. random Fourier features.
+
+    Returns
+    -------
+    weights : numpy.ndarray
+      The [NUM_FEATURES, NUM_CLASSES] weights, in the feature space of `transform`.
+    biases : numpy.ndarray
+      The [NUM_CLASSES] biases.
+    """
+
+    num_examples = features.shape[0]
+
+    def chunks():
+        for offset in range(0, num_examples, chunk_size):
+            x = features[offset:(offset + chunk_size)]
+            if transform is not None:
+                x = transform(x)
+            x = np.asarray(x, dtype=np.float64)
+
+            # append a constant feature for the bias
+            x = np.hstack([x, np.ones([x.shape[0], 1])])
+
+            y = -np.ones([x.shape[0], num_classes])
+            y[np.arange(x.shape[0]), labels[offset:(offset + chunk_size)].astype(np.int64)] = 1.0
+            yield x, y
+
+    def objective(z, with_derivatives=False):
+        loss = 0.5 * np.sum(np.square(z[:-1]), axis=0)
+        gradient = np.vstack([z[:-1], np.zeros([1, num_classes])])
+        hessian = np.array([regularizer] * num_classes)
+        for x, y in chunks():
+            # positive where the margin is violated
+            violation = np.maximum(0, 1 - y * x.dot(z))
+            loss += svm_c * np.sum(np.square(violation), axis=0)
+            if with_derivatives:
+                gradient -= 2 * svm_c * x.T.dot(y * violation)
+                for k in range(num_classes):
+                    active = x[violation[:, k] > 0]
+                    hessian[k] += 2 * svm_c * active.T.dot(active)
+        if with_derivatives:
+            return loss, gradient, hessian
+        return loss
+
+    num_features = features.shape[1] if transform is None else transform(features[:1]).shape[1]
+
+    # the bias is not regularized in the objective, only in the Hessian, with a ridge keeping it invertible
+    regularizer = np.diag(np.append(np.ones(num_features), BIAS_RIDGE))
+
+    z = np.zeros([num_features + 1, num_classes])
+    initial_norm = None
+
+    for iteration in range(max_iterations):
+        loss, gradient, hessian = objective(z, with_derivatives=True)
+
+        gradient_norm = np.linalg.norm(gradient)
+        if initial_norm is None:
+            initial_norm = gradient_norm
+
+        print('iteration [{}] newton -- loss : {}, gradient norm : {}'.format(iteration, np.sum(loss), gradient_norm))
+
+        if gradient_norm <= tolerance * initial_norm:
+            break
+
+        direction = np.stack([-np.linalg.solve(hessian[k], gradient[:, k]) for k in range(num_classes)], axis=1)
+
+        # backtracking line search, where the full Newton step is almost always accepted
+        step_size = 1.0
+        slope = np.sum(gradient * direction, axis=0)
+        while step_size > 1e-10:
+            new_loss = objective(z + step_size * direction)
+            if np.all(new_loss <= loss + 1e-4 * step_size * slope):
+                break
+            step_size *= 0.5
+
+        z = z + step_size * direction
+
+    return z[:-1], z[-1]
@@ -26,15 +26,25 @@ __author__ = 'Abien Fred Agarap'
 
 import numpy as np
 import os
-import sys
 import tensorflow as tf
 import time
+from models.model import Model
+from models.svm.kernel import RandomFourierFeatures
+from models.svm.solver import newton_l2svm
+from utils.evaluate import evaluate
+from utils.evaluate import print_results
 
 
-class Svm:
+class Svm(Model):
     """Implementation of L2-Support Vector Machine using TensorFlow"""
 
-    def __init__(self, alpha, batch_size, svm_c, num_classes, num_features):
+    name = 'svm'
+    output_tensor = 'training_ops/Wx_plus_b/add:0'
+    sum_loss = True
+
+    def __init__(self, alpha, batch_size, svm_c, num_classes, num_features, kernel_features=0, kernel_gamma=0.005,
+                 kernel_seed=None, use_xla=False, intra_op_threads=0, inter_op_threads=0, cpu_affinity=None,
+                 numa_node=None):
         """Initialize the SVM class
 
         Parameter
@@ -49,6 +59,22 @@ class Svm:
           Number of classes in a dataset.
         num_features : int
           Number of features in a dataset.
+        kernel_features : int
+          Number of random Fourier features approximating an RBF kernel, 0 for a linear SVM.
+        kernel_gamma : float
+          The RBF kernel coefficient.
+        kernel_seed : int
+          The seed for sampling the random Fourier features.
+        use_xla : bool
+          Whether to compile the graph with XLA, if available.
+        intra_op_threads : int
+          The number of threads used to parallelize a single op, 0 lets TensorFlow decide.
+        inter_op_threads : int
+          The number of threads used to run independent ops, 0 lets TensorFlow decide.
+        cpu_affinity : str
+          The CPU list to pin the process to, e.g. "0-7".
+        numa_node : int
+          The NUMA node whose CPUs to pin the process to.
         """
         self.alpha = alpha
         self.batch_size = batch_size
@@ -56,6 +82,15 @@ class Svm:
         self.num_classes = num_classes
         self.num_features = num_features
 
+        if kernel_features > 0:
+            self.kernel = RandomFourierFeatures(num_inputs=num_features, num_components=kernel_features,
+                                                gamma=kernel_gamma, seed=kernel_seed)
+        else:
+            self.kernel = None
+
+        self.configure(use_xla=use_xla, intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads,
+                       cpu_affinity=cpu_affinity, numa_node=numa_node)
+
         def __graph__():
             """Building the inference graph"""
 
@@ -71,24 +106,32 @@ class Svm:
                 y_onehot = tf.one_hot(indices=y_input, depth=self.num_classes, on_value=1, off_value=-1,
                                       name='y_onehot')
 
+            if self.kernel is not None:
+                # [BATCH_SIZE, KERNEL_FEATURES]
+                features = self.kernel.build(x_input)
+                num_inputs = self.kernel.num_components
+            else:
+                features = x_input
+                num_inputs = self.num_features
+
             with tf.name_scope('training_ops'):
                 with tf.name_scope('weights'):
                     weight = tf.get_variable(name='weights',
-                                             initializer=tf.random_normal([self.num_features, self.num_classes],
+                                             initializer=tf.random_normal([num_inputs, self.num_classes],
                                                                           stddev=0.01))
                     self.variable_summaries(weight)
                 with tf.name_scope('biases'):
                     bias = tf.get_variable(name='biases', initializer=tf.constant(0.1, shape=[self.num_classes]))
                     self.variable_summaries(bias)
                 with tf.name_scope('Wx_plus_b'):
-                    y_hat = tf.matmul(x_input, weight) + bias
+                    y_hat = tf.matmul(features, weight) + bias
                     tf.summary.histogram('pre-activations', y_hat)
 
             # L2-SVM
             with tf.name_scope('svm'):
                 regularization = 0.5 * tf.reduce_sum(tf.square(weight))
                 hinge_loss = tf.reduce_sum(
-                    tf.square(tf.maximum(tf.zeros([self.batch_size, self.num_classes]),
+                    tf.square(tf.maximum(tf.zeros_like(y_hat),
                                          1 - tf.cast(y_onehot, tf.float32) * y_hat)))
                 with tf.name_scope('loss'):
                     loss = regularization + self.svm_c * hinge_loss
@@ -117,27 +160,24 @@ class Svm:
             self.learning_rate = learning_rate
             self.accuracy = accuracy
             self.merged = merged
+            self.weight = weight
+            self.bias = bias
+
+        self.build(graph=__graph__)
 
-        sys.stdout.write('\n<log> Building Graph...')
-        __graph__()
-        sys.stdout.write('</log>\n')
+    def solve(self, checkpoint_path, model_name, train_data, train_size, validation_data, validation_size,
+              result_path, validation_batch_size=4096, max_iterations=50):
+        """Trains the SVM model with the full-batch Newton solver, instead of Adam
 
-    def train(self, checkpoint_path, log_path, model_name, epochs, result_path, train_data, train_size,
-              validation_data, validation_size):
-        """Trains the SVM model
+        The solution is saved as a checkpoint of this graph, so it is used by `predict`
+        the same way as a model trained by `train`.
 
         Parameter
         ---------
         checkpoint_path : str
           The directory where to save the trained model.
-        log_path : str
-          The directory where to save the TensorBoard logs.
         model_name : str
           The filename of the trained model.
-        epochs : int
-          The number of passes through the entire dataset.
-        result_path : str
-          The path where to save the NPY files consisting of the actual and predicted labels.
         train_data : numpy.ndarray
           The numpy.ndarray to be used as the training dataset.
         train_size : int
@@ -146,104 +186,53 @@ class Svm:
           The numpy.ndarray to be used as the validation dataset.
         validation_size : int
           The number of data in `validation_data`.
+        result_path : str
+          The path where to save the NPY files consisting of the actual and predicted labels.
+        validation_batch_size : int
+          The number of examples to score per session run during validation.
+        max_iterations : int
+          The maximum number of Newton steps.
         """
 
         if not os.path.exists(checkpoint_path):
             os.mkdir(checkpoint_path)
 
-        saver = tf.train.Saver(max_to_keep=1000)
-
-        # variable initializer
-        init_op = tf.group(tf.local_variables_initializer(), tf.global_variables_initializer())
-
-        # get the time tuple, and parse to str
-        timestamp = str(time.asctime())
-
-        # event file to contain TF graph summaries during training
-        train_writer = tf.summary.FileWriter(log_path + timestamp + '-training', graph=tf.get_default_graph())
-
-        # event file to contain TF graph summaries during validation
-        validation_writer = tf.summary.FileWriter(log_path + timestamp + '-validation', graph=tf.get_default_graph())
-
-        with tf.Session() as sess:
-
-            sess.run(init_op)
-
-            checkpoint = tf.train.get_checkpoint_state(checkpoint_path)
-
-            # check if a trained model exists
-            if checkpoint and checkpoint.model_checkpoint_path:
-                # load the graph from the trained model
-                saver = tf.train.import_meta_graph(checkpoint.model_checkpoint_path + '.meta')
-                # restore the variables
-                saver.restore(sess, tf.train.latest_checkpoint(checkpoint_path))
-
-            try:
-                for step in range(epochs * train_size // self.batch_size):
-
-                    # set the value for slicing, to fetch batches of data
-                    offset = (step * self.batch_size) % train_size
-                    train_feature_batch = train_data[0][offset:(offset + self.batch_size)]
-                    train_label_batch = train_data[1][offset:(offset + self.batch_size)]
+        start_time = time.time()
 
-                    # dictionary for key-value pair input for training
-                    feed_dict = {self.x_input: train_feature_batch, self.y_input: train_label_batch,
-                                 self.learning_rate: self.alpha}
+        if self.kernel is not None:
+            # bound the memory of a chunk of random Fourier features to about 16 MB
+            weights, biases = newton_l2svm(features=train_data[0][:train_size], labels=train_data[1][:train_size],
+                                           num_classes=self.num_classes, svm_c=self.svm_c,
+                                           max_iterations=max_iterations,
+                                           chunk_size=max(1024, 2 ** 21 // self.kernel.num_components),
+                                           transform=self.kernel.transform)
+        else:
+            weights, biases = newton_l2svm(features=train_data[0][:train_size], labels=train_data[1][:train_size],
+                                           num_classes=self.num_classes, svm_c=self.svm_c,
+                                           max_iterations=max_iterations)
 
-                    train_summary, _, predictions, actual = sess.run([self.merged, self.optimizer, self.predicted_class,
-                                                                      self.y_onehot], feed_dict=feed_dict)
+        print('EOF -- Training done in {} seconds'.format(time.time() - start_time))
 
-                    # display training accuracy and loss every 100 steps and at step 0
-                    if step % 100 == 0:
+        saver = self.saver()
 
-                        # get the train loss and train accuracy
-                        train_accuracy, train_loss = sess.run([self.accuracy, self.loss], feed_dict=feed_dict)
+        with tf.Session(config=self.config) as sess:
+            sess.run(tf.group(tf.global_variables_initializer(), tf.local_variables_initializer()))
 
-                        # display the train loss and train accuracy
-                        print('step [{}] train -- loss : {}, accuracy : {}'.format(step, train_loss, train_accuracy))
+            # export the solution as the weights of this graph
+            self.weight.load(weights.astype(np.float32), session=sess)
+            self.bias.load(biases.astype(np.float32), session=sess)
 
-                        # write the train summary
-                        train_writer.add_summary(train_summary, step)
+            saver.save(sess=sess, save_path=os.path.join(checkpoint_path, model_name))
 
-                        # save the model at the current time step
-                        saver.save(sess, checkpoint_path + model_name, global_step=step)
+            results = evaluate(sess=sess, model=self, features=validation_data[0][:validation_size],
+                               labels=validation_data[1][:validation_size], batch_size=validation_batch_size,
+                               result_path=result_path)
 
-                    self.save_labels(predictions=predictions, actual=actual, result_path=result_path, phase='training',
-                                     step=step)
-            except KeyboardInterrupt:
-                print('Training interrupted at {}'.format(step))
-                os._exit(1)
-            finally:
-                print('EOF -- training done at step {}'.format(step))
+            print_results(prefix='EOF -- validation', results=results)
 
-                for step in range(epochs * validation_size // self.batch_size):
-
-                    offset = (step * self.batch_size) % validation_size
-                    validation_feature_batch = validation_data[0][offset:(offset + self.batch_size)]
-                    validation_label_batch = validation_data[1][offset:(offset + self.batch_size)]
-
-                    # dictionary for key-value pair input for validation
-                    feed_dict = {self.x_input: validation_feature_batch, self.y_input: validation_label_batch}
-
-                    test_summary, predictions, actual, test_loss, test_accuracy = \
-                        sess.run([self.merged, self.predicted_class, self.y_onehot, self.loss, self.accuracy],
-                                 feed_dict=feed_dict)
-
-                    # display validation accuracy and loss every 100 steps
-                    if step % 100 == 0 and step > 0:
-
-                        # write the validation summary
-                        validation_writer.add_summary(test_summary, step)
-
-                        print('step [{}] validation -- loss : {}, accuracy : {}'.format(step, test_loss, test_accuracy))
-
-                    self.save_labels(predictions=predictions, actual=actual, result_path=result_path,
-                                     phase='validation', step=step)
-
-                print('EOF -- Testing done at step {}'.format(step))
-
-    @staticmethod
-    def predict(batch_size, num_classes, test_data, test_size, checkpoint_path, result_path):
+    @classmethod
+    def predict(cls, batch_size, num_classes, test_data, test_size, checkpoint_path, result_path, config=None,
+                cache_size=0):
         """Classifies the data whether there is an intrusion or none
 
         Parameter
@@ -257,96 +246,13 @@ class Svm:
         test_size : int
           The size of `test_data`.
         checkpoint_path : str
-          The path where to save the trained model.
+          The path where the trained model is saved.
         result_path : str
           The path where to save the actual and predicted classes array.
+        config : tf.ConfigProto
+          The session configuration.
+        cache_size : int
+          The number of feature vectors to memoize the predictions of, 0 to score every vector.
         """
-
-        # variables initializer
-        init_op = tf.group(tf.global_variables_initializer(), tf.local_variables_initializer())
-
-        with tf.Session() as sess:
-            sess.run(init_op)
-
-            checkpoint = tf.train.get_checkpoint_state(checkpoint_path)
-
-            # check if trained model exists
-            if checkpoint and checkpoint.model_checkpoint_path:
-                # load the trained model
-                saver = tf.train.import_meta_graph(checkpoint.model_checkpoint_path + '.meta')
-                # restore the variables
-                saver.restore(sess, tf.train.latest_checkpoint(checkpoint_path))
-                print('Loaded model from {}'.format(tf.train.latest_checkpoint(checkpoint_path)))
-
-            try:
-                for step in range(test_size // batch_size):
-                    offset = (step * batch_size) % test_size
-                    test_example_batch = test_data[0][offset:(offset + batch_size)]
-                    test_label_batch = test_data[1][offset:(offset + batch_size)]
-
-                    # dictionary for input values for the tensors
-                    feed_dict = {'input/x_input:0': test_example_batch}
-
-                    # get the tensor for classification
-                    svm_tensor = sess.graph.get_tensor_by_name('accuracy/prediction:0')
-                    predictions = sess.run(svm_tensor, feed_dict=feed_dict)
-
-                    label_onehot = tf.one_hot(test_label_batch, num_classes, 1.0, -1.0)
-                    y_onehot = sess.run(label_onehot)
-
-                    # add key, value pair for labels
-                    feed_dict['input/y_input:0'] = test_label_batch
-
-                    # get the tensor for calculating the classification accuracy
-                    accuracy_tensor = sess.graph.get_tensor_by_name('accuracy/accuracy/Mean:0')
-                    accuracy = sess.run(accuracy_tensor, feed_dict=feed_dict)
-
-                    if step % 100 == 0 and step > 0:
-                        print('step [{}] test -- accuracy : {}'.format(step, accuracy))
-
-                    Svm.save_labels(predictions=predictions, actual=y_onehot, result_path=result_path, step=step,
-                                    phase='testing')
-            except KeyboardInterrupt:
-                print('KeyboardInterrupt at step {}'.format(step))
-            finally:
-                print('Done classifying at step {}'.format(step))
-
-    @staticmethod
-    def variable_summaries(var):
-        with tf.name_scope('summaries'):
-            mean = tf.reduce_mean(var)
-            tf.summary.scalar('mean', mean)
-            with tf.name_scope('stddev'):
-                stddev = tf.sqrt(tf.reduce_mean(tf.square(var - mean)))
-            tf.summary.scalar('stddev', stddev)
-            tf.summary.scalar('max', tf.reduce_max(var))
-            tf.summary.scalar('min', tf.reduce_min(var))
-            tf.summary.histogram('histogram', var)
-
-    @staticmethod
-    def save_labels(predictions, actual, result_path, step, phase):
-        """Saves the actual and predicted labels to a NPY file
-
-        Parameter
-        ---------
-        predictions : numpy.ndarray
-          The NumPy array containing the predicted labels.
-        actual : numpy.ndarray
-          The NumPy array containing the actual labels.
-        result_path : str
-          The path where to save the concatenated actual and predicted labels.
-        step : int
-          The time step for the NumPy arrays.
-        phase : str
-          The phase for which the predictions is, i.e. training/validation/testing.
-        """
-
-        # Concatenate the predicted and actual labels
-        labels = np.concatenate((predictions, actual), axis=1)
-
-        # Creates the result_path directory if it does not exist
-        if not os.path.exists(path=result_path):
-            os.mkdir(path=result_path)
-
-        # save every labels array to NPY file
-        np.save(file=os.path.join(result_path, '{}-svm-{}.npy'.format(phase, step)), arr=labels)
+        cls.classify(batch_size=batch_size, num_classes=num_classes, test_data=test_data, test_size=test_size,
+                     checkpoint_path=checkpoint_path, result_path=result_path, config=config, cache_size=cache_size)
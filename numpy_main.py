@@ -0,0 +1,145 @@
+# Module for exporting and scoring the GRU models in NumPy
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Exports the trained GRU models, and scores with them in NumPy, without TensorFlow"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+from models.numpy_gru import HEADS
+from models.numpy_gru import NumpyGru
+from models.quantized_gru import QuantizedGru
+import numpy as np
+import os
+import time
+from utils.cache import PredictionCache
+
+BATCH_SIZE = 4096
+
+
+def load_dataset(dataset):
+    """Returns the features and labels of a NumPy array dataset, as in utils.data.load_data, without TensorFlow"""
+    dataset = np.load(dataset)
+    return np.delete(arr=dataset, obj=[17], axis=1), dataset[:, 17].astype(np.int64)
+
+
+def confusion_matrix(labels, predictions, num_classes):
+    """Returns the [N_CLASSES, N_CLASSES] confusion matrix, with the actual classes as rows"""
+    return np.bincount(labels * num_classes + predictions, minlength=num_classes ** 2).reshape(num_classes,
+                                                                                              num_classes)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='NumPy inference for the GRU models')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-o', '--operation', required=True, type=str, choices=['export', 'test', 'quantize'],
+                       help='the operation to perform: "export", "test", or "quantize" to compare int8 with float32')
+    group.add_argument('-f', '--export_file', required=True, type=str,
+                       help='the NPZ file of the exported model')
+    group.add_argument('-c', '--checkpoint_path', required=False, type=str,
+                       help='path where the trained model is saved, to export')
+    group.add_argument('-m', '--head', required=False, type=str, default='svm', choices=HEADS,
+                       help='the classification layer of the exported model: "svm" or "softmax"')
+    group.add_argument('-v', '--test_dataset', required=False, type=str,
+                       help='the NumPy array testing dataset (*.npy) to be used')
+    group.add_argument('-r', '--result_path', required=False, type=str,
+                       help='path where to save the actual and predicted labels')
+    group.add_argument('-b', '--batch_size', required=False, type=int, default=BATCH_SIZE,
+                       help='the number of examples to unroll at once')
+    group.add_argument('--cache_size', required=False, type=int, default=0,
+                       help='memoize the predictions of up to N feature vectors when testing')
+    group.add_argument('--int8', action='store_true',
+                       help='test with the int8 quantization of the model, about 4x smaller, but not faster')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+
+    if arguments.operation == 'export':
+        # only exporting needs TensorFlow
+        from utils import checkpoint
+        from models.numpy_gru import export
+
+        export(checkpoint_path=checkpoint.resolve(arguments.checkpoint_path), export_file=arguments.export_file,
+               head=arguments.head)
+    elif arguments.operation == 'test':
+        start_time = time.time()
+        model = (QuantizedGru if arguments.int8 else NumpyGru).load(arguments.export_file)
+        print('Loaded model {} in {} ms'.format(arguments.export_file, (time.time() - start_time) * 1000))
+
+        features, labels = load_dataset(arguments.test_dataset)
+
+        score = model.predict
+        if arguments.cache_size > 0:
+            score = PredictionCache(score=score, max_size=arguments.cache_size)
+
+        start_time = time.time()
+        predictions = np.concatenate([score(features[offset:offset + arguments.batch_size])
+                                      for offset in range(0, features.shape[0], arguments.batch_size)])
+        elapsed = time.time() - start_time
+
+        accuracy = np.mean(np.argmax(predictions, axis=1) == labels)
+        print('Test accuracy : {}, {} examples/s'.format(accuracy, features.shape[0] / elapsed))
+
+        if arguments.cache_size > 0:
+            print('Prediction cache : {}'.format(score.metrics()))
+
+        if arguments.result_path is not None:
+            actual = np.full(predictions.shape, -1.0 if model.head == 'svm' else 0.0, dtype=np.float32)
+            actual[np.arange(labels.shape[0]), labels] = 1.0
+
+            if not os.path.exists(path=arguments.result_path):
+                os.mkdir(path=arguments.result_path)
+
+            np.save(file=os.path.join(arguments.result_path, 'testing-numpy_gru_{}.npy'.format(model.head)),
+                    arr=np.concatenate((predictions, actual), axis=1))
+
+    elif arguments.operation == 'quantize':
+        features, labels = load_dataset(arguments.test_dataset)
+
+        models = [('float32', NumpyGru.load(arguments.export_file)), ('int8', QuantizedGru.load(arguments.export_file))]
+        outputs, classes = {}, {}
+
+        print('{:<10}{:>12}{:>16}{:>16}'.format('model', 'accuracy', 'rows/s', 'size (bytes)'))
+        for name, model in models:
+            start_time = time.time()
+            outputs[name] = model.decision_function(features, batch_size=arguments.batch_size)
+            throughput = features.shape[0] / (time.time() - start_time)
+
+            # the class of the `accuracy/prediction` tensor, i.e. the sign for the SVM head
+            classes[name] = np.argmax(np.sign(outputs[name]) if model.head == 'svm' else outputs[name], axis=1)
+
+            print('{:<10}{:>12.4f}{:>16.1f}{:>16}'.format(name, np.mean(classes[name] == labels), throughput,
+                                                          model.nbytes()))
+
+        for name, _ in models:
+            print('{} confusion matrix :\n{}'.format(name, confusion_matrix(labels=labels, predictions=classes[name],
+                                                                             num_classes=outputs[name].shape[1])))
+
+        print('prediction agreement : {}, max |output difference| : {}'.format(
+            np.mean(classes['float32'] == classes['int8']), np.max(np.abs(outputs['float32'] - outputs['int8']))))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
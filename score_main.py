@@ -0,0 +1,85 @@
+# Module for sharded batch scoring of large datasets
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Scores a large dataset with a trained model, sharded across worker processes"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+import multiprocessing
+import numpy as np
+from utils import sharding
+
+# available models to score with
+MODELS = ['gru_svm', 'gru_softmax', 'svm', 'numpy']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Sharded batch scoring for Intrusion Detection')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-m', '--model', required=False, type=str, default='gru_svm', choices=MODELS,
+                       help='the model to score with, "numpy" for a model exported with numpy_main.py')
+    group.add_argument('-c', '--checkpoint_path', required=True, type=str,
+                       help='path where the trained model is saved, or the exported NPZ file for "numpy"')
+    group.add_argument('-d', '--dataset', required=True, type=str,
+                       help='the NumPy array (*.npy) of features, or of a dataset with its labels, to be scored')
+    group.add_argument('-w', '--output_file', required=True, type=str,
+                       help='the NumPy array file (*.npy) where to write the predictions')
+    group.add_argument('-n', '--num_workers', required=False, type=int, default=multiprocessing.cpu_count(),
+                       help='the number of worker processes')
+    group.add_argument('--chunk_size', required=False, type=int, default=65536,
+                       help='the number of rows per task given to a worker')
+    group.add_argument('-b', '--batch_size', required=False, type=int, default=4096,
+                       help='the number of rows per scoring call')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    throughput = sharding.score_sharded(model=arguments.model, checkpoint_path=arguments.checkpoint_path,
+                                        features_file=arguments.dataset, output_file=arguments.output_file,
+                                        num_workers=arguments.num_workers, chunk_size=arguments.chunk_size,
+                                        batch_size=arguments.batch_size)
+
+    print('Scored {} in {:.1f} rows/s, predictions : {}'.format(arguments.dataset, throughput,
+                                                                arguments.output_file))
+
+    dataset = np.load(arguments.dataset, mmap_mode='r')
+
+    if dataset.shape[1] == sharding.SEQUENCE_LENGTH + 1:
+        predictions = np.load(arguments.output_file, mmap_mode='r')
+        confusion = np.zeros([sharding.N_CLASSES, sharding.N_CLASSES], dtype=np.int64)
+
+        # the metrics are accumulated by chunk, as neither file may fit in memory
+        for start, stop in sharding.split_rows(dataset.shape[0], arguments.chunk_size):
+            labels = dataset[start:stop, sharding.LABEL_COLUMN].astype(np.int64)
+            classes = np.argmax(predictions[start:stop], axis=1)
+            confusion += np.bincount(labels * sharding.N_CLASSES + classes,
+                                     minlength=sharding.N_CLASSES ** 2).reshape(confusion.shape)
+
+        print('Accuracy : {}'.format(np.trace(confusion) / confusion.sum()))
+        print('Confusion matrix :\n{}'.format(confusion))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
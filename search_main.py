@@ -0,0 +1,117 @@
+# Module for the hyperparameter search of the models
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Parallel hyperparameter search for the GRU+SVM, GRU+Softmax, and SVM models"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+import numpy as np
+import os
+from utils import search
+
+# the distribution of every hyper-parameter, passed to the model constructors
+SEARCH_SPACES = {
+    'gru_svm': {'alpha': ('log-uniform', 1e-6, 1e-3), 'batch_size': ('choice', [128, 256, 512]),
+                'cell_size': ('choice', [64, 128, 256, 512]), 'dropout_rate': ('uniform', 0.5, 1.0),
+                'svm_c': ('log-uniform', 1e-2, 1e1)},
+    'gru_softmax': {'alpha': ('log-uniform', 1e-7, 1e-4), 'batch_size': ('choice', [128, 256, 512]),
+                    'cell_size': ('choice', [64, 128, 256, 512]), 'dropout_rate': ('uniform', 0.5, 1.0)},
+    'svm': {'alpha': ('log-uniform', 1e-6, 1e-2), 'batch_size': ('choice', [128, 256, 512]),
+            'svm_c': ('log-uniform', 1e-2, 1e1)},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Hyperparameter search with successive halving and Hyperband')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('--model', required=True, type=str, choices=search.MODELS,
+                       help='the model to search the hyper-parameters of')
+    group.add_argument('-t', '--train_dataset', required=True, type=str,
+                       help='the NumPy array training dataset (*.npy) to be used')
+    group.add_argument('-v', '--validation_dataset', required=True, type=str,
+                       help='the NumPy array validation dataset (*.npy) to be used')
+    group.add_argument('-s', '--search_path', required=True, type=str,
+                       help='path where to save the dataset cache, and the trials and leaderboard of every run')
+    group.add_argument('-a', '--algorithm', required=False, type=str, default='halving',
+                       choices=['halving', 'hyperband'],
+                       help='the search algorithm: successive "halving", or "hyperband"')
+    group.add_argument('-n', '--num_trials', required=False, type=int, default=27,
+                       help='the number of trials to start successive halving with')
+    group.add_argument('--min_steps', required=False, type=int, default=100,
+                       help='the number of training steps of the first rung')
+    group.add_argument('--max_steps', required=False, type=int, default=8100,
+                       help='the maximum number of training steps of a trial')
+    group.add_argument('--eta', required=False, type=int, default=3,
+                       help='keep the best 1/eta of the trials at every rung')
+    group.add_argument('--validation_size', required=False, type=int, default=65536,
+                       help='the number of validation examples to score the trials with')
+    group.add_argument('-w', '--num_workers', required=False, type=int, default=os.cpu_count(),
+                       help='the number of trials to train in parallel')
+    group.add_argument('--seed', required=False, type=int,
+                       help='the seed for sampling the configurations')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    # cache the datasets once, for every trial process to memory-map
+    cache_path = os.path.join(arguments.search_path, 'cache')
+    train_files = search.cache_dataset(dataset=arguments.train_dataset, cache_path=cache_path)
+    validation_files = search.cache_dataset(dataset=arguments.validation_dataset, cache_path=cache_path)
+
+    search_space = SEARCH_SPACES[arguments.model]
+
+    # the trials and the leaderboard of every run go to a new directory, next to the shared cache
+    search_path = search.new_run_path(search_path=arguments.search_path)
+    print('search -- {}'.format(search_path))
+
+    if arguments.algorithm == 'hyperband':
+        leaderboard = search.hyperband(model=arguments.model, search_space=search_space,
+                                       min_steps=arguments.min_steps, max_steps=arguments.max_steps,
+                                       eta=arguments.eta, search_path=search_path,
+                                       train_files=train_files, validation_files=validation_files,
+                                       validation_size=arguments.validation_size,
+                                       num_workers=arguments.num_workers, seed=arguments.seed)
+    else:
+        random_state = np.random.RandomState(arguments.seed)
+        trials = [(trial, search.sample_configuration(search_space=search_space, random_state=random_state))
+                  for trial in range(arguments.num_trials)]
+        leaderboard = search.successive_halving(model=arguments.model, trials=trials,
+                                                min_steps=arguments.min_steps, max_steps=arguments.max_steps,
+                                                eta=arguments.eta, search_path=search_path,
+                                                train_files=train_files, validation_files=validation_files,
+                                                validation_size=arguments.validation_size,
+                                                num_workers=arguments.num_workers)
+
+    rows = search.write_leaderboard(leaderboard=leaderboard, search_path=search_path)
+
+    print('{:>8}{:>8}{:>12}{:>16}  {}'.format('trial', 'steps', 'accuracy', 'loss', 'configuration'))
+    for row in rows[:10]:
+        configuration = {name: value for name, value in row.items() if name in search_space}
+        print('{:>8}{:>8}{:>12.4f}{:>16.4f}  {}'.format(row['trial'], row['steps'], row['accuracy'], row['loss'],
+                                                        configuration))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
@@ -0,0 +1,180 @@
+# Module for the local scoring server
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Local HTTP server scoring concurrent requests with a warm model, in micro-batches"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+from http.server import BaseHTTPRequestHandler
+from http.server import HTTPServer
+import json
+import numpy as np
+from socketserver import ThreadingMixIn
+from utils.cache import invalid_rows
+from utils.cache import NUM_BINS
+from utils.cache import PredictionCache
+from utils.serving import load_scorer
+from utils.serving import MicroBatcher
+
+# the number of binned features of a record
+SEQUENCE_LENGTH = 21
+
+# available models to serve
+MODELS = ['gru_svm', 'gru_softmax', 'svm', 'numpy']
+
+
+class ScoringServer(ThreadingMixIn, HTTPServer):
+    """HTTP server handling each request in its own thread, so concurrent requests can be batched"""
+
+    daemon_threads = True
+
+    # the default backlog of 5 connections drops the connections of a burst of clients
+    request_queue_size = 128
+
+    def __init__(self, address, batcher, cache=None):
+        HTTPServer.__init__(self, address, ScoringHandler)
+        self.batcher = batcher
+        self.cache = cache
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """Scores `POST /predict` requests, and reports the metrics on `GET /metrics`"""
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self.send_error(404)
+            return
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+            features = np.array(body['features'], dtype=np.float32).reshape([-1, SEQUENCE_LENGTH])
+        except (KeyError, TypeError, ValueError) as error:
+            self.reply({'error': 'Bad request : {}'.format(error)}, status=400)
+            return
+
+        # a row out of the bins would fail, or be silently misread, in the micro-batch of other requests
+        invalid = np.flatnonzero(invalid_rows(features))
+        if invalid.size > 0:
+            self.reply({'error': 'Bad request : the features of rows {} are not integer bins in [0, {}]'.format(
+                invalid.tolist(), NUM_BINS - 1)}, status=400)
+            return
+
+        try:
+            predictions = self.server.batcher.submit(features)
+        except Exception as error:
+            # the model failed on the batch, which must not drop the connection
+            self.reply({'error': 'Scoring failed : {!r}'.format(error)}, status=500)
+            return
+
+        self.reply({'predictions': predictions.tolist(), 'classes': np.argmax(predictions, axis=1).tolist()})
+
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+
+        metrics = self.server.batcher.metrics.snapshot()
+        if self.server.cache is not None:
+            metrics['cache'] = self.server.cache.metrics()
+
+        self.reply(metrics)
+
+    def reply(self, content, status=200):
+        body = json.dumps(content).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # do not log every request
+        pass
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Scoring server for Intrusion Detection')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-m', '--model', required=False, type=str, default='gru_svm', choices=MODELS,
+                       help='the model to serve, "numpy" for a model exported with numpy_main.py')
+    group.add_argument('-c', '--checkpoint_path', required=True, type=str,
+                       help='path where the trained model is saved, or the exported NPZ file for "numpy"')
+    group.add_argument('--host', required=False, type=str, default='127.0.0.1',
+                       help='the address to listen on')
+    group.add_argument('--port', required=False, type=int, default=8080,
+                       help='the port to listen on')
+    group.add_argument('-b', '--max_batch_size', required=False, type=int, default=256,
+                       help='the number of rows after which a micro-batch is scored right away')
+    group.add_argument('-w', '--max_wait', required=False, type=float, default=5.0,
+                       help='the time in milliseconds a request may wait to be batched with others')
+    group.add_argument('--cache_size', required=False, type=int, default=0,
+                       help='memoize the predictions of up to N feature vectors')
+    group.add_argument('--intra_op_threads', required=False, type=int, default=0,
+                       help='the number of threads used to parallelize a single op')
+    group.add_argument('--inter_op_threads', required=False, type=int, default=0,
+                       help='the number of threads used to run independent ops')
+    group.add_argument('--cpu_affinity', required=False, type=str,
+                       help='the CPU list to pin the process to, e.g. "0-7"')
+    group.add_argument('--numa_node', required=False, type=int,
+                       help='the NUMA node whose CPUs to pin the process to')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+
+    config = None
+
+    if arguments.model != 'numpy':
+        from utils.session import configure_session
+
+        # pin the process before the session creates its thread pools
+        config = configure_session(intra_op_threads=arguments.intra_op_threads,
+                                   inter_op_threads=arguments.inter_op_threads, cpu_affinity=arguments.cpu_affinity,
+                                   numa_node=arguments.numa_node)
+
+    score = load_scorer(model=arguments.model, checkpoint_path=arguments.checkpoint_path, config=config)
+
+    cache = None
+    if arguments.cache_size > 0:
+        score = cache = PredictionCache(score=score, max_size=arguments.cache_size)
+
+    batcher = MicroBatcher(score=score, max_batch_size=arguments.max_batch_size,
+                           max_wait=arguments.max_wait / 1000)
+    server = ScoringServer((arguments.host, arguments.port), batcher, cache=cache)
+
+    print('Serving {} on http://{}:{}'.format(arguments.model, arguments.host, arguments.port))
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        print('Served {}'.format(batcher.metrics.snapshot()))
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
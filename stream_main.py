@@ -0,0 +1,226 @@
+# Module for streaming scoring of raw network traffic records
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Streaming scorer for raw Kyoto University 2013 records, read from stdin or a socket"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import argparse
+from dataset.transform import RecordTransform
+import numpy as np
+import socket
+import sys
+import time
+from utils.cache import invalid_rows
+from utils.cache import PredictionCache
+from utils.serving import batch_stream
+from utils.serving import LatencyMetrics
+from utils.serving import load_scorer
+
+# available models to score with
+MODELS = ['gru_svm', 'gru_softmax', 'svm', 'numpy']
+
+
+def parse_batch(batch, transform):
+    """Returns the binned features of the well-formed records of a micro-batch, and the malformed lines
+
+    The micro-batch is transformed at once, unless one of its records is malformed, in which case
+    every record is transformed on its own, so only the malformed records are left out. A record
+    whose features are not integer bins in [0, 9] is malformed too.
+
+    Parameter
+    ---------
+    batch : list
+      The (line, arrival time) pairs of the micro-batch.
+    transform : RecordTransform
+      The transform of the raw records into binned features.
+
+    Returns
+    -------
+    records : list
+      The well-formed records, each a list of its fields.
+    arrivals : list
+      The arrival times of the well-formed records.
+    features : numpy.ndarray
+      The binned features of the well-formed records.
+    rejected : list
+      The malformed lines.
+    """
+    records, arrivals, rejected = [], [], []
+    for line, arrival in batch:
+        record = line.rstrip('\r\n').split('\t')
+        if len(record) != len(transform.columns):
+            rejected.append(line)
+            continue
+        records.append(record)
+        arrivals.append(arrival)
+
+    try:
+        features = transform.binned_features(records)
+    except ValueError:
+        # the records that cannot be parsed get NaN features, which are not valid bins
+        features = np.full([len(records), len(transform.features)], np.nan, dtype=np.float32)
+        for index, record in enumerate(records):
+            try:
+                features[index] = transform.binned_features([record])[0]
+            except ValueError:
+                pass
+
+    invalid = invalid_rows(features)
+    rejected.extend('\t'.join(record) for record, malformed in zip(records, invalid) if malformed)
+
+    records = [record for record, malformed in zip(records, invalid) if not malformed]
+    arrivals = [arrival for arrival, malformed in zip(arrivals, invalid) if not malformed]
+
+    return records, arrivals, features[~invalid], rejected
+
+
+def score_stream(lines, output, transform, score, max_batch_size, max_wait, metrics, rejects=None):
+    """Scores the raw records of a stream in micro-batches, and writes a verdict per record
+
+    A verdict is the source and destination of the connection, its start time, "intrusion"
+    or "normal", and the time in milliseconds from the record arriving to its verdict.
+    Malformed records, i.e. records without all the fields of the transform or with a field
+    that cannot be parsed, are skipped, so they never stop the stream.
+
+    Parameter
+    ---------
+    lines : iterable
+      The tab-separated raw records.
+    output : file
+      The file where to write the verdicts.
+    transform : RecordTransform
+      The transform of the raw records into binned features.
+    score : callable
+      The function mapping features to predictions.
+    max_batch_size : int
+      The maximum number of records per micro-batch.
+    max_wait : float
+      The time in seconds a record may wait for other records to be batched with.
+    metrics : LatencyMetrics
+      The metrics to record the verdicts in.
+    rejects : file
+      The file where to write the malformed records, skipped if None.
+
+    Returns
+    -------
+    skipped : int
+      The number of records skipped.
+    """
+    skipped = 0
+    fields = [transform.columns.index(name) for name in ['start_time', 'src_ip_add', 'src_port_num', 'dst_ip_add',
+                                                         'dst_port_num']]
+
+    for batch in batch_stream(lines, max_batch_size=max_batch_size, max_wait=max_wait):
+        # the labels of live records are not parsed, they may be missing or malformed
+        records, arrivals, features, rejected = parse_batch(batch=batch, transform=transform)
+
+        skipped += len(rejected)
+        if rejects is not None and rejected:
+            rejects.writelines(line.rstrip('\r\n') + '\n' for line in rejected)
+            rejects.flush()
+
+        if not records:
+            continue
+
+        predictions = score(features)
+        metrics.record_batch()
+
+        now = time.time()
+        for record, arrival, prediction in zip(records, arrivals, predictions):
+            verdict = 'intrusion' if prediction.argmax() == 1 else 'normal'
+            output.write('\t'.join([record[field] for field in fields] +
+                                   [verdict, '{:.3f}'.format((now - arrival) * 1000)]) + '\n')
+            metrics.record_request(latency=now - arrival, rows=1)
+        output.flush()
+
+    return skipped
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Streaming scorer for Intrusion Detection')
+    group = parser.add_argument_group('Arguments')
+    group.add_argument('-m', '--model', required=False, type=str, default='gru_svm', choices=MODELS,
+                       help='the model to score with, "numpy" for a model exported with numpy_main.py')
+    group.add_argument('-c', '--checkpoint_path', required=True, type=str,
+                       help='path where the trained model is saved, or the exported NPZ file for "numpy"')
+    group.add_argument('-f', '--transform_file', required=True, type=str,
+                       help='the JSON transform of the raw records, as fitted by dataset/fit_transform.py')
+    group.add_argument('--port', required=False, type=int,
+                       help='read the records from the connections to this port, instead of stdin')
+    group.add_argument('--host', required=False, type=str, default='127.0.0.1',
+                       help='the address to listen on')
+    group.add_argument('-b', '--max_batch_size', required=False, type=int, default=256,
+                       help='the maximum number of records per micro-batch')
+    group.add_argument('-w', '--max_wait', required=False, type=float, default=5.0,
+                       help='the time in milliseconds a record may wait to be batched with others')
+    group.add_argument('--cache_size', required=False, type=int, default=0,
+                       help='memoize the predictions of up to N feature vectors')
+    group.add_argument('--reject_file', required=False, type=str,
+                       help='the file where to append the malformed records, which are skipped')
+    arguments = parser.parse_args()
+    return arguments
+
+
+def main(arguments):
+    transform = RecordTransform.load(arguments.transform_file)
+    score = load_scorer(model=arguments.model, checkpoint_path=arguments.checkpoint_path)
+    metrics = LatencyMetrics()
+
+    if arguments.cache_size > 0:
+        score = PredictionCache(score=score, max_size=arguments.cache_size)
+    skipped = 0
+
+    rejects = open(arguments.reject_file, 'a') if arguments.reject_file is not None else None
+
+    try:
+        if arguments.port is None:
+            skipped += score_stream(lines=sys.stdin, output=sys.stdout, transform=transform, score=score,
+                                    max_batch_size=arguments.max_batch_size, max_wait=arguments.max_wait / 1000,
+                                    metrics=metrics, rejects=rejects)
+        else:
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind((arguments.host, arguments.port))
+            server.listen(1)
+            print('Scoring the records sent to {}:{}'.format(arguments.host, arguments.port), file=sys.stderr)
+
+            # one sensor connection at a time, the verdicts are sent back on it
+            while True:
+                connection, _ = server.accept()
+                with connection, connection.makefile('r') as lines, connection.makefile('w') as output:
+                    skipped += score_stream(lines=lines, output=output, transform=transform, score=score,
+                                            max_batch_size=arguments.max_batch_size,
+                                            max_wait=arguments.max_wait / 1000, metrics=metrics, rejects=rejects)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print('Scored {}, skipped {} malformed records'.format(metrics.snapshot(), skipped), file=sys.stderr)
+        if rejects is not None:
+            rejects.close()
+        if arguments.cache_size > 0:
+            print('Prediction cache : {}'.format(score.metrics()), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    main(args)
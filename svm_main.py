@@ -26,19 +26,25 @@ __author__ = 'Abien Fred Agarap'
 
 import argparse
 from models.svm.svm import Svm
+from utils import checkpoint
+from utils import data
+from utils.session import configure_session
 
 # Hyper-parameters
 BATCH_SIZE = 256
+HM_EPOCHS = 10
 LEARNING_RATE = 1e-5
 N_CLASSES = 2
 SEQUENCE_LENGTH = 21
+SVM_C = 1
+KERNEL_GAMMA = 0.005
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description='SVM for Intrusion Detection')
     group = parser.add_argument_group('Arguments')
     group.add_argument('-o', '--operation', required=True, type=str,
-                       help='the operation to perform: "train" or "test"')
+                       help='the operation to perform: "train", "update" or "test"')
     group.add_argument('-t', '--train_dataset', required=False, type=str,
                        help='the NumPy array training dataset (*.npy) to be used')
     group.add_argument('-v', '--validation_dataset', required=True, type=str,
@@ -51,26 +57,87 @@ def parse_args():
                        help='filename for the trained model')
     group.add_argument('-r', '--result_path', required=True, type=str,
                        help='path where to save the actual and predicted labels')
+    group.add_argument('-s', '--svm_c', required=False, type=float, default=SVM_C,
+                       help='the SVM penalty parameter C')
+    group.add_argument('-n', '--num_epochs', required=False, type=int, default=HM_EPOCHS,
+                       help='the number of passes through the whole dataset')
+    group.add_argument('--solver', required=False, type=str, default='adam', choices=['adam', 'newton'],
+                       help='the solver to train with: mini-batch "adam", or the full-batch "newton" solver')
+    group.add_argument('--replay_dataset', required=False, type=str,
+                       help='the NumPy array dataset (*.npy) of older data to replay when updating')
+    group.add_argument('--replay_fraction', required=False, type=float, default=0.0,
+                       help='the fraction of the update data to be sampled from the replay dataset')
+    group.add_argument('--max_steps', required=False, type=int, default=1000,
+                       help='the number of training steps when updating')
+    group.add_argument('-k', '--kernel_features', required=False, type=int, default=0,
+                       help='the number of random Fourier features approximating an RBF kernel, 0 for a linear SVM')
+    group.add_argument('-g', '--kernel_gamma', required=False, type=float, default=KERNEL_GAMMA,
+                       help='the RBF kernel coefficient')
+    group.add_argument('--kernel_seed', required=False, type=int,
+                       help='the seed for sampling the random Fourier features')
+    group.add_argument('-i', '--validation_interval', required=False, type=int,
+                       help='score the validation dataset in the background every N training steps')
+    group.add_argument('-p', '--patience', required=False, type=int,
+                       help='stop after N validations without improvement, and publish the best weights')
+    group.add_argument('--validation_sample_size', required=False, type=int,
+                       help='score a random sample of N validation examples in the background')
+    group.add_argument('--use_xla', action='store_true',
+                       help='compile the graph with XLA, if available')
+    group.add_argument('--intra_op_threads', required=False, type=int, default=0,
+                       help='the number of threads used to parallelize a single op')
+    group.add_argument('--inter_op_threads', required=False, type=int, default=0,
+                       help='the number of threads used to run independent ops')
+    group.add_argument('--cpu_affinity', required=False, type=str,
+                       help='the CPU list to pin the process to, e.g. "0-7"')
+    group.add_argument('--numa_node', required=False, type=int,
+                       help='the NUMA node whose CPUs to pin the process to')
+    group.add_argument('--cache_size', required=False, type=int, default=0,
+                       help='memoize the predictions of up to N feature vectors when testing')
     arguments = parser.parse_args()
     return arguments
 
 
 def main(arguments):
 
-    if arguments.operation == 'train':
+    if arguments.operation in ['train', 'update']:
         train_features, train_labels = data.load_data(dataset=arguments.train_dataset)
+
+        if arguments.operation == 'update' and arguments.replay_dataset is not None:
+            # mix the new data with a sample of the older data, to not forget it
+            replay_features, replay_labels = data.load_data(dataset=arguments.replay_dataset)
+            train_features, train_labels = data.mix_replay(features=train_features, labels=train_labels,
+                                                           replay_features=replay_features,
+                                                           replay_labels=replay_labels,
+                                                           replay_fraction=arguments.replay_fraction)
         validation_features, validation_labels = data.load_data(dataset=arguments.validation_dataset)
 
         train_size = train_features.shape[0]
         validation_size = validation_features.shape[0]
 
         model = Svm(alpha=LEARNING_RATE, batch_size=BATCH_SIZE, svm_c=arguments.svm_c, num_classes=N_CLASSES,
-                    num_features=SEQUENCE_LENGTH)
-
-        model.train(checkpoint_path=arguments.checkpoint_path, log_path=arguments.log_path,
-                    model_name=arguments.model_name, epochs=arguments.num_epochs, result_path=arguments.result_path,
-                    train_data=[train_features, train_labels], train_size=train_size,
-                    validation_data=[validation_features, validation_labels], validation_size=validation_size)
+                    num_features=SEQUENCE_LENGTH, kernel_features=arguments.kernel_features,
+                    kernel_gamma=arguments.kernel_gamma, kernel_seed=arguments.kernel_seed, use_xla=arguments.use_xla,
+                    intra_op_threads=arguments.intra_op_threads, inter_op_threads=arguments.inter_op_threads,
+                    cpu_affinity=arguments.cpu_affinity, numa_node=arguments.numa_node)
+
+        if arguments.operation == 'update':
+            # warm-start from the current model, and publish a new model version
+            model.update(checkpoint_path=arguments.checkpoint_path, model_name=arguments.model_name,
+                         max_steps=arguments.max_steps, train_data=[train_features, train_labels],
+                         train_size=train_size, validation_data=[validation_features, validation_labels],
+                         validation_size=validation_size, result_path=arguments.result_path)
+        elif arguments.solver == 'newton':
+            model.solve(checkpoint_path=arguments.checkpoint_path, model_name=arguments.model_name,
+                        train_data=[train_features, train_labels], train_size=train_size,
+                        validation_data=[validation_features, validation_labels], validation_size=validation_size,
+                        result_path=arguments.result_path)
+        else:
+            model.train(checkpoint_path=arguments.checkpoint_path, log_path=arguments.log_path,
+                        model_name=arguments.model_name, epochs=arguments.num_epochs,
+                        result_path=arguments.result_path, train_data=[train_features, train_labels],
+                        train_size=train_size, validation_data=[validation_features, validation_labels],
+                        validation_size=validation_size, validation_interval=arguments.validation_interval,
+                        patience=arguments.patience, validation_sample_size=arguments.validation_sample_size)
     elif arguments.operation == 'test':
         test_features, test_labels = data.load_data(dataset=arguments.validation_dataset)
 
@@ -81,8 +148,14 @@ def main(arguments):
 
         test_size = test_features.shape[0]
 
+        # pin the process before the session creates its thread pools
+        config = configure_session(use_xla=arguments.use_xla, intra_op_threads=arguments.intra_op_threads,
+                                   inter_op_threads=arguments.inter_op_threads, cpu_affinity=arguments.cpu_affinity,
+                                   numa_node=arguments.numa_node)
+
         Svm.predict(batch_size=BATCH_SIZE, num_classes=N_CLASSES, test_data=[test_features, test_labels],
-                    test_size=test_size, checkpoint_path=arguments.checkpoint_path, result_path=arguments.result_path)
+                    test_size=test_size, checkpoint_path=checkpoint.resolve(arguments.checkpoint_path),
+                    result_path=arguments.result_path, config=config, cache_size=arguments.cache_size)
 
 
 if __name__ == '__main__':
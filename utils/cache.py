@@ -0,0 +1,156 @@
+# Module for memoizing the predictions of the models
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Memoization of the predictions of a model, keyed on the packed binned features"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import collections
+import numpy as np
+import threading
+
+# the number of bins of a binned feature
+NUM_BINS = 10
+
+
+def invalid_rows(features):
+    """Returns the mask of the rows with a feature that is not an integer bin in [0, NUM_BINS)
+
+    Parameter
+    ---------
+    features : numpy.ndarray
+      The [N, SEQUENCE_LENGTH] binned features.
+
+    Returns
+    -------
+    invalid : numpy.ndarray
+      The [N] mask of the invalid rows.
+    """
+    features = np.asarray(features)
+    return ~np.all((features >= 0) & (features < NUM_BINS) & (np.floor(features) == features), axis=1)
+
+
+def pack(features):
+    """Returns the keys of the binned features, one per row
+
+    Each of the 21 features is a bin in [0, 9], so a row is packed into 21 bytes. A ValueError is
+    raised if a feature is not such a bin.
+
+    Parameter
+    ---------
+    features : numpy.ndarray
+      The [N, SEQUENCE_LENGTH] binned features.
+
+    Returns
+    -------
+    keys : numpy.ndarray
+      The [N] rows of the features, as opaque byte strings.
+    """
+    # a feature outside the bins would be truncated into another bin, and share its key
+    invalid = np.flatnonzero(invalid_rows(features))
+    if invalid.size > 0:
+        raise ValueError('The features of rows {} are not integer bins in [0, {}]'.format(invalid.tolist(),
+                                                                                         NUM_BINS - 1))
+
+    features = np.ascontiguousarray(features, dtype=np.uint8)
+    return features.view(np.dtype((np.void, features.shape[1]))).ravel()
+
+
+class PredictionCache:
+    """A size-bounded LRU cache in front of a scoring function"""
+
+    def __init__(self, score, max_size=2 ** 20, num_classes=2):
+        """Initialize the cache
+
+        Parameter
+        ---------
+        score : callable
+          The function mapping a [BATCH_SIZE, SEQUENCE_LENGTH] array of features to the
+          [BATCH_SIZE, N_CLASSES] predictions.
+        max_size : int
+          The number of feature vectors to keep the predictions of, the least recently used are evicted.
+        num_classes : int
+          The number of classes in a dataset, i.e. the width of the predictions of an empty batch.
+        """
+        self.score = score
+        self.max_size = max_size
+        self.num_classes = num_classes
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __call__(self, features):
+        """Returns the predictions for the features, only scoring the vectors not seen yet
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] binned features.
+
+        Returns
+        -------
+        predictions : numpy.ndarray
+          The [N, N_CLASSES] predictions.
+        """
+        if len(features) == 0:
+            return np.empty([0, self.num_classes], dtype=np.float32)
+
+        # the repeated vectors of a batch are looked up and scored once
+        keys, index, inverse = np.unique(pack(features), return_index=True, return_inverse=True)
+        keys = [key.tobytes() for key in keys]
+
+        cached = [None] * len(keys)
+        with self.lock:
+            for position, key in enumerate(keys):
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    cached[position] = self.entries[key]
+
+        missed = [position for position, prediction in enumerate(cached) if prediction is None]
+
+        if missed:
+            scored = self.score(np.asarray(features)[index[missed]])
+            with self.lock:
+                for position, prediction in zip(missed, scored):
+                    # a copy of the row, so the cache does not keep the whole scored batch alive
+                    cached[position] = prediction.copy()
+                    self.entries[keys[position]] = cached[position]
+                    if len(self.entries) > self.max_size:
+                        self.entries.popitem(last=False)
+                        self.evictions += 1
+
+        with self.lock:
+            self.misses += len(missed)
+            self.hits += len(inverse) - len(missed)
+
+        return np.stack(cached)[inverse.ravel()]
+
+    def metrics(self):
+        """Returns the number of hits, misses and evictions, the hit rate, and the number of cached vectors
+
+        A hit is a row that was not scored, including the repeats of a vector within a batch.
+        """
+        with self.lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'hit_rate': self.hits / total if total else None, 'size': len(self.entries)}
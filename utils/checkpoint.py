@@ -0,0 +1,235 @@
+# Module for checkpointing the training progress and publishing model versions
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Checkpointing of the training progress, for exact resumption of training, and publishing of model versions"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import numpy as np
+import os
+import signal
+import tensorflow as tf
+import threading
+
+LATEST = 'LATEST'
+VERSIONS = 'versions'
+
+
+def save(sess, saver, checkpoint_path, model_name, step, next_step, **cursor):
+    """Saves the variables, and the position of the training in the data
+
+    The cursor is written before the checkpoint state file is updated, so the latest
+    checkpoint always has its cursor.
+
+    Parameter
+    ---------
+    sess : tf.Session
+      The session holding the variables, including the optimizer slots.
+    saver : tf.train.Saver
+      The saver of the variables.
+    checkpoint_path : str
+      The path where to save the checkpoint.
+    model_name : str
+      The filename of the checkpoint.
+    step : int
+      The training step to label the checkpoint with.
+    next_step : int
+      The training step to resume from.
+    cursor : numpy.ndarray
+      Any other training state to resume from, e.g. the GRU carry state.
+
+    Returns
+    -------
+    prefix : str
+      The prefix of the checkpoint files.
+    """
+    prefix = '{}-{}'.format(os.path.join(checkpoint_path, model_name), step)
+
+    cursor_file = prefix + '.cursor.npz'
+    np.savez(cursor_file + '.tmp.npz', next_step=next_step, **cursor)
+    os.replace(cursor_file + '.tmp.npz', cursor_file)
+
+    return saver.save(sess=sess, save_path=os.path.join(checkpoint_path, model_name), global_step=step)
+
+
+def restore(sess, saver, checkpoint_path):
+    """Restores the latest checkpoint into the graph already built, if there is one
+
+    Parameter
+    ---------
+    sess : tf.Session
+      The session where to restore the variables.
+    saver : tf.train.Saver
+      The saver of the variables.
+    checkpoint_path : str
+      The path where the checkpoints are saved.
+
+    Returns
+    -------
+    cursor : dict
+      The training state saved with the checkpoint, with at least `next_step`,
+      None if there is no checkpoint.
+    """
+    latest = tf.train.latest_checkpoint(checkpoint_path)
+
+    if latest is None:
+        return None
+
+    saver.restore(sess, latest)
+
+    cursor_file = latest + '.cursor.npz'
+
+    if not os.path.exists(cursor_file):
+        # a checkpoint saved without its cursor resumes with its weights from the start
+        print('Loaded model from {}, without a training cursor'.format(latest))
+        return {'next_step': 0}
+
+    with np.load(cursor_file) as cursor:
+        cursor = {key: cursor[key] for key in cursor.files}
+    cursor['next_step'] = int(cursor['next_step'])
+
+    print('Loaded model from {}, resuming at step {}'.format(latest, cursor['next_step']))
+
+    return cursor
+
+
+def resolve(checkpoint_path):
+    """Returns the directory of the latest published model version, or `checkpoint_path` if none was published
+
+    Parameter
+    ---------
+    checkpoint_path : str
+      The path where the checkpoints are saved, and where the model versions are published.
+
+    Returns
+    -------
+    model_path : str
+      The directory of the checkpoint to serve, or to warm-start from.
+    """
+    pointer = os.path.join(checkpoint_path, LATEST)
+
+    if not os.path.exists(pointer):
+        return checkpoint_path
+
+    with open(pointer) as file:
+        version = file.read().strip()
+
+    return os.path.join(checkpoint_path, VERSIONS, version)
+
+
+def warm_start(sess, saver, checkpoint_path):
+    """Restores the weights of the latest published model version, or of the latest training checkpoint
+
+    Unlike `restore`, the training cursor is ignored, since warm-started training runs on new data.
+
+    Parameter
+    ---------
+    sess : tf.Session
+      The session where to restore the variables.
+    saver : tf.train.Saver
+      The saver of the variables.
+    checkpoint_path : str
+      The path where the checkpoints are saved, and where the model versions are published.
+
+    Returns
+    -------
+    latest : str
+      The prefix of the restored checkpoint.
+    """
+    latest = tf.train.latest_checkpoint(resolve(checkpoint_path))
+
+    if latest is None:
+        raise ValueError('There is no model to warm-start from in {}'.format(checkpoint_path))
+
+    saver.restore(sess, latest)
+
+    print('Loaded model from {}, to warm-start from'.format(latest))
+
+    return latest
+
+
+def publish(sess, saver, checkpoint_path, model_name):
+    """Saves the variables as a new model version, then points LATEST to it
+
+    The pointer is replaced atomically, so `resolve` sees either the previous version or the
+    complete new one.
+
+    Parameter
+    ---------
+    sess : tf.Session
+      The session holding the variables.
+    saver : tf.train.Saver
+      The saver of the variables.
+    checkpoint_path : str
+      The path where the model versions are published.
+    model_name : str
+      The filename of the checkpoint.
+
+    Returns
+    -------
+    model_path : str
+      The directory of the new model version.
+    """
+    versions_path = os.path.join(checkpoint_path, VERSIONS)
+
+    if not os.path.exists(versions_path):
+        os.makedirs(versions_path)
+
+    versions = [int(version) for version in os.listdir(versions_path) if version.isdigit()]
+    version = '{:05d}'.format(max(versions, default=0) + 1)
+
+    model_path = os.path.join(versions_path, version)
+    os.mkdir(model_path)
+
+    saver.save(sess=sess, save_path=os.path.join(model_path, model_name))
+
+    pointer = os.path.join(checkpoint_path, LATEST)
+    with open(pointer + '.tmp', 'w') as file:
+        file.write(version + '\n')
+    os.replace(pointer + '.tmp', pointer)
+
+    print('Published model version {} to {}'.format(version, model_path))
+
+    return model_path
+
+
+class StopRequest:
+    """Defers SIGINT and SIGTERM until the current training step is done"""
+
+    def __init__(self):
+        self.requested = False
+        self.handlers = {}
+
+    def install(self):
+        """Installs the deferring signal handlers, if called from the main thread"""
+        if threading.current_thread() is threading.main_thread():
+            for signum in [signal.SIGINT, signal.SIGTERM]:
+                self.handlers[signum] = signal.signal(signum, self.__request__)
+        return self
+
+    def uninstall(self):
+        """Restores the previous signal handlers"""
+        for signum, handler in self.handlers.items():
+            signal.signal(signum, handler)
+        self.handlers = {}
+
+    def __request__(self, signum, frame):
+        self.requested = True
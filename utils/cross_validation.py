@@ -0,0 +1,192 @@
+# Module for parallel k-fold cross-validation
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Parallel k-fold cross-validation over one memory-mapped copy of a dataset"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import multiprocessing
+import numpy as np
+import os
+import time
+from utils import search
+
+
+def k_fold_indices(size, num_folds, seed=None):
+    """Returns the training and held-out indices of every fold
+
+    The indices of every fold are sorted, so each fold reads its rows in the order of the dataset.
+
+    Parameter
+    ---------
+    size : int
+      The number of examples in the dataset.
+    num_folds : int
+      The number of folds.
+    seed : int
+      The seed for assigning the examples to folds.
+
+    Returns
+    -------
+    folds : list
+      The (train_index, held_out_index) pair of every fold.
+    """
+    permutation = np.random.RandomState(seed).permutation(size)
+    held_out = [np.sort(index) for index in np.array_split(permutation, num_folds)]
+
+    return [(np.sort(np.concatenate(held_out[:fold] + held_out[fold + 1:])), held_out[fold])
+            for fold in range(num_folds)]
+
+
+def run_fold(model, configuration, fold_path, dataset_files, train_index, held_out_index, epochs, max_steps=None,
+             evaluation_batch_size=4096, intra_op_threads=0):
+    """Trains the model on the training folds, then scores it on the held-out fold
+
+    This runs in a fresh process for every fold. The folds are views over the memory-mapped
+    dataset, so only the rows of a batch are copied when it is fed.
+
+    Parameter
+    ---------
+    model : str
+      The model to train, one of `search.MODELS`.
+    configuration : dict
+      The hyper-parameters of the model.
+    fold_path : str
+      The directory where to save the checkpoints and the logs of the fold.
+    dataset_files : tuple
+      The features and labels NPY files of the cached dataset.
+    train_index : numpy.ndarray
+      The indices of the training examples.
+    held_out_index : numpy.ndarray
+      The indices of the held-out examples.
+    epochs : int
+      The number of passes through the training examples.
+    max_steps : int
+      If set, stop training at this step.
+    evaluation_batch_size : int
+      The number of examples to score per session run.
+    intra_op_threads : int
+      The number of threads used to parallelize a single op.
+
+    Returns
+    -------
+    result : dict
+      The loss, accuracy, confusion matrix, and training and evaluation time of the fold.
+    """
+    from utils.data import IndexedView
+
+    if not os.path.exists(fold_path):
+        os.makedirs(fold_path)
+
+    features, labels = search.load_cache(*dataset_files)
+
+    batch_size = configuration['batch_size']
+
+    # slice the training examples to be exact as per the batch size
+    train_index = train_index[:train_index.shape[0] - (train_index.shape[0] % batch_size)]
+
+    train_data = [IndexedView(array=features, index=train_index), IndexedView(array=labels, index=train_index)]
+    held_out_data = [IndexedView(array=features, index=held_out_index), IndexedView(array=labels, index=held_out_index)]
+
+    fold = search.build_model(model=model, configuration=configuration, intra_op_threads=intra_op_threads)
+
+    checkpoint_path = os.path.join(fold_path, 'checkpoint')
+
+    start_time = time.time()
+
+    results = fold.train(checkpoint_path=checkpoint_path, log_path=os.path.join(fold_path, 'logs', ''),
+                         model_name='{}.ckpt'.format(model), epochs=epochs, train_data=train_data,
+                         train_size=train_index.shape[0], validation_data=held_out_data,
+                         validation_size=held_out_index.shape[0], result_path=None,
+                         validation_batch_size=evaluation_batch_size, max_steps=max_steps)[fold.name]
+
+    # the final validation pass of train scores the held-out fold once, with its confusion matrix
+    train_time = time.time() - start_time - results['evaluation_time']
+
+    return dict(loss=results['loss'], accuracy=results['accuracy'], confusion_matrix=results['confusion_matrix'],
+                train_time=train_time, evaluation_time=results['evaluation_time'])
+
+
+def cross_validate(model, configuration, output_path, dataset_files, num_folds, epochs, max_steps=None,
+                   num_workers=1, seed=None):
+    """Runs the folds of a k-fold cross-validation concurrently, and aggregates their results
+
+    Parameter
+    ---------
+    model : str
+      The model to cross-validate, one of `search.MODELS`.
+    configuration : dict
+      The hyper-parameters of the model.
+    output_path : str
+      The new directory where to save the folds, and the results.
+    dataset_files : tuple
+      The features and labels NPY files of the cached dataset.
+    num_folds : int
+      The number of folds.
+    epochs : int
+      The number of passes through the training examples of a fold.
+    max_steps : int
+      If set, stop training a fold at this step.
+    num_workers : int
+      The number of folds to run in parallel.
+    seed : int
+      The seed for assigning the examples to folds.
+
+    Returns
+    -------
+    results : list
+      The result of every fold.
+    conf : numpy.ndarray
+      The sum of the confusion matrices of the folds.
+    """
+    # a fold would resume the checkpoint of an earlier run, which may have trained on its held-out examples
+    for fold in range(num_folds):
+        fold_path = os.path.join(output_path, 'fold-{}'.format(fold))
+        if os.path.exists(fold_path) and os.listdir(fold_path):
+            raise ValueError('The directory {} of fold {} is not empty, use a new output path '
+                             '(see `search.new_run_path`)'.format(fold_path, fold))
+
+    features, _ = search.load_cache(*dataset_files)
+
+    folds = k_fold_indices(size=features.shape[0], num_folds=num_folds, seed=seed)
+
+    # share the CPUs between the parallel folds
+    intra_op_threads = max(1, multiprocessing.cpu_count() // min(num_workers, num_folds))
+
+    arguments = [(model, configuration, os.path.join(output_path, 'fold-{}'.format(fold)), dataset_files,
+                  train_index, held_out_index, epochs, max_steps, 4096, intra_op_threads)
+                 for fold, (train_index, held_out_index) in enumerate(folds)]
+
+    context = multiprocessing.get_context('spawn')
+
+    with context.Pool(processes=min(num_workers, num_folds), maxtasksperchild=1) as pool:
+        results = pool.starmap(run_fold, arguments)
+
+    conf = np.sum([result['confusion_matrix'] for result in results], axis=0)
+
+    np.savez(os.path.join(output_path, 'cross_validation.npz'),
+             confusion_matrix=np.stack([result['confusion_matrix'] for result in results]),
+             accuracy=np.array([result['accuracy'] for result in results]),
+             loss=np.array([result['loss'] for result in results]),
+             train_time=np.array([result['train_time'] for result in results]),
+             evaluation_time=np.array([result['evaluation_time'] for result in results]))
+
+    return results, conf
@@ -77,6 +77,86 @@ def load_data(dataset):
     return data, labels
 
 
+def mix_replay(features, labels, replay_features, replay_labels, replay_fraction, seed=None):
+    """Returns new data mixed with a random sample of older data, shuffled together
+
+    Parameter
+    ---------
+    features : numpy.ndarray
+      The features of the new data.
+    labels : numpy.ndarray
+      The labels of the new data.
+    replay_features : numpy.ndarray
+      The features of the older data to sample from.
+    replay_labels : numpy.ndarray
+      The labels of the older data to sample from.
+    replay_fraction : float
+      The fraction of the mixed data to be sampled from the older data, in [0, 1).
+    seed : int
+      The seed for sampling and shuffling.
+
+    Returns
+    -------
+    features : numpy.ndarray
+      The features of the mixed data.
+    labels : numpy.ndarray
+      The labels of the mixed data.
+    """
+
+    random_state = np.random.RandomState(seed)
+
+    replay_size = min(int(features.shape[0] * replay_fraction / (1 - replay_fraction)), replay_features.shape[0])
+    replay_index = random_state.choice(replay_features.shape[0], size=replay_size, replace=False)
+
+    features = np.concatenate([features, replay_features[replay_index]])
+    labels = np.concatenate([labels, replay_labels[replay_index]])
+
+    order = random_state.permutation(features.shape[0])
+
+    return features[order], labels[order]
+
+
+class IndexedView:
+    """A read-only view of the rows of an array at some index, copying rows only when they are used
+
+    Slicing a view returns another view, so the per-batch slicing of the training and
+    evaluation loops only copies the rows of a batch when it is fed to a session.
+    """
+
+    def __init__(self, array, index):
+        """Initialize the view
+
+        Parameter
+        ---------
+        array : numpy.ndarray
+          The array to view, e.g. a memory-mapped dataset.
+        index : numpy.ndarray
+          The indices of the rows of `array` in the view.
+        """
+        self.array = array
+        self.index = np.asarray(index)
+
+    @property
+    def shape(self):
+        return (self.index.shape[0],) + self.array.shape[1:]
+
+    @property
+    def dtype(self):
+        return self.array.dtype
+
+    def __len__(self):
+        return self.index.shape[0]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return self.array[self.index[item]]
+        return IndexedView(array=self.array, index=self.index[item])
+
+    def __array__(self, dtype=None, copy=None):
+        rows = self.array[self.index]
+        return rows if dtype is None else rows.astype(dtype)
+
+
 def plot_confusion_matrix(phase, path, class_names):
     """Plots the confusion matrix using matplotlib.
 
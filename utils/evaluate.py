@@ -0,0 +1,320 @@
+# Module for evaluating the models on a validation dataset
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Single-pass evaluation of the models on a validation dataset, and validation-driven early stopping"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import numpy as np
+import queue
+import tensorflow as tf
+import threading
+import time
+
+
+def evaluate(sess, model, features, labels, batch_size, result_path=None, phase='validation'):
+    """Scores every head of a model on a dataset exactly once, using large batches
+
+    Parameter
+    ---------
+    sess : tf.Session
+      The session holding the weights to be evaluated.
+    model : object
+      The GruSvm, GruSoftmax, Svm, or GruMultiHead model whose graph will be evaluated.
+    features : numpy.ndarray
+      The features of the dataset to be evaluated.
+    labels : numpy.ndarray
+      The labels of the dataset to be evaluated.
+    batch_size : int
+      The number of examples to score per session run.
+    result_path : str
+      The path where to save the actual and predicted labels, skipped if None.
+    phase : str
+      The phase for which the predictions is, i.e. training/validation/testing.
+
+    Returns
+    -------
+    results : dict
+      The mean loss per example (see `models.model.Model.example_loss`), the accuracy, and the
+      [NUM_CLASSES, NUM_CLASSES] confusion matrix of the actual (rows) and predicted (columns) classes,
+      of every head of the model, with the seconds the pass took.
+    """
+
+    start_time = time.time()
+
+    size = features.shape[0]
+
+    heads = model.heads()
+
+    total_loss = dict.fromkeys(heads, 0.0)
+    total_correct = dict.fromkeys(heads, 0.0)
+    conf = {name: np.zeros([model.num_classes, model.num_classes], dtype=np.int64) for name in heads}
+
+    fetches = {name: [head.predicted_class, head.y_onehot, head.loss, head.accuracy] for name, head in heads.items()}
+
+    for step, offset in enumerate(range(0, size, batch_size)):
+        feature_batch = features[offset:(offset + batch_size)]
+        label_batch = labels[offset:(offset + batch_size)]
+
+        # dictionary for key-value pair input for evaluation
+        feed_dict = model.evaluation_feed(features=feature_batch, labels=label_batch)
+
+        results = sess.run(fetches, feed_dict=feed_dict)
+
+        for name, head in heads.items():
+            predictions, actual, loss, accuracy = results[name]
+
+            total_loss[name] += head.example_loss(loss=loss, rows=feature_batch.shape[0]) * feature_batch.shape[0]
+            total_correct[name] += accuracy * feature_batch.shape[0]
+            conf[name] += np.bincount(np.argmax(actual, 1) * model.num_classes + np.argmax(predictions, 1),
+                                      minlength=model.num_classes ** 2).reshape(model.num_classes,
+                                                                                model.num_classes)
+
+            if result_path is not None:
+                head.save_labels(predictions=predictions, actual=actual, result_path=result_path, step=step,
+                                 phase=phase)
+
+    evaluation_time = time.time() - start_time
+
+    return {name: dict(loss=total_loss[name] / size, accuracy=total_correct[name] / size,
+                       confusion_matrix=conf[name], evaluation_time=evaluation_time) for name in heads}
+
+
+def mean_accuracy(results):
+    """Returns the mean accuracy of the heads, by which the weights are ranked
+
+    Parameter
+    ---------
+    results : dict
+      The evaluation results of every head, as returned by `evaluate`.
+    """
+    return float(np.mean([result['accuracy'] for result in results.values()]))
+
+
+def print_results(prefix, results):
+    """Prints the loss and accuracy of every head, naming the heads if there are several
+
+    Parameter
+    ---------
+    prefix : str
+      The step and phase of the results, e.g. "step [100] train".
+    results : dict
+      The results of every head, each with its `loss` and `accuracy`.
+    """
+    for name, result in results.items():
+        print('{}{} -- loss : {}, accuracy : {}'.format(prefix, ' ' + name if len(results) > 1 else '',
+                                                        result['loss'], result['accuracy']))
+
+
+def sample(features, labels, sample_size, seed=0):
+    """Returns a fixed random sample of a dataset, or the whole dataset if it is not larger
+
+    Parameter
+    ---------
+    features : numpy.ndarray
+      The features of the dataset.
+    labels : numpy.ndarray
+      The labels of the dataset.
+    sample_size : int
+      The number of examples to sample, the whole dataset if None.
+    seed : int
+      The seed for sampling, so every evaluation scores the same examples.
+
+    Returns
+    -------
+    features : numpy.ndarray
+      The features of the sample.
+    labels : numpy.ndarray
+      The labels of the sample.
+    """
+    if sample_size is None or sample_size >= features.shape[0]:
+        return features, labels
+
+    index = np.sort(np.random.RandomState(seed).choice(features.shape[0], size=sample_size, replace=False))
+
+    return features[index], labels[index]
+
+
+def write_summary(writer, step, results):
+    """Writes the evaluation loss and accuracy of every head as TensorBoard scalars
+
+    Parameter
+    ---------
+    writer : tf.summary.FileWriter
+      The event file writer where to add the summary.
+    step : int
+      The training step at which the weights were evaluated.
+    results : dict
+      The results of every head, each with its `loss` and `accuracy`, tagged by head if there are several.
+    """
+    values = []
+    for name, result in results.items():
+        prefix = name + '/' if len(results) > 1 else ''
+        values += [tf.Summary.Value(tag=prefix + 'loss', simple_value=result['loss']),
+                   tf.Summary.Value(tag=prefix + 'accuracy', simple_value=result['accuracy'])]
+    writer.add_summary(tf.Summary(value=values), step)
+    writer.flush()
+
+
+class BackgroundEvaluator:
+    """Evaluates snapshots of the model weights in a background thread"""
+
+    def __init__(self, model, features, labels, batch_size, writer=None, config=None, patience=None):
+        """Initialize the background evaluator
+
+        The evaluator owns a second session on the model graph, so scoring a
+        snapshot never blocks the training session. A snapshot submitted while
+        the previous one is still being scored is dropped.
+
+        The snapshot with the best accuracy, averaged over the heads, is kept. With `patience`, the evaluator
+        is `converged` once that many evaluations in a row did not improve on it.
+
+        Parameter
+        ---------
+        model : object
+          The GruSvm, GruSoftmax, Svm, or GruMultiHead model whose graph will be evaluated.
+        features : numpy.ndarray
+          The features of the validation dataset.
+        labels : numpy.ndarray
+          The labels of the validation dataset.
+        batch_size : int
+          The number of examples to score per session run.
+        writer : tf.summary.FileWriter
+          The event file writer for the validation curve, skipped if None.
+        config : tf.ConfigProto
+          The session configuration for the evaluation session.
+        patience : int
+          The number of evaluations without improvement after which training should stop, never if None.
+        """
+        self.model = model
+        self.features = features
+        self.labels = labels
+        self.batch_size = batch_size
+        self.writer = writer
+        self.patience = patience
+        self.history = []
+        self.best = None
+        self.stale = 0
+        self.converged = False
+        self.error = None
+
+        graph = tf.get_default_graph()
+        self.variables = tf.trainable_variables()
+        self.sess = tf.Session(graph=graph, config=config)
+        self.sess.run(tf.global_variables_initializer())
+
+        self.snapshots = queue.Queue(maxsize=1)
+        self.thread = threading.Thread(target=self.__run__)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, sess, step):
+        """Takes a snapshot of the weights in `sess`, and queues it for evaluation
+
+        Parameter
+        ---------
+        sess : tf.Session
+          The training session.
+        step : int
+          The current training step.
+        """
+        if self.error is not None:
+            raise self.error
+        if self.snapshots.full():
+            return
+        self.snapshots.put((step, sess.run(self.variables)))
+
+    def restore_best(self, sess):
+        """Loads the best snapshot evaluated so far into `sess`
+
+        Parameter
+        ---------
+        sess : tf.Session
+          The training session.
+
+        Returns
+        -------
+        step : int
+          The training step of the best snapshot, None if no snapshot was evaluated.
+        """
+        if self.best is None:
+            return None
+
+        step, results, values = self.best
+
+        for variable, value in zip(self.variables, values):
+            variable.load(value, session=sess)
+
+        print_results(prefix='Restored the best weights, from step {}'.format(step), results=results)
+
+        return step
+
+    def close(self):
+        """Waits for the pending snapshot, then releases the evaluation session
+
+        The error which stopped the evaluation thread, if any, is raised again.
+        """
+        # a stopped thread never drains the queue, so it is not waited for
+        while self.thread.is_alive():
+            try:
+                self.snapshots.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+
+        self.thread.join()
+        self.sess.close()
+
+        if self.error is not None:
+            raise self.error
+
+    def __run__(self):
+        try:
+            self.__evaluate__()
+        except Exception as error:
+            # kept for the training thread, which raises it again on `submit` or `close`
+            self.error = error
+
+    def __evaluate__(self):
+        while True:
+            snapshot = self.snapshots.get()
+            if snapshot is None:
+                break
+            step, values = snapshot
+
+            for variable, value in zip(self.variables, values):
+                variable.load(value, session=self.sess)
+
+            results = evaluate(sess=self.sess, model=self.model, features=self.features, labels=self.labels,
+                               batch_size=self.batch_size)
+            self.history.append((step, results))
+
+            if self.best is None or mean_accuracy(results) > mean_accuracy(self.best[1]):
+                self.best = (step, results, values)
+                self.stale = 0
+            else:
+                self.stale += 1
+                self.converged = self.patience is not None and self.stale >= self.patience
+
+            if self.writer is not None:
+                write_summary(writer=self.writer, step=step, results=results)
+
+            print_results(prefix='step [{}] validation'.format(step), results=results)
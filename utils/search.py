@@ -0,0 +1,379 @@
+# Module for parallel hyperparameter search
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Parallel hyperparameter search with successive halving and Hyperband"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import csv
+import multiprocessing
+import numpy as np
+import os
+
+MODELS = ['gru_svm', 'gru_softmax', 'svm']
+N_CLASSES = 2
+SEQUENCE_LENGTH = 21
+
+
+def cache_dataset(dataset, cache_path):
+    """Writes the features and labels of a dataset as separate uint8 NPY files, if not yet cached
+
+    The binned features fit in uint8, and the NPY files can be memory-mapped by every
+    trial process, so the page cache holds one copy of the dataset for all of them.
+
+    Parameter
+    ---------
+    dataset : str
+      The NumPy array dataset (*.npy) to be cached.
+    cache_path : str
+      The directory where to write the cached dataset.
+
+    Returns
+    -------
+    features_file : str
+      The NPY file of the features.
+    labels_file : str
+      The NPY file of the labels.
+    """
+    from utils import data
+
+    name = os.path.splitext(os.path.basename(dataset))[0]
+    features_file = os.path.join(cache_path, name + '-features.npy')
+    labels_file = os.path.join(cache_path, name + '-labels.npy')
+
+    if not (os.path.exists(features_file) and os.path.exists(labels_file)):
+        if not os.path.exists(cache_path):
+            os.makedirs(cache_path)
+
+        features, labels = data.load_data(dataset=dataset)
+
+        np.save(file=features_file, arr=features.astype(np.uint8))
+        np.save(file=labels_file, arr=labels.astype(np.uint8))
+
+    return features_file, labels_file
+
+
+def load_cache(features_file, labels_file):
+    """Returns the memory-mapped features and labels of a cached dataset"""
+    return np.load(features_file, mmap_mode='r'), np.load(labels_file, mmap_mode='r')
+
+
+def new_run_path(search_path):
+    """Creates the directory of a new search run, so its trials never resume the checkpoints of an earlier run
+
+    Parameter
+    ---------
+    search_path : str
+      The directory of the searches.
+
+    Returns
+    -------
+    run_path : str
+      The new directory "run-N", N being the number of earlier runs.
+    """
+    run = 0
+    while True:
+        run_path = os.path.join(search_path, 'run-{}'.format(run))
+        try:
+            os.makedirs(run_path)
+            return run_path
+        except FileExistsError:
+            run += 1
+
+
+def sample_configuration(search_space, random_state):
+    """Returns a random configuration from a search space
+
+    Parameter
+    ---------
+    search_space : dict
+      The distribution of every hyper-parameter, one of ('choice', values), ('uniform', low, high),
+      or ('log-uniform', low, high).
+    random_state : numpy.random.RandomState
+      The random number generator.
+
+    Returns
+    -------
+    configuration : dict
+      The value of every hyper-parameter.
+    """
+    configuration = {}
+
+    for name, (distribution, *parameters) in sorted(search_space.items()):
+        if distribution == 'choice':
+            value = parameters[0][random_state.randint(len(parameters[0]))]
+        elif distribution == 'uniform':
+            value = random_state.uniform(*parameters)
+        elif distribution == 'log-uniform':
+            value = np.exp(random_state.uniform(np.log(parameters[0]), np.log(parameters[1])))
+        else:
+            raise ValueError('Unknown distribution {} of {}'.format(distribution, name))
+        configuration[name] = value.item() if isinstance(value, np.generic) else value
+
+    return configuration
+
+
+def build_model(model, configuration, intra_op_threads=0):
+    """Returns the model of a trial, with its graph built
+
+    Parameter
+    ---------
+    model : str
+      The model to build, one of `MODELS`.
+    configuration : dict
+      The hyper-parameters of the model, as keyword arguments of its constructor.
+    intra_op_threads : int
+      The number of threads used to parallelize a single op.
+    """
+    if model == 'gru_svm':
+        from models.gru_svm.gru_svm import GruSvm
+        return GruSvm(num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, intra_op_threads=intra_op_threads,
+                      **configuration)
+    elif model == 'gru_softmax':
+        from models.gru_softmax.gru_softmax import GruSoftmax
+        return GruSoftmax(num_classes=N_CLASSES, sequence_length=SEQUENCE_LENGTH, intra_op_threads=intra_op_threads,
+                          **configuration)
+    elif model == 'svm':
+        from models.svm.svm import Svm
+        return Svm(num_classes=N_CLASSES, num_features=SEQUENCE_LENGTH, intra_op_threads=intra_op_threads,
+                   **configuration)
+    raise ValueError('Unknown model {}, expected one of {}'.format(model, MODELS))
+
+
+def run_trial(model, configuration, trial_path, steps, train_files, validation_files, validation_size,
+              intra_op_threads=0):
+    """Trains a trial up to a number of steps, resuming from its checkpoint, then scores it
+
+    This runs in a fresh process for every trial and rung, so that every trial builds
+    its graph in a clean default graph, and releases its memory when done.
+
+    Parameter
+    ---------
+    model : str
+      The model to train, one of `MODELS`.
+    configuration : dict
+      The hyper-parameters of the model.
+    trial_path : str
+      The directory where to save the checkpoints and the logs of the trial.
+    steps : int
+      The total number of training steps of the trial after this run.
+    train_files : tuple
+      The features and labels NPY files of the cached training dataset.
+    validation_files : tuple
+      The features and labels NPY files of the cached validation dataset.
+    validation_size : int
+      The number of validation examples to score the trial with.
+    intra_op_threads : int
+      The number of threads used to parallelize a single op.
+
+    Returns
+    -------
+    validation_loss : float
+      The validation loss of the trial.
+    validation_accuracy : float
+      The validation accuracy of the trial.
+    """
+    if not os.path.exists(trial_path):
+        os.makedirs(trial_path)
+
+    train_features, train_labels = load_cache(*train_files)
+    validation_features, validation_labels = load_cache(*validation_files)
+
+    batch_size = configuration['batch_size']
+
+    # slice the dataset to be exact as per the batch size
+    train_size = train_features.shape[0] - (train_features.shape[0] % batch_size)
+    validation_size = min(validation_size, validation_features.shape[0])
+
+    trial = build_model(model=model, configuration=configuration, intra_op_threads=intra_op_threads)
+
+    results = trial.train(checkpoint_path=os.path.join(trial_path, 'checkpoint'),
+                          log_path=os.path.join(trial_path, 'logs', ''), model_name='{}.ckpt'.format(model),
+                          epochs=(steps * batch_size) // train_size + 1, train_data=[train_features, train_labels],
+                          train_size=train_size, validation_data=[validation_features, validation_labels],
+                          validation_size=validation_size, result_path=None, max_steps=steps)
+
+    return results[trial.name]['loss'], results[trial.name]['accuracy']
+
+
+def write_leaderboard(leaderboard, search_path):
+    """Writes the trials ranked by their budget, then by their validation accuracy, to a CSV file
+
+    Parameter
+    ---------
+    leaderboard : dict
+      The latest result of every trial, by trial number.
+    search_path : str
+      The directory where to write the leaderboard.
+
+    Returns
+    -------
+    rows : list
+      The ranked results.
+    """
+    rows = sorted(leaderboard.values(), key=lambda row: (row['steps'], row['accuracy']), reverse=True)
+    fieldnames = ['trial', 'steps', 'accuracy', 'loss']
+    fieldnames += sorted(set().union(*rows) - set(fieldnames))
+
+    leaderboard_file = os.path.join(search_path, 'leaderboard.csv')
+
+    with open(leaderboard_file + '.tmp', 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(leaderboard_file + '.tmp', leaderboard_file)
+
+    return rows
+
+
+def successive_halving(model, trials, min_steps, max_steps, eta, search_path, train_files, validation_files,
+                       validation_size, num_workers, leaderboard=None):
+    """Trains the trials in parallel for a budget, keeps the best 1/eta of them, and repeats with eta times
+    the budget, until one trial is left or the budget reaches `max_steps`
+
+    The surviving trials resume from their checkpoints, so no step is trained twice.
+
+    Parameter
+    ---------
+    model : str
+      The model to search, one of `MODELS`.
+    trials : list
+      The (trial number, configuration) pairs to start with.
+    min_steps : int
+      The number of training steps of the first rung.
+    max_steps : int
+      The maximum number of training steps of a trial.
+    eta : int
+      The inverse of the fraction of trials to keep at every rung.
+    search_path : str
+      The directory where to save the trials, and the leaderboard.
+    train_files : tuple
+      The features and labels NPY files of the cached training dataset.
+    validation_files : tuple
+      The features and labels NPY files of the cached validation dataset.
+    validation_size : int
+      The number of validation examples to score the trials with.
+    num_workers : int
+      The number of trials to train in parallel.
+    leaderboard : dict
+      The results of the trials so far, to be updated.
+
+    Returns
+    -------
+    leaderboard : dict
+      The latest result of every trial, by trial number.
+    """
+    leaderboard = {} if leaderboard is None else leaderboard
+
+    # share the CPUs between the parallel trials
+    intra_op_threads = max(1, multiprocessing.cpu_count() // num_workers)
+
+    context = multiprocessing.get_context('spawn')
+
+    # a trial resumes from its checkpoint at every rung but the first, where it must start afresh
+    for trial, _ in trials:
+        trial_path = os.path.join(search_path, 'trial-{}'.format(trial))
+        if os.path.exists(trial_path) and os.listdir(trial_path):
+            raise ValueError('The directory {} of trial {} is not empty, use a new search path '
+                             '(see `new_run_path`)'.format(trial_path, trial))
+
+    steps = min_steps
+
+    while True:
+        print('rung -- {} trials, {} steps'.format(len(trials), steps))
+
+        arguments = [(model, configuration, os.path.join(search_path, 'trial-{}'.format(trial)), steps, train_files,
+                      validation_files, validation_size, intra_op_threads) for trial, configuration in trials]
+
+        with context.Pool(processes=min(num_workers, len(trials)), maxtasksperchild=1) as pool:
+            results = pool.starmap(run_trial, arguments)
+
+        for (trial, configuration), (loss, accuracy) in zip(trials, results):
+            leaderboard[trial] = dict(trial=trial, steps=steps, loss=loss, accuracy=accuracy, **configuration)
+
+        write_leaderboard(leaderboard=leaderboard, search_path=search_path)
+
+        if len(trials) == 1 or steps >= max_steps:
+            break
+
+        # keep the best 1/eta of the trials, and train them eta times longer
+        trials = sorted(trials, key=lambda trial: leaderboard[trial[0]]['accuracy'], reverse=True)
+        trials = trials[:max(1, len(trials) // eta)]
+        steps = min(steps * eta, max_steps)
+
+    return leaderboard
+
+
+def hyperband(model, search_space, min_steps, max_steps, eta, search_path, train_files, validation_files,
+              validation_size, num_workers, seed=None):
+    """Runs successive halving over brackets that trade the number of trials for their starting budget
+
+    Parameter
+    ---------
+    model : str
+      The model to search, one of `MODELS`.
+    search_space : dict
+      The distribution of every hyper-parameter.
+    min_steps : int
+      The smallest number of training steps of a rung.
+    max_steps : int
+      The maximum number of training steps of a trial.
+    eta : int
+      The inverse of the fraction of trials to keep at every rung.
+    search_path : str
+      The directory where to save the trials, and the leaderboard.
+    train_files : tuple
+      The features and labels NPY files of the cached training dataset.
+    validation_files : tuple
+      The features and labels NPY files of the cached validation dataset.
+    validation_size : int
+      The number of validation examples to score the trials with.
+    num_workers : int
+      The number of trials to train in parallel.
+    seed : int
+      The seed for sampling the configurations.
+
+    Returns
+    -------
+    leaderboard : dict
+      The latest result of every trial, by trial number.
+    """
+    random_state = np.random.RandomState(seed)
+
+    num_brackets = int(np.floor(np.log(max_steps / min_steps) / np.log(eta) + 1e-9)) + 1
+
+    leaderboard = {}
+
+    for bracket in reversed(range(num_brackets)):
+        num_trials = int(np.ceil(num_brackets / (bracket + 1) * eta ** bracket))
+
+        trials = [(len(leaderboard) + trial, sample_configuration(search_space=search_space,
+                                                                  random_state=random_state))
+                  for trial in range(num_trials)]
+
+        print('bracket [{}] -- {} trials'.format(bracket, num_trials))
+
+        successive_halving(model=model, trials=trials, min_steps=max(min_steps, max_steps // eta ** bracket),
+                           max_steps=max_steps, eta=eta, search_path=search_path, train_files=train_files,
+                           validation_files=validation_files, validation_size=validation_size,
+                           num_workers=num_workers, leaderboard=leaderboard)
+
+    return leaderboard
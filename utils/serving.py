@@ -0,0 +1,319 @@
+# Module for scoring concurrent requests in micro-batches
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Scoring of concurrent requests in micro-batches, with latency and throughput metrics"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import collections
+import numpy as np
+import queue
+import threading
+import time
+
+# the number of binned features of a record
+SEQUENCE_LENGTH = 21
+
+
+class LatencyMetrics:
+    """Thread-safe latency percentiles and throughput of the scored requests"""
+
+    def __init__(self, window=10000):
+        """Initialize the metrics
+
+        Parameter
+        ---------
+        window : int
+          The number of most recent requests the latency percentiles are computed over.
+        """
+        self.latencies = collections.deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.start_time = time.time()
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+
+    def record_request(self, latency, rows):
+        """Records a scored request
+
+        Parameter
+        ---------
+        latency : float
+          The time in seconds from the request being submitted to its predictions being ready.
+        rows : int
+          The number of records in the request.
+        """
+        with self.lock:
+            self.latencies.append(latency)
+            self.requests += 1
+            self.rows += rows
+
+    def record_batch(self):
+        """Records a scored micro-batch"""
+        with self.lock:
+            self.batches += 1
+
+    def snapshot(self):
+        """Returns the current metrics
+
+        Returns
+        -------
+        metrics : dict
+          The number of requests, rows and micro-batches, the p50/p99 latency in milliseconds,
+          the throughput in rows per second since the start, and the mean number of requests per micro-batch.
+        """
+        with self.lock:
+            latencies = np.array(self.latencies)
+            elapsed = time.time() - self.start_time
+
+            return {'requests': self.requests, 'rows': self.rows, 'batches': self.batches,
+                    'p50_ms': float(np.percentile(latencies, 50) * 1000) if latencies.size else None,
+                    'p99_ms': float(np.percentile(latencies, 99) * 1000) if latencies.size else None,
+                    'rows_per_second': self.rows / elapsed,
+                    'requests_per_batch': self.requests / self.batches if self.batches else None}
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into micro-batches, scored in a background thread"""
+
+    def __init__(self, score, max_batch_size=256, max_wait=0.005, metrics=None):
+        """Initialize the micro-batcher
+
+        A micro-batch is scored as soon as it has `max_batch_size` rows, or `max_wait`
+        seconds after its first request, whichever comes first. A request is never split
+        across micro-batches, so a micro-batch may exceed `max_batch_size` by one request.
+
+        Parameter
+        ---------
+        score : callable
+          The function mapping a [BATCH_SIZE, SEQUENCE_LENGTH] array of features to the
+          [BATCH_SIZE, N_CLASSES] predictions.
+        max_batch_size : int
+          The number of rows after which a micro-batch is scored right away.
+        max_wait : float
+          The time in seconds a request may wait for other requests to be batched with.
+        metrics : LatencyMetrics
+          The metrics to record the requests in, new ones if None.
+        """
+        self.score = score
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.metrics = metrics if metrics is not None else LatencyMetrics()
+
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self.__run__)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, features):
+        """Scores the features with the next micro-batch, and waits for the predictions
+
+        Parameter
+        ---------
+        features : numpy.ndarray
+          The [N, SEQUENCE_LENGTH] features of the request.
+
+        Returns
+        -------
+        predictions : numpy.ndarray
+          The [N, N_CLASSES] predictions for the request.
+        """
+        request = {'features': features, 'done': threading.Event(), 'submitted': time.time()}
+        self.requests.put(request)
+        request['done'].wait()
+
+        if 'error' in request:
+            raise request['error']
+
+        return request['predictions']
+
+    def close(self):
+        """Scores the pending requests, and stops the background thread"""
+        self.requests.put(None)
+        self.thread.join()
+
+    def __run__(self):
+        """Scores the queued requests, one micro-batch at a time"""
+        closed = False
+
+        while not closed:
+            request = self.requests.get()
+
+            if request is None:
+                break
+
+            batch = [request]
+            rows = len(request['features'])
+            deadline = request['submitted'] + self.max_wait
+
+            # wait for more requests, until the micro-batch is full or the oldest request is due
+            while rows < self.max_batch_size:
+                timeout = deadline - time.time()
+                try:
+                    request = self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    closed = True
+                    break
+                batch.append(request)
+                rows += len(request['features'])
+
+            try:
+                predictions = self.score(np.concatenate([request['features'] for request in batch]))
+            except Exception as error:
+                for request in batch:
+                    request['error'] = error
+                    request['done'].set()
+                continue
+            finally:
+                self.metrics.record_batch()
+
+            offset = 0
+            now = time.time()
+            for request in batch:
+                request['predictions'] = predictions[offset:offset + len(request['features'])]
+                offset += len(request['features'])
+                self.metrics.record_request(latency=now - request['submitted'], rows=len(request['features']))
+                request['done'].set()
+
+
+def model_class(model):
+    """Returns the GruSvm, GruSoftmax, or Svm class of a trained model, by its name"""
+    from models.gru_softmax.gru_softmax import GruSoftmax
+    from models.gru_svm.gru_svm import GruSvm
+    from models.svm.svm import Svm
+
+    return {'gru_svm': GruSvm, 'gru_softmax': GruSoftmax, 'svm': Svm}[model]
+
+
+def freeze_scorer(model, checkpoint_path):
+    """Freezes the latest checkpoint of a trained model, once for all the processes scoring with it
+
+    Parameter
+    ---------
+    model : str
+      The model to freeze: "gru_svm", "gru_softmax", or "svm".
+    checkpoint_path : str
+      The path where the trained model is saved.
+
+    Returns
+    -------
+    frozen_file : str
+      The path of the frozen graph, for `load_scorer`.
+    """
+    from models.predictor import freeze_model
+    from utils import checkpoint
+
+    return freeze_model(model=model_class(model), checkpoint_path=checkpoint.resolve(checkpoint_path))
+
+
+def load_scorer(model, checkpoint_path, config=None, frozen_file=None):
+    """Returns a function scoring features with a trained model, warmed up
+
+    Parameter
+    ---------
+    model : str
+      The model to load: "gru_svm", "gru_softmax", "svm", or "numpy" for a model exported with numpy_main.py.
+    checkpoint_path : str
+      The path where the trained model is saved, or the exported NPZ file for "numpy".
+    config : tf.ConfigProto
+      The session configuration.
+    frozen_file : str
+      The graph already frozen by `freeze_scorer`, so the checkpoint is not frozen again.
+
+    Returns
+    -------
+    score : callable
+      The function mapping features to predictions.
+    """
+    if model == 'numpy':
+        from models.numpy_gru import NumpyGru
+
+        score = NumpyGru.load(checkpoint_path).predict
+    else:
+        from models.predictor import Predictor
+
+        if frozen_file is None:
+            frozen_file = freeze_scorer(model=model, checkpoint_path=checkpoint_path)
+
+        score = Predictor(model=model_class(model), config=config, frozen_file=frozen_file).predict_batch
+
+    # warm the model up, so the first request does not pay for it
+    score(np.zeros([1, SEQUENCE_LENGTH], dtype=np.float32))
+
+    return score
+
+
+def batch_stream(lines, max_batch_size=256, max_wait=0.005):
+    """Groups the lines of a stream into micro-batches, read in a background thread
+
+    A micro-batch is yielded as soon as it has `max_batch_size` lines, or `max_wait`
+    seconds after its first line arrived, whichever comes first.
+
+    Parameter
+    ---------
+    lines : iterable
+      The lines of the stream, e.g. sys.stdin.
+    max_batch_size : int
+      The maximum number of lines per micro-batch.
+    max_wait : float
+      The time in seconds a line may wait for other lines to be batched with.
+
+    Returns
+    -------
+    batches : generator
+      The micro-batches, each a list of (line, arrival time) tuples.
+    """
+    arrivals = queue.Queue()
+
+    def read():
+        for line in lines:
+            arrivals.put((line, time.time()))
+        arrivals.put(None)
+
+    thread = threading.Thread(target=read)
+    thread.daemon = True
+    thread.start()
+
+    closed = False
+
+    while not closed:
+        arrival = arrivals.get()
+
+        if arrival is None:
+            break
+
+        batch = [arrival]
+        deadline = arrival[1] + max_wait
+
+        while len(batch) < max_batch_size:
+            timeout = deadline - time.time()
+            try:
+                arrival = arrivals.get(timeout=timeout) if timeout > 0 else arrivals.get_nowait()
+            except queue.Empty:
+                break
+            if arrival is None:
+                closed = True
+                break
+            batch.append(arrival)
+
+        yield batch
@@ -0,0 +1,207 @@
+# Module for the session configuration of the TensorFlow graphs
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Session configuration for the TensorFlow graphs"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import contextlib
+import os
+import tensorflow as tf
+from tensorflow.python.client import device_lib
+
+_xla_available = None
+
+
+def xla_available():
+    """Returns whether TensorFlow was built with the XLA CPU JIT compiler"""
+    global _xla_available
+    if _xla_available is None:
+        _xla_available = any(device.device_type == 'XLA_CPU' for device in device_lib.list_local_devices())
+    return _xla_available
+
+
+@contextlib.contextmanager
+def jit_scope(use_xla):
+    """Compiles the ops built in this context with XLA, if requested and available
+
+    On CPU, XLA only compiles the ops that were explicitly marked for compilation,
+    so the graphs are marked at construction time rather than through the session.
+
+    Parameter
+    ---------
+    use_xla : bool
+      Whether to compile the ops with XLA.
+    """
+    if use_xla and xla_available():
+        with tf.contrib.compiler.jit.experimental_jit_scope():
+            yield
+    else:
+        if use_xla:
+            print('XLA is not available in this TensorFlow build, the graph will not be compiled')
+        yield
+
+
+def session_config(use_xla=False, intra_op_threads=0, inter_op_threads=0):
+    """Returns the configuration for a session
+
+    Parameter
+    ---------
+    use_xla : bool
+      Whether to turn on the session-level XLA JIT compilation.
+    intra_op_threads : int
+      The number of threads used to parallelize a single op, 0 lets TensorFlow decide.
+    inter_op_threads : int
+      The number of threads used to run independent ops, 0 lets TensorFlow decide.
+
+    Returns
+    -------
+    config : tf.ConfigProto
+      The session configuration.
+    """
+    config = tf.ConfigProto(intra_op_parallelism_threads=intra_op_threads,
+                            inter_op_parallelism_threads=inter_op_threads)
+
+    if intra_op_threads or inter_op_threads:
+        # by default, the inter-op thread pool is shared by every session of the process,
+        # and sized by whichever session was created first
+        config.use_per_session_threads = True
+
+    if use_xla and xla_available():
+        config.graph_options.optimizer_options.global_jit_level = tf.OptimizerOptions.ON_1
+
+    return config
+
+
+def parse_cpu_list(cpu_list):
+    """Returns the CPU ids in a CPU list such as "0-3,8,10-11"
+
+    Parameter
+    ---------
+    cpu_list : str
+      The comma-separated CPU ids and ranges of CPU ids.
+
+    Returns
+    -------
+    cpus : list
+      The sorted CPU ids.
+
+    Examples
+    --------
+    >>> parse_cpu_list('0-3,8')
+    [0, 1, 2, 3, 8]
+    """
+    cpus = set()
+    for item in cpu_list.strip().split(','):
+        if not item:
+            continue
+        if '-' in item:
+            first, last = item.split('-')
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(item))
+    return sorted(cpus)
+
+
+def numa_node_cpus(numa_node):
+    """Returns the CPU ids of a NUMA node
+
+    Parameter
+    ---------
+    numa_node : int
+      The NUMA node id.
+
+    Returns
+    -------
+    cpus : list
+      The sorted CPU ids of the NUMA node.
+    """
+    with open('/sys/devices/system/node/node{}/cpulist'.format(numa_node)) as cpu_list:
+        return parse_cpu_list(cpu_list.read())
+
+
+def pin_cpus(cpu_affinity=None, numa_node=None):
+    """Pins the process to a set of CPUs
+
+    The thread pools of a TensorFlow session inherit the affinity of the thread creating
+    the session, so this must be called before the first session is created.
+
+    Parameter
+    ---------
+    cpu_affinity : str
+      The CPU list to pin to, e.g. "0-7".
+    numa_node : int
+      The NUMA node whose CPUs to pin to, intersected with `cpu_affinity` if both are given.
+
+    Returns
+    -------
+    cpus : list
+      The CPU ids the process is pinned to, None if it was not pinned.
+    """
+    if cpu_affinity is None and numa_node is None:
+        return None
+
+    cpus = set(parse_cpu_list(cpu_affinity)) if cpu_affinity is not None else None
+
+    if numa_node is not None:
+        node_cpus = set(numa_node_cpus(numa_node))
+        cpus = node_cpus if cpus is None else cpus & node_cpus
+
+    if not cpus:
+        raise ValueError('No CPU left to pin to, from CPU list "{}" and NUMA node {}'.format(cpu_affinity,
+                                                                                             numa_node))
+
+    if not hasattr(os, 'sched_setaffinity'):
+        print('CPU pinning is not supported on this platform, the process will not be pinned')
+        return None
+
+    os.sched_setaffinity(0, cpus)
+
+    return sorted(cpus)
+
+
+def configure_session(use_xla=False, intra_op_threads=0, inter_op_threads=0, cpu_affinity=None, numa_node=None):
+    """Pins the process to a set of CPUs, and returns the matching session configuration
+
+    Parameter
+    ---------
+    use_xla : bool
+      Whether to turn on the session-level XLA JIT compilation.
+    intra_op_threads : int
+      The number of threads used to parallelize a single op, defaults to one per pinned CPU.
+    inter_op_threads : int
+      The number of threads used to run independent ops, 0 lets TensorFlow decide.
+    cpu_affinity : str
+      The CPU list to pin to, e.g. "0-7".
+    numa_node : int
+      The NUMA node whose CPUs to pin to.
+
+    Returns
+    -------
+    config : tf.ConfigProto
+      The session configuration.
+    """
+    cpus = pin_cpus(cpu_affinity=cpu_affinity, numa_node=numa_node)
+
+    if cpus is not None and not intra_op_threads:
+        intra_op_threads = len(cpus)
+
+    return session_config(use_xla=use_xla, intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads)
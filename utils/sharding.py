@@ -0,0 +1,172 @@
+# Module for sharded scoring of memory-mapped datasets
+# Copyright (C) 2017  Abien Fred Agarap
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published
+# by the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+# ==============================================================================
+
+"""Scoring of large memory-mapped datasets, sharded by row ranges across worker processes"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+
+__version__ = '0.1.0'
+__author__ = 'Abien Fred Agarap'
+
+import contextlib
+import functools
+import multiprocessing
+import numpy as np
+import os
+import time
+
+N_CLASSES = 2
+SEQUENCE_LENGTH = 21
+
+# the column of the label, in a dataset of features and labels
+LABEL_COLUMN = 17
+
+# the variables capping the threads of the OpenMP and BLAS libraries
+THREAD_VARIABLES = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']
+
+# the scoring function and the memory maps of a worker process
+_worker = {}
+
+
+def split_rows(num_rows, chunk_size):
+    """Returns the [start, stop) row ranges of the chunks of a dataset"""
+    return [(start, min(start + chunk_size, num_rows)) for start in range(0, num_rows, chunk_size)]
+
+
+def read_features(array, start, stop):
+    """Returns the features of rows [start, stop) of a features file, or of a dataset with its labels"""
+    rows = np.asarray(array[start:stop], dtype=np.float32)
+    if rows.shape[1] == SEQUENCE_LENGTH + 1:
+        rows = np.delete(arr=rows, obj=[LABEL_COLUMN], axis=1)
+    return rows
+
+
+@contextlib.contextmanager
+def thread_variables(threads):
+    """Caps the threads of the processes started within the context, and restores the environment after
+
+    The OpenMP and BLAS libraries read their variables when they are loaded, i.e. when a worker
+    imports NumPy, so the variables are inherited from the parent rather than set in the worker.
+    The variables already set, e.g. by the user, are kept.
+    """
+    unset = [variable for variable in THREAD_VARIABLES if variable not in os.environ]
+
+    for variable in unset:
+        os.environ[variable] = str(threads)
+    try:
+        yield
+    finally:
+        for variable in unset:
+            os.environ.pop(variable, None)
+
+
+def init_worker(model, checkpoint_path, frozen_file, features_file, output_file, intra_op_threads):
+    """Loads the model, and memory-maps the input and output files, once per worker process"""
+    from utils.serving import load_scorer
+
+    config = None
+    if model != 'numpy':
+        from utils.session import session_config
+
+        config = session_config(intra_op_threads=intra_op_threads, inter_op_threads=1)
+
+    _worker['score'] = load_scorer(model=model, checkpoint_path=checkpoint_path, config=config,
+                                    frozen_file=frozen_file)
+    _worker['features'] = np.load(features_file, mmap_mode='r')
+    _worker['output'] = np.load(output_file, mmap_mode='r+')
+
+
+def score_rows(row_range, batch_size):
+    """Scores a range of rows into the output file, and returns the number of rows scored"""
+    start, stop = row_range
+
+    for offset in range(start, stop, batch_size):
+        end = min(offset + batch_size, stop)
+        _worker['output'][offset:end] = _worker['score'](read_features(_worker['features'], offset, end))
+
+    _worker['output'].flush()
+
+    return stop - start
+
+
+def score_sharded(model, checkpoint_path, features_file, output_file, num_workers, chunk_size=65536,
+                  batch_size=4096, report_interval=5.0):
+    """Scores a NumPy array file with a pool of worker processes, each with its own warm model
+
+    The features are memory-mapped, so the file may be larger than memory. The predictions
+    are written by the workers into a preallocated NPY file of the same number of rows.
+
+    Parameter
+    ---------
+    model : str
+      The model to score with: "gru_svm", "gru_softmax", "svm", or "numpy" for an exported model.
+    checkpoint_path : str
+      The path where the trained model is saved, or the exported NPZ file for "numpy".
+    features_file : str
+      The NPY file of the [N, SEQUENCE_LENGTH] features, or of a dataset with its labels.
+    output_file : str
+      The NPY file where to write the [N, N_CLASSES] predictions.
+    num_workers : int
+      The number of worker processes.
+    chunk_size : int
+      The number of rows per task given to a worker.
+    batch_size : int
+      The number of rows per scoring call.
+    report_interval : float
+      The time in seconds between progress reports.
+
+    Returns
+    -------
+    throughput : float
+      The number of rows scored per second.
+    """
+    num_rows = np.load(features_file, mmap_mode='r').shape[0]
+
+    output = np.lib.format.open_memmap(output_file, mode='w+', dtype=np.float32, shape=(num_rows, N_CLASSES))
+    del output
+
+    threads = max(1, multiprocessing.cpu_count() // num_workers)
+
+    # freeze the checkpoint once, rather than in every worker
+    frozen_file = None
+    if model != 'numpy':
+        from utils.serving import freeze_scorer
+
+        frozen_file = freeze_scorer(model=model, checkpoint_path=checkpoint_path)
+
+    context = multiprocessing.get_context('spawn')
+
+    start_time = time.time()
+    last_report = start_time
+    done = 0
+
+    # share the CPUs between the workers, rather than oversubscribing them
+    with thread_variables(threads):
+        pool = context.Pool(processes=num_workers, initializer=init_worker,
+                            initargs=(model, checkpoint_path, frozen_file, features_file, output_file, threads))
+
+    with pool:
+        for rows in pool.imap_unordered(functools.partial(score_rows, batch_size=batch_size),
+                                        split_rows(num_rows, chunk_size)):
+            done += rows
+            if time.time() - last_report >= report_interval or done == num_rows:
+                last_report = time.time()
+                print('Scored {}/{} rows ({:.1%}), {:.1f} rows/s'.format(done, num_rows, done / num_rows,
+                                                                        done / (last_report - start_time)))
+
+    return num_rows / (time.time() - start_time)